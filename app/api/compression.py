@@ -0,0 +1,150 @@
+"""
+HTTP response compression, negotiated through Accept-Encoding.
+
+gzip and deflate are always available, brotli and zstd when their packages are installed. Responses below
+`COMPRESSION_MIN_SIZE` go out as they are, and streamed (generator) responses are compressed chunk by chunk.
+"""
+import zlib
+from typing import Callable, Dict, Iterable, Iterator, List
+
+from flask import Flask, Response, request
+
+from app.api.v1.conditional import encoded_etag
+from app.settings import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "application/msgpack",
+}
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+ZSTD_LEVEL = 3
+
+
+class _BrotliCompressor:
+    """Adapts brotli's compressor to the zlib `compress`/`flush` interface."""
+
+    def __init__(self):
+        self.compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes) -> bytes:
+        """Compresses a chunk, returning the output ready so far."""
+        return self.compressor.process(data)
+
+    def flush(self) -> bytes:
+        """Finishes the stream, returning the remaining output."""
+        return self.compressor.finish()
+
+
+def _compressors() -> Dict[str, Callable]:
+    """Returns the available compressor factories by encoding, in server preference order."""
+    compressors = {}
+    if zstandard is not None:
+        compressors["zstd"] = lambda: zstandard.ZstdCompressor(
+            level=ZSTD_LEVEL
+        ).compressobj()
+    if brotli is not None:
+        compressors["br"] = _BrotliCompressor
+    # wbits 16 + MAX_WBITS writes the gzip container, MAX_WBITS alone the zlib one HTTP calls deflate
+    compressors["gzip"] = lambda: zlib.compressobj(
+        GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+    )
+    compressors["deflate"] = lambda: zlib.compressobj(
+        GZIP_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS
+    )
+    return compressors
+
+
+COMPRESSORS = _compressors()
+
+
+def available_encodings() -> List[str]:
+    """Returns the content encodings the server can produce, in preference order."""
+    return list(COMPRESSORS)
+
+
+def negotiate_encoding(accept_encodings) -> str | None:
+    """Picks the encoding the client accepts with the highest quality, the server preference breaking ties."""
+    return accept_encodings.best_match(available_encodings())
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """Compresses a whole body."""
+    compressor = COMPRESSORS[encoding]()
+    return compressor.compress(data) + compressor.flush()
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    """Compresses a streamed body chunk by chunk, yielding output as the compressor produces it."""
+    compressor = COMPRESSORS[encoding]()
+    try:
+        for chunk in chunks:
+            output = compressor.compress(chunk)
+            if output:
+                yield output
+        yield compressor.flush()
+    finally:
+        # closes the wrapped generator (and its db session) even if the client went away
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def _is_compressible(response: Response) -> bool:
+    """Checks if the response is of a type worth compressing."""
+    mimetype = response.mimetype
+    return mimetype in COMPRESSIBLE_MIMETYPES or mimetype.startswith("text/")
+
+
+def _compress_response(response: Response) -> Response:
+    """Compresses the response (an after_request hook) with the encoding negotiated with the client."""
+    if not _is_compressible(response):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    if (
+        request.method == "HEAD"
+        or response.status_code < 200
+        or response.status_code in (204, 304)
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+
+    encoding = negotiate_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = compress_stream(response.response, encoding)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < settings.COMPRESSION_MIN_SIZE:
+            return response
+        response.set_data(compress(data, encoding))
+
+    response.headers["Content-Encoding"] = encoding
+    # the compressed bytes differ from the identity ones, so they get their own (still strong) ETag, which the
+    # conditional request checks map back to the identity one
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(encoded_etag(etag, encoding), weak=weak)
+
+    return response
+
+
+def init_compression(app: Flask) -> None:
+    """Compresses the app responses."""
+    app.after_request(_compress_response)
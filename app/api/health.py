@@ -0,0 +1,55 @@
+"""
+Liveness and readiness endpoints, for load balancers and orchestrators.
+
+`/health/live` only tells the process answers. `/health/ready` also checks the database and turns to 503 once the
+worker is draining (see `app/server.py`), so traffic moves away before it stops. Under the prefork server it reports
+the worker startup timings too.
+"""
+import os
+import threading
+
+from flask import Blueprint, jsonify
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.core.database.database import Database
+from app.logger import logger
+
+health_routes = Blueprint("health_routes", __name__)
+
+# filled in by the server worker: ms from fork to serving (`startup_ms`) and to its first response
+startup_stats: dict = {}
+_draining = threading.Event()
+
+
+def set_draining() -> None:
+    """Reports the process as not ready, as it stops taking new requests."""
+    _draining.set()
+
+
+def is_database_available() -> bool:
+    """Checks the primary database answers a trivial query."""
+    try:
+        with Database.engine().connect() as connection:
+            connection.exec_driver_sql("SELECT 1")
+    except SQLAlchemyError as error:
+        logger.error("m=is_database_available, Database check failed: %s", error)
+        return False
+    return True
+
+
+@health_routes.route("/health/live", methods=["GET"])
+def live():
+    """Returns 200 while the process is able to answer."""
+    return jsonify({"status": "alive", "pid": os.getpid()}), 200
+
+
+@health_routes.route("/health/ready", methods=["GET"])
+def ready():
+    """Returns 200 if the process can serve requests, 503 while it is draining or the database is unavailable."""
+    if _draining.is_set():
+        return jsonify({"status": "draining", "pid": os.getpid()}), 503
+
+    if not is_database_available():
+        return jsonify({"status": "unavailable", "pid": os.getpid()}), 503
+
+    return jsonify({"status": "ready", "pid": os.getpid(), **startup_stats}), 200
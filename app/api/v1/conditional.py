@@ -0,0 +1,68 @@
+"""HTTP conditional requests helpers, shared by the sync and async user routes."""
+import hashlib
+from datetime import timezone
+from typing import Callable
+
+# content encodings that may suffix an ETag, see `encoded_etag`
+ETAG_ENCODINGS = ("gzip", "deflate", "br", "zstd")
+
+
+def user_etag(user: dict) -> str:
+    """Returns the strong ETag of a user, derived from its id and last update time."""
+    return hashlib.sha1(
+        f"{user['id']}:{user['dt_updated'].isoformat()}".encode()
+    ).hexdigest()
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """Returns the ETag of a representation compressed with the encoding, told apart from the identity one."""
+    return f"{etag}-{encoding}"
+
+
+def decoded_etag(etag: str) -> str:
+    """Returns the ETag of the identity representation, stripping the suffix of a compressed one."""
+    base, _, encoding = etag.rpartition("-")
+    return base if base and encoding in ETAG_ENCODINGS else etag
+
+
+def _matches(etags, user: dict, include_weak: bool) -> bool:
+    """Checks if any of the request ETags, whatever their content encoding, is the one of the current user."""
+    if etags.star_tag:
+        return True
+
+    etag = user_etag(user)
+    return any(decoded_etag(tag) == etag for tag in etags.as_set(include_weak))
+
+
+def set_user_validators(response, user: dict):
+    """Sets the user ETag and Last-Modified headers on the response and returns it."""
+    response.set_etag(user_etag(user))
+    response.last_modified = user["dt_updated"]
+    return response
+
+
+def is_not_modified(request, user: dict) -> bool:
+    """Checks If-None-Match (or, when absent, If-Modified-Since) against the current user."""
+    if request.if_none_match:
+        return _matches(request.if_none_match, user, include_weak=True)
+
+    if request.if_modified_since:
+        # HTTP dates have no sub-second precision
+        last_modified = user["dt_updated"].replace(tzinfo=timezone.utc, microsecond=0)
+        return last_modified <= request.if_modified_since
+
+    return False
+
+
+def if_match_precondition(request) -> Callable[[dict], bool] | None:
+    """
+    Returns the If-Match check of a write, or None if the request has no If-Match.
+
+    The check is run by the repository against the current user, read on the write transaction itself: a copy read
+    before (from the user cache or a replica) may be stale, and would let a write overwrite a newer one.
+    """
+    if_match = request.if_match
+    if not if_match:
+        return None
+
+    return lambda user: _matches(if_match, user, include_weak=False)
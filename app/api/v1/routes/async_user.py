@@ -0,0 +1,113 @@
+"""Async user routes module, served by the ASGI app."""
+from quart import Blueprint, Response, request, jsonify
+
+from app.api.v1.conditional import (
+    is_not_modified,
+    if_match_precondition,
+    set_user_validators,
+)
+from app.core.pagination import decode_cursor, parse_limit
+from app.core.services.async_user_service import AsyncUserService
+from app.core.write_errors import UserWriteError
+from app.logger import logger
+
+async_user_routes = Blueprint("async_user_routes", __name__)
+
+
+def _user_response(user: dict, status: int) -> Response:
+    """Returns the user JSON response, carrying its ETag and Last-Modified headers."""
+    response = jsonify(user)
+    response.status_code = status
+    return set_user_validators(response, user)
+
+
+@async_user_routes.route("/users", methods=["GET"])
+async def list_all_users():
+    """Returns a page of users, use `limit` and `after` (the previous `next_cursor`) to paginate."""
+    try:
+        limit = parse_limit(request.args.get("limit"))
+        after_id = decode_cursor(request.args.get("after"))
+    except ValueError as error:
+        logger.error("m=list_all_users, Invalid pagination params: %s", error)
+        return jsonify({"error": str(error)}), 400
+
+    return jsonify(await AsyncUserService().list_page(limit, after_id)), 200
+
+
+@async_user_routes.route("/users/<int:user_id>", methods=["GET"])
+async def get_user(user_id: int):
+    """Returns a user by its ID, or a 304 if the client copy is still fresh."""
+    user = await AsyncUserService().get_user(user_id)
+    if not user:
+        logger.info("m=get_user, User %s not found", user_id)
+        return jsonify({"error": "User not found"}), 404
+
+    if is_not_modified(request, user):
+        return set_user_validators(Response("", status=304), user)
+
+    logger.info("m=get_user, User found: %s", user.get("id"))
+    return _user_response(user, 200)
+
+
+@async_user_routes.route("/users", methods=["POST"])
+async def create_user():
+    """Creates a new user."""
+    data = await request.get_json()
+    name = data.get("name")
+    email = data.get("email")
+
+    user = await AsyncUserService().create_user(name, email)
+    if not user:
+        logger.error(
+            "m=create_user, Error creating new user. Verify input, name=%s, email=%s",
+            name,
+            email,
+        )
+        return jsonify({"error": "Error creating new user. Verify input."}), 409
+
+    logger.info("m=create_user, User created: %s", user.get("id"))
+    return _user_response(user, 201)
+
+
+@async_user_routes.route("/users/<int:user_id>", methods=["PUT"])
+async def update_user(user_id: int):
+    """Updates a user by its ID."""
+    data = await request.get_json()
+    name = data.get("name")
+    email = data.get("email")
+
+    if not name or not email:
+        # assuming we want to update both fields updated at the same time
+        logger.error("m=update_user, Ivalid input, name=%s, email=%s", name, email)
+        return jsonify({"error": "Name and email are required"}), 400
+
+    updated_user = await AsyncUserService().update_user(
+        user_id, name, email, if_match_precondition(request)
+    )
+    if isinstance(updated_user, UserWriteError):
+        logger.error(
+            "m=update_user, Error updating user %s: %s, name=%s, email=%s",
+            user_id,
+            updated_user.message,
+            name,
+            email,
+        )
+        return jsonify({"error": updated_user.message}), updated_user.value
+
+    logger.info("m=update_user, User updated: %s", updated_user.get("id"))
+    return _user_response(updated_user, 200)
+
+
+@async_user_routes.route("/users/<int:user_id>", methods=["DELETE"])
+async def delete_user(user_id: int):
+    """Deletes a user by its ID."""
+    deleted = await AsyncUserService().delete_user(
+        user_id, if_match_precondition(request)
+    )
+    if isinstance(deleted, UserWriteError):
+        logger.error(
+            "m=delete_user, Error deleting user %s: %s", user_id, deleted.message
+        )
+        return jsonify({"error": deleted.message}), deleted.value
+
+    return jsonify({"message": f"User {user_id} deleted successfully"}), 200
@@ -1,28 +1,149 @@
 """User routes module."""
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
+from pydantic import ValidationError
 
+from app.api.v1.conditional import (
+    is_not_modified,
+    if_match_precondition,
+    set_user_validators,
+)
+from app.core.admission.admission import expensive, register_admission_control
+from app.core.database.unit_of_work import register_unit_of_work
+from app.core.pagination import decode_cursor, parse_limit
+from app.core.schemas.user_schema import UserSearchSchema
+from app.core.serialization import dumps, negotiated_response
 from app.core.services.user_service import UserService
-from app.logger import logger
+from app.core.write_errors import UserWriteError
+from app.logger import logger, register_request_id
+from app.settings import settings
 
 user_routes = Blueprint("user_routes", __name__)
+register_unit_of_work(user_routes)
+register_request_id(user_routes)
+register_admission_control(user_routes)
 
 
 @user_routes.route("/users", methods=["GET"])
+@expensive
 def list_all_users():
-    """Returns all users from the database."""
-    return jsonify(UserService().list_all()), 200
+    """Returns a page of users, use `limit` and `after` (the previous `next_cursor`) to paginate."""
+    try:
+        limit = parse_limit(request.args.get("limit"))
+        after_id = decode_cursor(request.args.get("after"))
+    except ValueError as error:
+        logger.error("m=list_all_users, Invalid pagination params: %s", error)
+        return jsonify({"error": str(error)}), 400
+
+    return negotiated_response(UserService().list_page(limit, after_id))
+
+
+@user_routes.route("/users/search", methods=["GET"])
+def search_users():
+    """
+    Returns a page of the users matching every given filter, paginated like GET /users.
+
+    Filters: `email_prefix`, `name_prefix` (case-insensitive) and the `created_from`/`created_to` and
+    `updated_from`/`updated_to` inclusive ISO 8601 datetime ranges. When many users match, a page may hold fewer than
+    `limit` of them and still have a `next_cursor`: keep paginating until it is null.
+    """
+    args = request.args.to_dict()
+    try:
+        limit = parse_limit(args.pop("limit", None))
+        after_id = decode_cursor(args.pop("after", None))
+        filters = UserSearchSchema(**args)
+    except (ValueError, ValidationError) as error:
+        logger.error("m=search_users, Invalid search params: %s", error)
+        return jsonify({"error": str(error)}), 400
+
+    return negotiated_response(UserService().search_page(filters, limit, after_id))
+
+
+@user_routes.route("/users/changes", methods=["GET"])
+def list_user_changes():
+    """
+    Returns the users created, updated or deleted since the `since` cursor, in change order.
+
+    Start without `since` and then pass the previous `next_cursor`; deleted users come as tombstones. Answers 404
+    when the feed is disabled (CHANGE_FEED_ENABLED).
+    """
+    if not settings.CHANGE_FEED_ENABLED:
+        return jsonify({"error": "The change feed is disabled"}), 404
+
+    try:
+        limit = parse_limit(request.args.get("limit"))
+        since = decode_cursor(request.args.get("since"), "seq")
+    except ValueError as error:
+        logger.error("m=list_user_changes, Invalid change feed params: %s", error)
+        return jsonify({"error": str(error)}), 400
+
+    return negotiated_response(UserService().list_changes(limit, since))
+
+
+def _parse_count(name: str, default: int, maximum: int) -> int:
+    """Parses a positive integer query param, falling back to the default and capping it on the maximum."""
+    value = request.args.get(name)
+    if value is None or value == "":
+        return default
+
+    if not value.isdigit() or int(value) < 1:
+        raise ValueError(f"Invalid {name}: {value}")
+
+    return min(int(value), maximum)
+
+
+@user_routes.route("/users/stats", methods=["GET"])
+def get_user_stats():
+    """
+    Returns the user count, the users created by day and week, and the top email domains.
+
+    Covers the last `days` days (and their ISO weeks) and the `domains` biggest domains. Served from counters maintained
+    on every write, so it costs the same whatever the number of users.
+    """
+    try:
+        days = _parse_count(
+            "days", settings.STATS_DEFAULT_DAYS, settings.STATS_MAX_DAYS
+        )
+        domains = _parse_count(
+            "domains", settings.STATS_DEFAULT_DOMAINS, settings.PAGE_MAX_LIMIT
+        )
+    except ValueError as error:
+        logger.error("m=get_user_stats, Invalid stats params: %s", error)
+        return jsonify({"error": str(error)}), 400
+
+    return negotiated_response(UserService().get_stats(days, domains))
+
+
+@user_routes.route("/users/export", methods=["GET"])
+@expensive
+def export_users():
+    """Streams all users as NDJSON (one JSON object per line)."""
+
+    def generate():
+        for user in UserService().export_all():
+            yield dumps(user) + b"\n"
+
+    logger.info("m=export_users, Starting users export")
+    return Response(generate(), status=200, mimetype="application/x-ndjson")
+
+
+def _user_response(user: dict, status: int) -> Response:
+    """Returns the user JSON response, carrying its ETag and Last-Modified headers."""
+    return set_user_validators(negotiated_response(user, status), user)
 
 
 @user_routes.route("/users/<int:user_id>", methods=["GET"])
 def get_user(user_id: int):
-    """Returns a user by its ID."""
+    """Returns a user by its ID, or a 304 if the client copy is still fresh."""
     user = UserService().get_user(user_id)
     if not user:
-        logger.info(f"m=get_user, User {user_id} not found")
+        logger.info("m=get_user, User %s not found", user_id)
         return jsonify({"error": "User not found"}), 404
 
-    logger.info(f"m=get_user, User found: {user.get('id')}")
-    return jsonify(user), 200
+    if is_not_modified(request, user):
+        return set_user_validators(Response(status=304), user)
+
+    logger.info("m=get_user, User found: %s", user.get("id"))
+    return _user_response(user, 200)
 
 
 @user_routes.route("/users", methods=["POST"])
@@ -35,12 +156,14 @@ def create_user():
     user = UserService().create_user(name, email)
     if not user:
         logger.error(
-            f"m=create_user, Error creating new user. Verify input, name={name}, email={email}"
+            "m=create_user, Error creating new user. Verify input, name=%s, email=%s",
+            name,
+            email,
         )
         return jsonify({"error": "Error creating new user. Verify input."}), 409
 
-    logger.info(f"m=create_user, User created: {user.get('id')}")
-    return jsonify(user), 201
+    logger.info("m=create_user, User created: %s", user.get("id"))
+    return _user_response(user, 201)
 
 
 @user_routes.route("/users/<int:user_id>", methods=["PUT"])
@@ -52,25 +175,109 @@ def update_user(user_id: int):
 
     if not name or not email:
         # assuming we want to update both fields updated at the same time
-        logger.error(f"m=update_user, Ivalid input, name={name}, email={email}")
+        logger.error("m=update_user, Ivalid input, name=%s, email=%s", name, email)
         return jsonify({"error": "Name and email are required"}), 400
 
-    updated_user = UserService().update_user(user_id, name, email)
-    if not updated_user:
+    updated_user = UserService().update_user(
+        user_id, name, email, if_match_precondition(request)
+    )
+    if isinstance(updated_user, UserWriteError):
         logger.error(
-            f"m=update_user, Error updating user {user_id}, verify input, name={name}, email={email}"
+            "m=update_user, Error updating user %s: %s, name=%s, email=%s",
+            user_id,
+            updated_user.message,
+            name,
+            email,
         )
-        return jsonify({"error": "User not found"}), 404
+        return jsonify({"error": updated_user.message}), updated_user.value
 
-    logger.info(f"m=update_user, User updated: {updated_user.get('id')}")
-    return jsonify(updated_user), 200
+    logger.info("m=update_user, User updated: %s", updated_user.get("id"))
+    return _user_response(updated_user, 200)
 
 
 @user_routes.route("/users/<int:user_id>", methods=["DELETE"])
 def delete_user(user_id: int):
     """Deletes a user by its ID."""
-    if not UserService().delete_user(user_id):
-        logger.error(f"m=delete_user, Error deleting user {user_id}")
-        return jsonify({"error": "Error deleting user"}), 404
+    deleted = UserService().delete_user(user_id, if_match_precondition(request))
+    if isinstance(deleted, UserWriteError):
+        logger.error(
+            "m=delete_user, Error deleting user %s: %s", user_id, deleted.message
+        )
+        return jsonify({"error": deleted.message}), deleted.value
 
     return jsonify({"message": f"User {user_id} deleted successfully"}), 200
+
+
+def _get_bulk_items(key: str) -> list | None:
+    """Returns the list of items sent on the bulk request body under `key`, or None if it is invalid."""
+    data = request.get_json(silent=True)
+    items = data.get(key) if isinstance(data, dict) else None
+    if not isinstance(items, list) or not 0 < len(items) <= settings.BULK_MAX_ITEMS:
+        return None
+
+    return items
+
+
+@user_routes.route("/users/bulk", methods=["POST"])
+@expensive
+def create_users():
+    """Creates many users at once, returning a result per item."""
+    users = _get_bulk_items("users")
+    if users is None:
+        logger.error("m=create_users, Invalid bulk input")
+        return (
+            jsonify(
+                {"error": f"A list of 1 to {settings.BULK_MAX_ITEMS} users is required"}
+            ),
+            400,
+        )
+
+    results = UserService().create_users(users)
+    if results is None:
+        logger.error("m=create_users, Batch conflicted with a concurrent write")
+        return jsonify({"error": "Error creating users. Please retry."}), 409
+
+    logger.info("m=create_users, Bulk create processed %s users", len(results))
+    return negotiated_response({"results": results})
+
+
+@user_routes.route("/users/bulk", methods=["PATCH"])
+@expensive
+def update_users():
+    """Updates many users at once, returning a result per item."""
+    users = _get_bulk_items("users")
+    if users is None:
+        logger.error("m=update_users, Invalid bulk input")
+        return (
+            jsonify(
+                {"error": f"A list of 1 to {settings.BULK_MAX_ITEMS} users is required"}
+            ),
+            400,
+        )
+
+    results = UserService().update_users(users)
+    if results is None:
+        logger.error("m=update_users, Batch conflicted with a concurrent write")
+        return jsonify({"error": "Error updating users. Please retry."}), 409
+
+    logger.info("m=update_users, Bulk update processed %s users", len(results))
+    return negotiated_response({"results": results})
+
+
+@user_routes.route("/users/bulk", methods=["DELETE"])
+@expensive
+def delete_users():
+    """Deletes many users at once, returning a result per id."""
+    user_ids = _get_bulk_items("ids")
+    if user_ids is None:
+        logger.error("m=delete_users, Invalid bulk input")
+        return (
+            jsonify(
+                {"error": f"A list of 1 to {settings.BULK_MAX_ITEMS} ids is required"}
+            ),
+            400,
+        )
+
+    results = UserService().delete_users(user_ids)
+    logger.info("m=delete_users, Bulk delete processed %s ids", len(results))
+    return negotiated_response({"results": results})
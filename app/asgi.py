@@ -0,0 +1,42 @@
+"""ASGI entry point: async variant of the user API, served e.g. with `hypercorn app.asgi:app`."""
+from quart import Quart, request, jsonify
+from werkzeug.exceptions import HTTPException
+
+from app.api.v1.routes.async_user import async_user_routes
+from app.core.database.async_database import AsyncDatabase
+from app.logger import configure_logging, logger
+from app.settings import settings
+
+app = Quart(__name__)
+app.register_blueprint(async_user_routes, url_prefix=settings.API_V1_PREFIX)
+
+
+@app.before_serving
+async def startup():
+    """Configures logging and creates the tables before serving the first request."""
+    configure_logging()
+    logger.info("Async application starting...")
+    await AsyncDatabase.initialize_db()
+
+
+@app.after_serving
+async def shutdown():
+    """Closes every pooled connection on shutdown."""
+    await AsyncDatabase.dispose()
+
+
+@app.errorhandler(Exception)
+async def handle_exception(error):
+    """Global error handler for the application. Intercept all exceptions and log them."""
+    # If it's an HTTPException, let Quart handle it normally.
+    if isinstance(error, HTTPException):
+        return error
+
+    logger.error(
+        "m=handle_exception, Unhandled exception at path %s: %s", request.path, error
+    )
+    response = jsonify(
+        {"detail": "Internal server error =/ Please contact the support team."}
+    )
+    response.status_code = 500
+    return response
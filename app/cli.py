@@ -0,0 +1,317 @@
+"""
+Offline user tools, for loads too big (or too slow) to go through the HTTP API one user at a time.
+
+    python -m app.cli users import users.csv [--chunk-size 1000] [--rejects rejects.ndjson]
+    python -m app.cli users export users.ndjson
+    python -m app.cli users reconcile-stats
+
+Files are CSV (with a header) or NDJSON, told apart by their extension or `--format`. Imports stream the file in
+chunks, each validated and deduplicated like `POST /users/bulk` and written in its own transaction. After every
+chunk the position is saved to `<file>.checkpoint`, so running a failed import again resumes after the last written
+chunk. Exports stream the users from a server-side cursor straight to the file. Both print a JSON summary with the
+rows per second.
+
+`reconcile-stats` recomputes the user counters behind `GET /users/stats` from the users table, e.g. after upgrading
+a database that already had users, or to check (and fix) their drift.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from contextlib import nullcontext, suppress
+from datetime import datetime
+from itertools import islice
+from typing import IO, Iterator, List
+
+from app.core.database.database import Database
+from app.core.database.unit_of_work import UnitOfWork
+from app.core.services.user_service import UserService
+from app.logger import configure_logging, logger
+from app.settings import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+EXPORT_COLUMNS = ("id", "name", "email", "dt_created", "dt_updated")
+# times a chunk is retried when it conflicts with a concurrent write, before giving up
+CHUNK_RETRIES = 3
+
+
+def detect_format(path: str, file_format: str | None = None) -> str:
+    """Returns the given format, or the one of the file extension."""
+    if file_format:
+        return file_format
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Unknown format of {path}, pass --format csv or ndjson")
+    return FORMATS[extension]
+
+
+def _json_default(value):
+    """Serializes the values the json module does not know, datetimes as ISO 8601."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def to_json_line(value) -> str:
+    """Serializes a value as an NDJSON line."""
+    if orjson is not None:
+        return orjson.dumps(value, default=_json_default).decode() + "\n"
+    return json.dumps(value, default=_json_default) + "\n"
+
+
+def read_users(source: IO, file_format: str) -> Iterator:
+    """
+    Lazily yields the user items of a file, one per row.
+
+    NDJSON lines that are not valid JSON are yielded as they are, to be rejected by the validation like any other
+    invalid item. Blank lines are skipped.
+    """
+    if file_format == "csv":
+        for row in csv.DictReader(source):
+            yield {"name": row.get("name"), "email": row.get("email")}
+        return
+
+    for line in source:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield line.rstrip("\n")
+
+
+def checkpoint_path(path: str) -> str:
+    """Returns the path of the checkpoint of an import."""
+    return f"{path}.checkpoint"
+
+
+def load_checkpoint(path: str) -> dict | None:
+    """Returns the checkpoint of an interrupted import of the file, if any, checking the file did not change."""
+    try:
+        with open(checkpoint_path(path)) as checkpoint_file:
+            checkpoint = json.load(checkpoint_file)
+    except FileNotFoundError:
+        return None
+
+    if checkpoint["size"] != os.path.getsize(path):
+        raise ValueError(
+            f"{path} changed since its import was interrupted, pass --restart to import it from the start"
+        )
+    return checkpoint
+
+
+def save_checkpoint(path: str, counts: dict) -> None:
+    """Saves how far the import of the file went, atomically."""
+    temporary_path = f"{checkpoint_path(path)}.tmp"
+    with open(temporary_path, "w") as checkpoint_file:
+        json.dump({"size": os.path.getsize(path), "counts": counts}, checkpoint_file)
+    os.replace(temporary_path, checkpoint_path(path))
+
+
+def _create_chunk(users: List) -> List[dict]:
+    """Creates a chunk of users in one transaction, retrying it if it conflicted with a concurrent write."""
+    for _ in range(CHUNK_RETRIES):
+        with UnitOfWork():
+            results = UserService().create_users(users)
+        if results is not None:
+            return results
+    raise RuntimeError("Chunk kept conflicting with concurrent writes")
+
+
+def import_users(
+    path: str,
+    file_format: str | None = None,
+    chunk_size: int = settings.BULK_MAX_ITEMS,
+    rejects_path: str | None = None,
+    restart: bool = False,
+) -> dict:
+    """
+    Imports the users of a file in chunks, resuming from its checkpoint unless `restart`, and returns the counts.
+
+    Rows rejected by the validation or as duplicates are counted, and written with their errors to `rejects_path`
+    if given. A chunk written again after a crash (before its checkpoint was saved) is rejected as duplicates.
+    """
+    if chunk_size < 1:
+        raise ValueError(f"Invalid chunk size: {chunk_size}")
+    file_format = detect_format(path, file_format)
+    checkpoint = None if restart else load_checkpoint(path)
+    counts = (
+        checkpoint["counts"] if checkpoint else {"rows": 0, "created": 0, "rejected": 0}
+    )
+    resumed_from = counts["rows"]
+    if resumed_from:
+        logger.info("m=import_users, Resuming %s after %s rows", path, resumed_from)
+
+    started = time.perf_counter()
+    rejects = open(rejects_path, "a") if rejects_path else nullcontext()
+    with open(path, newline="") as source, rejects as rejects_file:
+        users = islice(read_users(source, file_format), resumed_from, None)
+        while chunk := list(islice(users, chunk_size)):
+            results = _create_chunk(chunk)
+            for result in results:
+                if result["status"] == 201:
+                    counts["created"] += 1
+                    continue
+
+                counts["rejected"] += 1
+                if rejects_file is not None:
+                    index = result.pop("index")
+                    rejects_file.write(
+                        to_json_line(
+                            {
+                                "row": counts["rows"] + index + 1,
+                                **result,
+                                "user": chunk[index],
+                            }
+                        )
+                    )
+
+            counts["rows"] += len(chunk)
+            if rejects_file is not None:
+                rejects_file.flush()
+            save_checkpoint(path, counts)
+            logger.info(
+                "m=import_users, %s rows imported, %.0f rows/s",
+                counts["rows"],
+                (counts["rows"] - resumed_from) / (time.perf_counter() - started),
+            )
+
+    elapsed = time.perf_counter() - started
+    with suppress(FileNotFoundError):
+        os.remove(checkpoint_path(path))
+    return {
+        **counts,
+        "resumed_from": resumed_from,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round((counts["rows"] - resumed_from) / elapsed)
+        if elapsed
+        else 0,
+    }
+
+
+def export_users(path: str, file_format: str | None = None) -> dict:
+    """
+    Streams every user to a file, from a server-side cursor, and returns the counts.
+
+    The file is written next to its destination and only moved in place once complete.
+    """
+    file_format = detect_format(path, file_format)
+    temporary_path = f"{path}.tmp"
+    rows = 0
+    started = time.perf_counter()
+    with open(temporary_path, "w", newline="") as destination:
+        writer = None
+        if file_format == "csv":
+            writer = csv.DictWriter(destination, EXPORT_COLUMNS)
+            writer.writeheader()
+
+        for user in UserService().export_all():
+            if writer is not None:
+                writer.writerow(
+                    {
+                        key: value.isoformat() if isinstance(value, datetime) else value
+                        for key, value in user.items()
+                    }
+                )
+            else:
+                destination.write(to_json_line(user))
+            rows += 1
+    os.replace(temporary_path, path)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed) if elapsed else 0,
+    }
+
+
+def reconcile_stats() -> dict:
+    """Recomputes the user counters, returning how many there are and how many had drifted."""
+    started = time.perf_counter()
+    summary = UserService().reconcile_stats()
+    return {**summary, "seconds": round(time.perf_counter() - started, 3)}
+
+
+def positive_int(value: str) -> int:
+    """Parses a command line integer of at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Builds the command line parser."""
+    parser = argparse.ArgumentParser(
+        prog="python -m app.cli", description=__doc__.strip().splitlines()[0]
+    )
+    groups = parser.add_subparsers(dest="group", required=True)
+    users = groups.add_parser(
+        "users", help="import, export or count users"
+    ).add_subparsers(dest="command", required=True)
+
+    import_parser = users.add_parser("import", help="import users from a file")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--format", choices=("csv", "ndjson"))
+    import_parser.add_argument(
+        "--chunk-size",
+        type=positive_int,
+        default=settings.BULK_MAX_ITEMS,
+        help="rows per transaction",
+    )
+    import_parser.add_argument(
+        "--rejects", help="NDJSON file to write the rejected rows to"
+    )
+    import_parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="ignore the checkpoint, import from the start",
+    )
+    import_parser.set_defaults(
+        handler=lambda args: import_users(
+            args.path, args.format, args.chunk_size, args.rejects, args.restart
+        )
+    )
+
+    export_parser = users.add_parser("export", help="export every user to a file")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--format", choices=("csv", "ndjson"))
+    export_parser.set_defaults(
+        handler=lambda args: export_users(args.path, args.format)
+    )
+
+    reconcile_parser = users.add_parser(
+        "reconcile-stats", help="recompute the user counters from the users table"
+    )
+    reconcile_parser.set_defaults(handler=lambda args: reconcile_stats())
+    return parser
+
+
+def main(argv=None) -> int:
+    """Runs the command, printing its JSON summary."""
+    args = build_parser().parse_args(argv)
+    configure_logging()
+    Database.initialize_db()
+    try:
+        summary = args.handler(args)
+    except (OSError, ValueError, RuntimeError) as error:
+        logger.error("m=main, %s", error)
+        return 1
+
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
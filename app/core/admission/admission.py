@@ -0,0 +1,234 @@
+"""
+Admission control: rate limits and a cap on concurrent expensive requests.
+
+Every client gets a token bucket per route, refilled at `RATE_LIMIT_PER_SECOND` up to `RATE_LIMIT_BURST` tokens
+(or the route override in `RATE_LIMIT_ROUTE_LIMITS`), and requests over it get a 429. Routes marked with `expensive`
+also need one of the `ADMISSION_MAX_EXPENSIVE` in-flight slots, and get a 503 when all are taken. Both answer right
+away with a `Retry-After`, so a misbehaving client can not tie up the workers.
+"""
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable
+
+from flask import current_app, g, jsonify, request
+
+from app.logger import logger
+from app.settings import settings
+
+# the in-flight slots are shared by every expensive route
+EXPENSIVE_KEY = "expensive"
+
+
+class AdmissionBackend(ABC):
+    """
+    Base interface for admission backends, keeping the token buckets and in-flight counters.
+
+    The in-memory backend limits each process on its own. A shared backend (e.g. Redis) only has to implement
+    these methods atomically to enforce the limits across every process and host.
+    """
+
+    @abstractmethod
+    def take_token(self, key: str, rate: float, burst: int) -> float:
+        """Takes a token from the key bucket, returning 0 if taken or else the seconds until one is available."""
+
+    @abstractmethod
+    def acquire_slot(self, key: str, limit: int) -> bool:
+        """Takes one of the `limit` in-flight slots of the key without waiting, returning False if none is free."""
+
+    @abstractmethod
+    def release_slot(self, key: str) -> None:
+        """Gives back an in-flight slot of the key."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Refills every bucket and frees every slot."""
+
+    def stats(self) -> dict:
+        """Returns the backend counters."""
+        return {}
+
+
+class InMemoryAdmissionBackend(AdmissionBackend):
+    """Thread-safe in-process backend, keeping the buckets of up to `max_keys` clients (least recently seen go)."""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        # key -> (tokens, last refill time), a forgotten bucket just comes back full
+        self._buckets: OrderedDict = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.rejected_rate = 0
+        self.rejected_slots = 0
+
+    def take_token(self, key: str, rate: float, burst: int) -> float:
+        """Refills the key bucket for the time elapsed and takes a token from it, if there is one."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated_at) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                self.rejected_rate += 1
+                wait = (1 - tokens) / rate if rate > 0 else math.inf
+
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+        return wait
+
+    def acquire_slot(self, key: str, limit: int) -> bool:
+        """Takes an in-flight slot of the key, if fewer than `limit` are taken."""
+        with self._lock:
+            in_flight = self._in_flight.get(key, 0)
+            if in_flight >= limit:
+                self.rejected_slots += 1
+                return False
+
+            self._in_flight[key] = in_flight + 1
+            return True
+
+    def release_slot(self, key: str) -> None:
+        """Gives back an in-flight slot of the key."""
+        with self._lock:
+            in_flight = self._in_flight.get(key, 0) - 1
+            if in_flight > 0:
+                self._in_flight[key] = in_flight
+            else:
+                self._in_flight.pop(key, None)
+
+    def clear(self) -> None:
+        """Refills every bucket and frees every slot."""
+        with self._lock:
+            self._buckets.clear()
+            self._in_flight.clear()
+
+    def stats(self) -> dict:
+        """Returns the rejection counters, the tracked clients and the slots in use."""
+        return {
+            "buckets": len(self._buckets),
+            "in_flight": dict(self._in_flight),
+            "rejected_rate": self.rejected_rate,
+            "rejected_slots": self.rejected_slots,
+        }
+
+
+_admission_backend: AdmissionBackend | None = None
+
+
+def get_admission_backend() -> AdmissionBackend:
+    """Returns the process-wide admission backend, in memory unless replaced."""
+    global _admission_backend
+    if _admission_backend is None:
+        _admission_backend = InMemoryAdmissionBackend(settings.RATE_LIMIT_MAX_CLIENTS)
+    return _admission_backend
+
+
+def set_admission_backend(backend: AdmissionBackend | None) -> None:
+    """Replaces the process-wide admission backend (e.g. with one on a shared store)."""
+    global _admission_backend
+    _admission_backend = backend
+
+
+class _Slot:
+    """An in-flight slot taken by a request, released once however many paths try to release it."""
+
+    def __init__(self, backend: AdmissionBackend, key: str):
+        self.backend = backend
+        self.key = key
+        self._released = False
+        self._lock = threading.Lock()
+
+    def release(self) -> None:
+        """Gives the slot back, unless it already was."""
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self.backend.release_slot(self.key)
+
+
+def expensive(view: Callable) -> Callable:
+    """Marks a view as expensive, so it needs an in-flight slot to run."""
+    view.is_expensive = True
+    return view
+
+
+def client_key() -> str:
+    """Returns the key identifying the client, its `RATE_LIMIT_CLIENT_HEADER` value or its address."""
+    if settings.RATE_LIMIT_CLIENT_HEADER:
+        key = request.headers.get(settings.RATE_LIMIT_CLIENT_HEADER)
+        if key:
+            return key
+    return request.remote_addr or "unknown"
+
+
+def _rejected(status: int, error: str, retry_after: float):
+    """Builds a rejection response, telling the client when to retry (in whole seconds)."""
+    response = jsonify({"error": error})
+    response.status_code = status
+    response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def register_admission_control(blueprint) -> None:
+    """Rate limits every request handled by the blueprint (or app), and caps the in-flight expensive ones."""
+
+    @blueprint.before_request
+    def admit_request():
+        """Rejects the request if its client is over the route rate or every expensive slot is taken."""
+        backend = get_admission_backend()
+        endpoint = request.endpoint or request.path
+
+        if settings.RATE_LIMIT_ENABLED:
+            rate, burst = settings.RATE_LIMIT_ROUTE_LIMITS.get(
+                endpoint, (settings.RATE_LIMIT_PER_SECOND, settings.RATE_LIMIT_BURST)
+            )
+            wait = backend.take_token(f"{client_key()}:{endpoint}", rate, burst)
+            if wait > 0:
+                logger.warning(
+                    "m=admit_request, Rate limited client %s on %s",
+                    client_key(),
+                    endpoint,
+                )
+                return _rejected(429, "Too many requests", wait)
+
+        limit = settings.ADMISSION_MAX_EXPENSIVE
+        view = current_app.view_functions.get(request.endpoint)
+        if limit <= 0 or not getattr(view, "is_expensive", False):
+            return None
+
+        if not backend.acquire_slot(EXPENSIVE_KEY, limit):
+            logger.warning("m=admit_request, Server busy, rejected %s", endpoint)
+            return _rejected(
+                503, "Server busy, please retry", settings.ADMISSION_RETRY_AFTER
+            )
+        g.admission_slot = _Slot(backend, EXPENSIVE_KEY)
+        return None
+
+    @blueprint.after_request
+    def hold_slot_while_streaming(response):
+        """Hands the slot to a streamed response (e.g. the export), to be released once its body is sent."""
+        slot = g.get("admission_slot")
+        if slot is not None and response.is_streamed:
+            response.call_on_close(slot.release)
+            g.admission_slot_streamed = True
+        return response
+
+    @blueprint.teardown_request
+    def release_slot(error=None):
+        """
+        Releases the slot once the request is done, unless a streamed response that was sent holds it.
+
+        Always runs, so the slot is released even if an after_request hook (e.g. the unit of work commit) failed,
+        in which case the response holding it (if any) was dropped for the error one.
+        """
+        slot = g.pop("admission_slot", None)
+        streamed = g.pop("admission_slot_streamed", False)
+        if slot is not None and (error is not None or not streamed):
+            slot.release()
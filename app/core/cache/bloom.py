@@ -0,0 +1,247 @@
+"""
+In-process bloom filter over the user emails, to skip the duplicate email queries of the bulk writes.
+
+A bloom filter answers "definitely absent" or "maybe present" in constant memory. Most created emails are new, so
+when every email of a batch is definitely absent its `fetch_email_owners` query is skipped. The unique index on
+`users.email` stays the source of truth: an email written by another process misses this one's filter, in which
+case the insert conflicts, the batch is retried by the client and, having learnt those emails, the filter sends
+them to the database.
+
+Bits can not be removed, so deleted and replaced emails leave stale bits behind (raising the false positive rate)
+until the filter is rebuilt from a scan of the users table, every `EMAIL_INDEX_REBUILD_INTERVAL` seconds. The app
+builds it at startup, and rebuilds run in the background: a request never waits for the scan.
+"""
+import hashlib
+import math
+import threading
+import time
+from typing import Callable, Iterable, List
+
+from app.logger import logger
+from app.settings import settings
+
+
+def _start_daemon_thread(task: Callable[[], None]) -> None:
+    """Runs the task on a new daemon thread."""
+    threading.Thread(target=task, daemon=True).start()
+
+
+def normalize_email(email: str) -> str:
+    """Normalizes an email for the filter, which may only make more emails collide (never miss one)."""
+    return email.strip().lower()
+
+
+class BloomFilter:
+    """Bloom filter sized for `capacity` items at a `error_rate` false positive rate, thread-safe on writes."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        self.size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        )
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+        self._lock = threading.Lock()
+
+    def _positions(self, item: str) -> List[int]:
+        """Returns the bits of the item, double hashing a single digest."""
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "little"), int.from_bytes(
+            digest[8:], "little"
+        )
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, item: str) -> None:
+        """Adds an item."""
+        positions = self._positions(item)
+        # setting a bit is a read-modify-write of its byte, two unlocked adds could lose one of them
+        with self._lock:
+            for position in positions:
+                self._bits[position >> 3] |= 1 << (position & 7)
+            self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        """Returns False if the item was definitely never added, True if it maybe was."""
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+    def false_positive_rate(self) -> float:
+        """Estimates the current false positive rate, from the items added so far."""
+        return (
+            1 - math.exp(-self.hash_count * self.count / self.size)
+        ) ** self.hash_count
+
+    @property
+    def memory_bytes(self) -> int:
+        """Returns the size of the bit array."""
+        return len(self._bits)
+
+
+class EmailIndex:
+    """
+    Bloom filter of the user emails, kept up to date by the user service and rebuilt from `load_emails`.
+
+    `load_emails` returns the number of users and an iterable streaming their emails. `run_in_background` runs the
+    rebuilds not asked for with `rebuild()`, on a daemon thread by default.
+    """
+
+    def __init__(
+        self,
+        load_emails: Callable[[], tuple],
+        capacity: int,
+        error_rate: float,
+        rebuild_interval: float = 0,
+        run_in_background: Callable[[Callable[[], None]], None] = _start_daemon_thread,
+    ):
+        self.load_emails = load_emails
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.rebuild_interval = rebuild_interval
+        self.run_in_background = run_in_background
+        self._filter: BloomFilter | None = None
+        self._built_at = 0.0
+        self._rebuild_lock = threading.Lock()
+        self._lock = threading.Lock()
+        # emails added while a rebuild scans the table, so the new filter gets them too
+        self._added_while_rebuilding: List[str] | None = None
+        self._rebuild_scheduled = False
+        self.rebuilds = 0
+        self.removed = 0
+        self.skipped_lookups = 0
+        self.lookups = 0
+
+    def rebuild(self) -> None:
+        """Builds a new filter from a streaming scan of the users, sized for twice them, and swaps it in."""
+        with self._rebuild_lock:
+            started = time.perf_counter()
+            self._added_while_rebuilding = []
+            total, emails = self.load_emails()
+            bloom = BloomFilter(max(self.capacity, total * 2), self.error_rate)
+            for email in emails:
+                bloom.add(normalize_email(email))
+
+            with self._lock:
+                added, self._added_while_rebuilding = self._added_while_rebuilding, None
+                for email in added:
+                    bloom.add(email)
+                self._filter = bloom
+            self._built_at = time.monotonic()
+            self.removed = 0
+            self.rebuilds += 1
+
+        logger.info(
+            "m=EmailIndex.rebuild, Indexed %s emails in %.1f ms",
+            bloom.count,
+            (time.perf_counter() - started) * 1000,
+        )
+
+    def _current_filter(self) -> BloomFilter | None:
+        """
+        Returns the filter, rebuilding it in the background once due.
+
+        A filter not built yet (at startup) is built in the background too, and None is returned meanwhile.
+        """
+        with self._lock:
+            due = not self._rebuild_scheduled and (
+                self._filter is None
+                or self.rebuild_interval > 0
+                and time.monotonic() - self._built_at > self.rebuild_interval
+            )
+            self._rebuild_scheduled = self._rebuild_scheduled or due
+        if due:
+            self.run_in_background(self._scheduled_rebuild)
+        return self._filter
+
+    def _scheduled_rebuild(self) -> None:
+        """Rebuilds the filter, letting the next lookup schedule another rebuild once done (or failed)."""
+        try:
+            self.rebuild()
+        except Exception as error:
+            # the current filter stays, and the next lookup retries
+            logger.error("m=EmailIndex.rebuild, Rebuild failed: %s", error)
+        finally:
+            self._rebuild_scheduled = False
+
+    def add_many(self, emails: Iterable[str]) -> None:
+        """Adds the emails of created or updated users, unless the filter is not built yet (it will scan them)."""
+        emails = [normalize_email(email) for email in emails]
+        # either queued for the filter being rebuilt, or added to the one that replaced it
+        with self._lock:
+            bloom = self._filter
+            if self._added_while_rebuilding is not None:
+                self._added_while_rebuilding.extend(emails)
+        if bloom is not None:
+            for email in emails:
+                bloom.add(email)
+
+    def note_removed(self, count: int) -> None:
+        """Counts emails gone from the table, whose bits stay set until the next rebuild."""
+        self.removed += count
+
+    def all_absent(self, emails: Iterable[str]) -> bool:
+        """Returns True if none of the emails is in the table, False if any maybe is (or the filter is not built)."""
+        bloom = self._current_filter()
+        self.lookups += 1
+        absent = bloom is not None and not any(
+            normalize_email(email) in bloom for email in emails
+        )
+        if absent:
+            self.skipped_lookups += 1
+        return absent
+
+    def stats(self) -> dict:
+        """
+        Returns the filter size, memory and estimated false positive rate, and the lookups it saved.
+
+        Reports the filter as it is, never building it: the sizes are 0 until it is first built.
+        """
+        bloom = self._filter
+        return {
+            "items": bloom.count if bloom else 0,
+            "stale_items": self.removed,
+            "bits": bloom.size if bloom else 0,
+            "hashes": bloom.hash_count if bloom else 0,
+            "memory_bytes": bloom.memory_bytes if bloom else 0,
+            "false_positive_rate": round(bloom.false_positive_rate(), 6)
+            if bloom
+            else 0,
+            "rebuilds": self.rebuilds,
+            "lookups": self.lookups,
+            "skipped_lookups": self.skipped_lookups,
+        }
+
+
+def _load_user_emails() -> tuple:
+    """Returns the number of users and a stream of their emails."""
+    # imported here, the repository is instrumented by the metrics module, which reports this index
+    from app.core.repositories.user_repository import UserRepository
+
+    repository = UserRepository()
+    return repository.count_users(), repository.stream_emails(
+        settings.EXPORT_BATCH_SIZE
+    )
+
+
+_email_index: EmailIndex | None = None
+
+
+def get_email_index() -> EmailIndex | None:
+    """Returns the process-wide email index configured on settings, or None if it is disabled."""
+    global _email_index
+    if _email_index is None and settings.EMAIL_INDEX_ENABLED:
+        _email_index = EmailIndex(
+            _load_user_emails,
+            settings.EMAIL_INDEX_CAPACITY,
+            settings.EMAIL_INDEX_ERROR_RATE,
+            settings.EMAIL_INDEX_REBUILD_INTERVAL,
+        )
+    return _email_index
+
+
+def set_email_index(email_index: EmailIndex | None) -> None:
+    """Replaces the process-wide email index."""
+    global _email_index
+    _email_index = email_index
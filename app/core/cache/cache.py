@@ -0,0 +1,206 @@
+"""Cache backends used to keep hot reads away from the database."""
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from app.settings import settings
+
+
+class CacheBackend(ABC):
+    """
+    Base interface for cache backends.
+
+    A shared backend (e.g. Redis, memcached) only has to implement these methods, serializing values as it needs.
+    A `None` value is never stored, so `get` returning None always means a miss.
+    """
+
+    @abstractmethod
+    def get(self, key: Hashable) -> Any | None:
+        """Returns the cached value for the key, or None on a miss."""
+
+    @abstractmethod
+    def set(self, key: Hashable, value: Any) -> None:
+        """Stores a value under the key."""
+
+    @abstractmethod
+    def delete(self, key: Hashable) -> None:
+        """Removes the key, if cached."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Removes every key."""
+
+    def stats(self) -> dict:
+        """Returns the backend counters."""
+        return {}
+
+
+class NullCache(CacheBackend):
+    """Cache backend that stores nothing, used when caching is disabled."""
+
+    def get(self, key: Hashable) -> Any | None:
+        """Always misses."""
+        return None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Does nothing."""
+
+    def delete(self, key: Hashable) -> None:
+        """Does nothing."""
+
+    def clear(self) -> None:
+        """Does nothing."""
+
+
+class LRUCache(CacheBackend):
+    """Thread-safe in-process LRU cache, bounded by size and with a time to live per entry."""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        """Returns the number of cached entries, expired ones included."""
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any | None:
+        """Returns the cached value for the key, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Stores a value under the key, evicting the least recently used entries when full."""
+        if value is None:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        """Removes the key, if cached."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Removes every key."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Returns the hit, miss, eviction and expiration counters and the current size."""
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class TieredCache(CacheBackend):
+    """In-process LRU cache in front of a shared cache backend, so most hits never leave the process."""
+
+    def __init__(self, local: LRUCache, shared: CacheBackend):
+        self.local = local
+        self.shared = shared
+        self.shared_hits = 0
+        self.shared_misses = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        """Returns the value from the local cache, falling back to the shared one."""
+        value = self.local.get(key)
+        if value is not None:
+            return value
+
+        value = self.shared.get(key)
+        if value is None:
+            self.shared_misses += 1
+            return None
+
+        self.shared_hits += 1
+        self.local.set(key, value)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Stores the value on both caches."""
+        self.shared.set(key, value)
+        self.local.set(key, value)
+
+    def delete(self, key: Hashable) -> None:
+        """Removes the key from both caches."""
+        self.shared.delete(key)
+        self.local.delete(key)
+
+    def clear(self) -> None:
+        """Removes every key from both caches."""
+        self.shared.clear()
+        self.local.clear()
+
+    def stats(self) -> dict:
+        """Returns the local cache counters along with the shared cache hits and misses."""
+        return {
+            **self.local.stats(),
+            "shared_hits": self.shared_hits,
+            "shared_misses": self.shared_misses,
+        }
+
+
+_user_cache: CacheBackend | None = None
+
+
+def user_cache_enabled(processes: int = 1) -> bool:
+    """
+    Returns whether the in-process user cache is enabled when `processes` serve the app.
+
+    A write drops the user only from the cache of the process that served it, so the others keep serving the old
+    version for up to USER_CACHE_TTL. Unless USER_CACHE_ENABLED says otherwise, it is then only enabled for a single
+    process. Several processes should share a backend instead (see `set_user_cache`).
+    """
+    if settings.USER_CACHE_ENABLED is None:
+        return processes <= 1
+    return settings.USER_CACHE_ENABLED
+
+
+def get_user_cache() -> CacheBackend:
+    """Returns the process-wide user cache, configured on settings."""
+    global _user_cache
+    if _user_cache is None:
+        _user_cache = (
+            LRUCache(settings.USER_CACHE_MAX_SIZE, settings.USER_CACHE_TTL)
+            if user_cache_enabled()
+            else NullCache()
+        )
+    return _user_cache
+
+
+def set_user_cache(cache: CacheBackend | None) -> None:
+    """Replaces the process-wide user cache (e.g. with a TieredCache over a shared backend)."""
+    global _user_cache
+    _user_cache = cache
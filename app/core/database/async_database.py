@@ -0,0 +1,104 @@
+"""Async database connection and session handling, used by the ASGI app."""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator
+
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.database.database import Database
+from app.core.database.sqlite import apply_sqlite_tuning
+from app.core.models.base_model import BaseModel
+from app.settings import settings
+
+# async driver used for each database the (sync) primary database URL may point to
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg", "mysql": "aiomysql"}
+
+
+class AsyncDatabase:
+    """
+    Handles async database connection.
+
+    Mirrors `Database`: a single AsyncEngine and session factory are lazily built and shared by the whole process,
+    on the same primary database. There are no read replicas here, every read goes to the primary.
+    """
+
+    _engine: AsyncEngine | None = None
+    _session_factory: async_sessionmaker | None = None
+
+    @staticmethod
+    def database_url() -> URL:
+        """
+        Returns the primary database URL of `Database`, on its async driver.
+
+        Raises ValueError when there is no known async driver for that database, so the app fails at startup.
+        """
+        url = make_url(Database.database_url())
+        if url.get_dialect().is_async:
+            return url
+
+        driver = ASYNC_DRIVERS.get(url.get_backend_name())
+        if driver is None:
+            raise ValueError(
+                f"No async driver for the {url.get_backend_name()} database on DB_URL"
+            )
+        return url.set(drivername=f"{url.get_backend_name()}+{driver}")
+
+    @classmethod
+    def engine(cls) -> AsyncEngine:
+        """Returns the process-wide async database engine, creating it on first use."""
+        # engine creation does not await, so there is no race between coroutines here
+        if cls._engine is None:
+            cls._engine = create_async_engine(
+                cls.database_url(),
+                # aiosqlite defaults to NullPool, which would open a connection per session
+                poolclass=AsyncAdaptedQueuePool,
+                pool_size=settings.DB_POOL_SIZE,
+                max_overflow=settings.DB_MAX_OVERFLOW,
+                pool_recycle=settings.DB_POOL_RECYCLE,
+                pool_pre_ping=settings.DB_POOL_PRE_PING,
+            )
+            # connection events are only available on the sync engine the async one wraps
+            apply_sqlite_tuning(cls._engine.sync_engine)
+        return cls._engine
+
+    @classmethod
+    def session_factory(cls) -> async_sessionmaker:
+        """Returns the process-wide async session factory, creating it on first use."""
+        if cls._session_factory is None:
+            cls._session_factory = async_sessionmaker(
+                bind=cls.engine(),
+                autoflush=False,
+                expire_on_commit=False,
+            )
+        return cls._session_factory
+
+    @classmethod
+    async def dispose(cls):
+        """Discards the current engine and session factory, so the next use builds new ones."""
+        engine, cls._engine, cls._session_factory = cls._engine, None, None
+        if engine is not None:
+            await engine.dispose()
+
+    @classmethod
+    async def initialize_db(cls):
+        """Initializes database and creates tables, based on models that inherits from BaseModel."""
+        async with cls.engine().begin() as connection:
+            await connection.run_sync(BaseModel.metadata.create_all)
+
+    @staticmethod
+    @asynccontextmanager
+    async def create_new_session() -> AsyncGenerator[AsyncSession, None]:
+        """Initializes a new async db session and returns it."""
+        db = AsyncDatabase.session_factory()()
+        try:
+            yield db
+        finally:
+            # shield the close so a cancelled request still returns its connection to the pool
+            await asyncio.shield(db.close())
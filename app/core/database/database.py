@@ -1,50 +1,232 @@
 """Database connection and session handling."""
+import itertools
+import threading
 from contextlib import contextmanager
-from typing import Generator
+from typing import Generator, List
 
 from sqlalchemy import create_engine
-from sqlalchemy.engine import Engine
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.sql.dml import UpdateBase
 
+from app.core.database.sqlite import (
+    apply_sqlite_tuning,
+    begin_before_savepoint,
+    begin_immediate,
+)
 from app.core.models.base_model import BaseModel
 from app.settings import settings
 
 
+class SingleWriterSession(Session):
+    """
+    Session sending reads to the shared pool and writes to the single writer connection.
+
+    Once it writes, everything else until its transaction ends also goes to the writer, so it reads its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        """Returns the writer engine for flushes and DML statements (and after them), the pool otherwise."""
+        if self.info.get("writer") or self._flushing or isinstance(clause, UpdateBase):
+            self.info["writer"] = True
+            return Database.writer_engine()
+        return Database.engine()
+
+    def commit(self) -> None:
+        """Commits, going back to reading from the pool."""
+        super().commit()
+        self.info.pop("writer", None)
+
+    def rollback(self) -> None:
+        """Rolls back, going back to reading from the pool."""
+        super().rollback()
+        self.info.pop("writer", None)
+
+
 class Database:
-    """Handles database connection."""
+    """
+    Handles database connection.
+
+    A single engine (and its connection pool) and a single session factory are lazily built and shared by the whole
+    process. Call `Database.dispose()` after forking a worker so it builds its own pool.
+
+    The primary database is `DB_URL` (SQLite on `DB_PATH` by default). Reads that tolerate replication lag can use
+    the `DB_REPLICA_URLS` read replicas, each with its own pool, picked as set on `DB_REPLICA_SELECTION`.
+
+    With `DB_SINGLE_WRITER`, writes go through a second engine holding a single connection: concurrent writes queue
+    on it instead of contending for the SQLite write lock, while reads stay concurrent on the shared pool.
+    """
 
     DATABASE_URL = "sqlite:///{db_path}"
 
+    _engine: Engine | None = None
+    _writer_engine: Engine | None = None
+    _replica_engines: List[Engine] | None = None
+    _replica_session_factory: sessionmaker | None = None
+    _replica_counter = itertools.count()
+    _session_factory: sessionmaker | None = None
+    _lock = threading.Lock()
+
     @staticmethod
-    def engine() -> Engine:
-        """Creates a database engine."""
-        return create_engine(Database.DATABASE_URL.format(db_path=settings.DB_PATH))
+    def database_url() -> str:
+        """Returns the primary database URL."""
+        return settings.DB_URL or Database.DATABASE_URL.format(db_path=settings.DB_PATH)
+
+    @staticmethod
+    def backend_name() -> str:
+        """Returns the backend of the primary database (e.g. sqlite, postgresql), without connecting to it."""
+        return make_url(Database.database_url()).get_backend_name()
+
+    @staticmethod
+    def _create_engine(url: str | None = None) -> Engine:
+        """Creates an engine, of the primary by default, with the pool and SQLite profile configured on settings."""
+        engine = create_engine(
+            url or Database.database_url(),
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+        )
+        # repositories write within savepoints
+        return begin_before_savepoint(apply_sqlite_tuning(engine))
+
+    @staticmethod
+    def _create_writer_engine() -> Engine:
+        """Creates the writer engine: one connection, waited on in turn, taking the write lock on BEGIN."""
+        engine = create_engine(
+            Database.database_url(),
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=settings.DB_WRITER_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+        )
+        return begin_immediate(apply_sqlite_tuning(engine))
+
+    @classmethod
+    def engine(cls) -> Engine:
+        """Returns the process-wide primary database engine, creating it on first use."""
+        if cls._engine is None:
+            with cls._lock:
+                if cls._engine is None:
+                    cls._engine = cls._create_engine()
+        return cls._engine
+
+    @classmethod
+    def writer_engine(cls) -> Engine:
+        """Returns the process-wide single writer engine, creating it on first use."""
+        if cls._writer_engine is None:
+            with cls._lock:
+                if cls._writer_engine is None:
+                    cls._writer_engine = cls._create_writer_engine()
+        return cls._writer_engine
+
+    @classmethod
+    def replica_engines(cls) -> List[Engine]:
+        """Returns the process-wide read replica engines, creating them on first use. Empty if there are none."""
+        if cls._replica_engines is None:
+            with cls._lock:
+                if cls._replica_engines is None:
+                    cls._replica_session_factory = sessionmaker(
+                        autocommit=False, autoflush=False
+                    )
+                    cls._replica_engines = [
+                        cls._create_engine(url) for url in settings.DB_REPLICA_URLS
+                    ]
+        return cls._replica_engines
+
+    @classmethod
+    def replica_engine(cls) -> Engine | None:
+        """
+        Picks a read replica engine, or returns None if there are none.
+
+        `round_robin` cycles through them, `least_connections` picks the one with the fewest checked out connections.
+        """
+        engines = cls.replica_engines()
+        if not engines:
+            return None
+
+        if settings.DB_REPLICA_SELECTION == "least_connections":
+            return min(engines, key=lambda engine: engine.pool.checkedout())
+        if settings.DB_REPLICA_SELECTION == "round_robin":
+            return engines[next(cls._replica_counter) % len(engines)]
+
+        raise ValueError(
+            f"Invalid DB_REPLICA_SELECTION: {settings.DB_REPLICA_SELECTION}"
+        )
+
+    @classmethod
+    def session_factory(cls) -> sessionmaker:
+        """Returns the process-wide session factory, creating it on first use."""
+        if cls._session_factory is None:
+            engine = cls.engine()
+            with cls._lock:
+                if cls._session_factory is None:
+                    cls._session_factory = sessionmaker(
+                        autocommit=False,
+                        autoflush=False,
+                        bind=engine,
+                        class_=SingleWriterSession
+                        if settings.DB_SINGLE_WRITER
+                        else Session,
+                    )
+        return cls._session_factory
+
+    @classmethod
+    def dispose(cls, close: bool = True):
+        """
+        Discards the current engines and session factory, so the next use builds new ones.
+
+        Forked workers should call it with `close=False`, which drops the connections inherited from the parent
+        process without closing them under the parent's feet.
+        """
+        with cls._lock:
+            for engine in (
+                cls._engine,
+                cls._writer_engine,
+                *(cls._replica_engines or []),
+            ):
+                if engine is not None:
+                    engine.dispose(close=close)
+            cls._engine = None
+            cls._writer_engine = None
+            cls._replica_engines = None
+            cls._session_factory = None
+            cls._replica_session_factory = None
 
     @classmethod
     def reinitializate_db(cls):
-        """Drops all tables and then recreates them."""
+        """Drops all tables of the primary database and then recreates them."""
+        # settings may have changed (e.g. DB_PATH on tests), so start from a fresh engine
+        cls.dispose()
         engine = cls.engine()
         BaseModel.metadata.drop_all(bind=engine)
         BaseModel.metadata.create_all(bind=engine)
 
     @classmethod
     def initialize_db(cls):
-        """Initializes database and creates tables, based on models that inherits from BaseModel."""
-        BaseModel.metadata.create_all(bind=Database.engine())
+        """Initializes the primary database and creates tables, based on models that inherits from BaseModel."""
+        BaseModel.metadata.create_all(bind=cls.engine())
 
     @staticmethod
     def __get_session() -> Session:
-        """Creates a local session and returns it."""
-        session_class = sessionmaker(
-            autocommit=False, autoflush=False, bind=Database.engine()
-        )
-        return session_class()
+        """Creates a local session from the shared session factory and returns it."""
+        return Database.session_factory()()
 
     @staticmethod
     @contextmanager
-    def create_new_session() -> Generator[Session, None, None]:
-        """Initializes a new db session and returns it."""
-        db = Database.__get_session()
+    def create_new_session(read_only: bool = False) -> Generator[Session, None, None]:
+        """
+        Initializes a new db session and returns it.
+
+        A `read_only` session reads from a replica, when there are any. It may lag behind the primary, so it must
+        not be used for writes nor for reads that have to see a previous write.
+        """
+        replica_engine = Database.replica_engine() if read_only else None
+        if replica_engine is not None:
+            db = Database._replica_session_factory(bind=replica_engine)
+        else:
+            db = Database.__get_session()
         try:
             yield db
         finally:
@@ -0,0 +1,80 @@
+"""SQLite performance profile, applied on every new connection through engine events."""
+from typing import List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.settings import settings
+
+
+def sqlite_pragmas() -> List[str]:
+    """Returns the PRAGMA statements of the tuning profile configured on settings."""
+    return [
+        f"PRAGMA journal_mode={settings.DB_JOURNAL_MODE}",
+        f"PRAGMA synchronous={settings.DB_SYNCHRONOUS}",
+        f"PRAGMA busy_timeout={settings.DB_BUSY_TIMEOUT_MS}",
+        f"PRAGMA mmap_size={settings.DB_MMAP_SIZE}",
+        f"PRAGMA cache_size={settings.DB_CACHE_SIZE}",
+        f"PRAGMA temp_store={settings.DB_TEMP_STORE}",
+    ]
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Applies the tuning profile to a new DBAPI connection (a `connect` engine event listener)."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in sqlite_pragmas():
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def apply_sqlite_tuning(engine: Engine) -> Engine:
+    """Applies the tuning profile on every connection the engine opens, if enabled on settings and on SQLite."""
+    if settings.DB_SQLITE_TUNING and engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", set_sqlite_pragmas)
+    return engine
+
+
+def begin_before_savepoint(engine: Engine) -> Engine:
+    """
+    Makes the engine begin the transaction, if it was not yet, right before a SAVEPOINT.
+
+    pysqlite only emits BEGIN before a write, so a SAVEPOINT (`Session.begin_nested()`) coming first would open the
+    transaction itself, and releasing it would commit everything. As repositories only take savepoints to write, it
+    begins IMMEDIATE (see `begin_immediate`): the reads within it then wait for the write lock, instead of holding a
+    snapshot that a concurrent write would make stale. Reads before it still run outside of a transaction. Other
+    databases are left as is.
+    """
+    if engine.dialect.name != "sqlite":
+        return engine
+
+    def emit_begin(connection, name) -> None:
+        if not connection.connection.dbapi_connection.in_transaction:
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+    event.listen(engine, "savepoint", emit_begin)
+    return engine
+
+
+def begin_immediate(engine: Engine) -> Engine:
+    """
+    Makes the engine start its transactions with BEGIN IMMEDIATE, taking the write lock up front.
+
+    A deferred transaction that reads and then writes has to upgrade its lock, which fails right away with
+    "database is locked" when another connection holds it, busy_timeout or not. Taking it on BEGIN waits for it
+    instead. Only meant for the writer engine, as readers would be serialized too. Other databases are left as is.
+    """
+    if engine.dialect.name != "sqlite":
+        return engine
+
+    def disable_pysqlite_begin(dbapi_connection, connection_record) -> None:
+        # stop pysqlite from emitting its own (deferred) BEGIN, so the one below is used
+        dbapi_connection.isolation_level = None
+
+    def emit_begin(connection) -> None:
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+    event.listen(engine, "connect", disable_pysqlite_begin)
+    event.listen(engine, "begin", emit_begin)
+    return engine
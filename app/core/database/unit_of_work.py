@@ -0,0 +1,185 @@
+"""Unit of work: one session and one transaction shared by every repository call of a request (or script block)."""
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Generator, List
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.database.database import Database
+from app.logger import logger
+from app.settings import settings
+
+_current_unit_of_work: ContextVar["UnitOfWork | None"] = ContextVar(
+    "unit_of_work", default=None
+)
+
+# holds the time until which a client that wrote reads from the primary, so it sees its writes on later requests
+READ_PRIMARY_COOKIE = "read_primary_until"
+
+
+class UnitOfWork:
+    """
+    Shares a single lazily opened session among repositories and commits (or rolls back) it once at the end.
+
+    Inside Flask it is bound to the request by `register_unit_of_work`. Outside Flask (scripts, tests) use it as a
+    context manager:
+
+        with UnitOfWork():
+            UserService().create_user(name, email)
+    """
+
+    def __init__(self, read_primary: bool = False):
+        self._session: Session | None = None
+        # set once a repository wrote, so later reads of the unit of work go to the primary and see the write
+        self.has_written = False
+        # reads go to the primary from the start, e.g. for a client that just wrote on a previous request
+        self.read_primary = read_primary
+        self._after_commit: List[Callable[[], None]] = []
+        self._token = None
+
+    @property
+    def session(self) -> Session:
+        """Returns the shared session, opening it on first use."""
+        if self._session is None:
+            self._session = Database.session_factory()()
+        return self._session
+
+    @contextmanager
+    def session_scope(self) -> Generator[Session, None, None]:
+        """Yields the shared session, leaving it open for the next repository call."""
+        yield self.session
+
+    def after_commit(self, callback: Callable[[], None]) -> None:
+        """Registers a callback to run once the unit of work is committed."""
+        self._after_commit.append(callback)
+
+    def commit(self) -> None:
+        """Commits the shared session, if it was opened, and runs the after commit callbacks."""
+        if self._session is not None:
+            self._session.commit()
+
+        callbacks, self._after_commit = self._after_commit, []
+        for callback in callbacks:
+            callback()
+
+    def rollback(self) -> None:
+        """Rolls back the shared session, if it was opened, discarding the after commit callbacks."""
+        if self._session is not None:
+            self._session.rollback()
+        self._after_commit = []
+
+    def close(self) -> None:
+        """Closes the shared session, returning its connection to the pool."""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def __enter__(self) -> "UnitOfWork":
+        """Binds the unit of work to the current context."""
+        self._token = _current_unit_of_work.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        """Commits on success or rolls back on error, then closes and unbinds the unit of work."""
+        try:
+            if exc_type is None:
+                self.commit()
+            else:
+                self.rollback()
+        finally:
+            self.close()
+            _current_unit_of_work.reset(self._token)
+
+    @property
+    def reads_primary(self) -> bool:
+        """Tells whether the reads of the unit of work must go to the primary, to see previous writes."""
+        return self.has_written or self.read_primary
+
+    @staticmethod
+    def current() -> "UnitOfWork | None":
+        """Returns the unit of work bound to the current context or Flask request, if any."""
+        unit_of_work = _current_unit_of_work.get()
+        # there is no request to look at unless Flask was loaded, and scripts using the services never load it
+        flask = sys.modules.get("flask")
+        if unit_of_work is None and flask is not None and flask.has_app_context():
+            unit_of_work = flask.g.get("unit_of_work")
+        return unit_of_work
+
+
+def _pins_reads_to_primary() -> bool:
+    """Tells whether a write sends the next reads of its client to the primary."""
+    return (
+        bool(settings.DB_REPLICA_URLS) and settings.DB_REPLICA_READ_PRIMARY_SECONDS > 0
+    )
+
+
+def _is_read_primary_cookie_fresh(value: str | None) -> bool:
+    """Tells whether the read primary cookie of the request holds a time still to come."""
+    try:
+        return value is not None and float(value) > time.time()
+    except ValueError:
+        return False
+
+
+def register_unit_of_work(blueprint) -> None:
+    """
+    Binds a unit of work to every request handled by the blueprint (or app).
+
+    With read replicas, a request that wrote sets a cookie sending the reads of the same client to the primary for
+    the next DB_REPLICA_READ_PRIMARY_SECONDS, so it reads its own writes while the replicas catch up.
+    """
+    from flask import g, jsonify, request
+
+    @blueprint.before_request
+    def open_unit_of_work():
+        """Binds a new unit of work to the request, its session is only opened on first use."""
+        g.unit_of_work = UnitOfWork(
+            read_primary=_is_read_primary_cookie_fresh(
+                request.cookies.get(READ_PRIMARY_COOKIE)
+            )
+        )
+
+    @blueprint.after_request
+    def commit_unit_of_work(response):
+        """Commits successful requests (and rolls back failed ones) before the response goes out."""
+        unit_of_work = g.pop("unit_of_work", None)
+        if unit_of_work is None:
+            return response
+
+        try:
+            if response.status_code < 400:
+                unit_of_work.commit()
+                if unit_of_work.has_written and _pins_reads_to_primary():
+                    seconds = settings.DB_REPLICA_READ_PRIMARY_SECONDS
+                    response.set_cookie(
+                        READ_PRIMARY_COOKIE,
+                        str(time.time() + seconds),
+                        max_age=seconds,
+                        httponly=True,
+                        samesite="Lax",
+                    )
+            else:
+                unit_of_work.rollback()
+        except SQLAlchemyError as error:
+            # the response would claim a write that did not happen, answer the error instead
+            unit_of_work.rollback()
+            logger.error("m=commit_unit_of_work, Commit failed: %s", error)
+            response = jsonify(
+                {"detail": "Internal server error =/ Please contact the support team."}
+            )
+            response.status_code = 500
+        finally:
+            unit_of_work.close()
+
+        return response
+
+    @blueprint.teardown_request
+    def close_unit_of_work(error=None):
+        """Rolls back and closes the unit of work of requests that did not reach after_request."""
+        unit_of_work = g.pop("unit_of_work", None)
+        if unit_of_work is not None:
+            unit_of_work.rollback()
+            unit_of_work.close()
@@ -0,0 +1,315 @@
+"""
+Opt-in request, SQL and per-stage timing instrumentation.
+
+Enabled by `init_metrics(app)` (see `settings.METRICS_ENABLED`). It exposes every metric on `/metrics` in the
+Prometheus text format and adds a `Server-Timing` header to each response. While disabled, instrumented methods
+only pay for a boolean check and no SQLAlchemy event listener is registered. Flask is only imported once enabled,
+so the instrumented services stay usable (and quick to import) outside the web app.
+"""
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from typing import TYPE_CHECKING, Dict, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.cache.bloom import get_email_index
+from app.core.cache.cache import get_user_cache
+from app.logger import logger
+from app.settings import settings
+
+if TYPE_CHECKING:  # pragma: no cover
+    from flask import Flask, Response
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+METRICS_PREFIX = "user_api"
+
+
+class Histogram:
+    """Thread-safe Prometheus-like histogram, with one series per label values."""
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        label_names: Tuple[str, ...] = (),
+        buckets=DEFAULT_BUCKETS,
+    ):
+        self.name = f"{METRICS_PREFIX}_{name}"
+        self.description = description
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values) -> None:
+        """Records a value on the series of the given label values."""
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # one counter per bucket, then sum and count
+                series = self._series[label_values] = [0] * len(self.buckets) + [0.0, 0]
+            bucket_index = bisect_left(self.buckets, value)
+            if bucket_index < len(self.buckets):
+                series[bucket_index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def clear(self) -> None:
+        """Drops every series."""
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> str:
+        """Renders the histogram in the Prometheus text format."""
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            series_items = [
+                (labels, list(series)) for labels, series in self._series.items()
+            ]
+
+        for label_values, series in sorted(series_items):
+            labels = [
+                f'{name}="{value}"'
+                for name, value in zip(self.label_names, label_values)
+            ]
+            cumulative = 0
+            for bucket, count in zip(self.buckets, series):
+                cumulative += count
+                bucket_labels = _labels(labels + [f'le="{bucket}"'])
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            inf_labels = _labels(labels + ['le="+Inf"'])
+            lines.append(f"{self.name}_bucket{inf_labels} {series[-1]}")
+            lines.append(f"{self.name}_sum{_labels(labels)} {series[-2]}")
+            lines.append(f"{self.name}_count{_labels(labels)} {series[-1]}")
+
+        return "\n".join(lines)
+
+
+def _labels(labels: list) -> str:
+    """Formats label pairs as a Prometheus label set."""
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+
+class Metrics:
+    """Process-wide metrics registry."""
+
+    def __init__(self):
+        self.enabled = False
+        self.request_duration = Histogram(
+            "http_request_duration_seconds",
+            "HTTP request latency.",
+            ("method", "route", "status"),
+        )
+        self.stage_duration = Histogram(
+            "stage_duration_seconds",
+            "Latency of service and repository methods.",
+            ("stage",),
+        )
+        self.sql_duration = Histogram(
+            "sql_query_duration_seconds", "SQL query latency."
+        )
+        self.slow_queries = 0
+
+    def clear(self) -> None:
+        """Resets every metric."""
+        self.request_duration.clear()
+        self.stage_duration.clear()
+        self.sql_duration.clear()
+        self.slow_queries = 0
+
+    def render(self) -> str:
+        """Renders every metric, including the user cache counters, in the Prometheus text format."""
+        sections = [
+            self.request_duration.render(),
+            self.stage_duration.render(),
+            self.sql_duration.render(),
+            f"# HELP {METRICS_PREFIX}_sql_slow_queries_total SQL queries slower than SLOW_QUERY_MS.\n"
+            f"# TYPE {METRICS_PREFIX}_sql_slow_queries_total counter\n"
+            f"{METRICS_PREFIX}_sql_slow_queries_total {self.slow_queries}",
+        ]
+        for name, value in get_user_cache().stats().items():
+            metric_type = "gauge" if name in ("size", "max_size") else "counter"
+            metric_name = f"{METRICS_PREFIX}_user_cache_{name}" + (
+                "_total" if metric_type == "counter" else ""
+            )
+            sections.append(
+                f"# TYPE {metric_name} {metric_type}\n{metric_name} {value}"
+            )
+
+        email_index = get_email_index()
+        for name, value in (email_index.stats() if email_index else {}).items():
+            metric_type = (
+                "counter"
+                if name in ("rebuilds", "lookups", "skipped_lookups")
+                else "gauge"
+            )
+            metric_name = f"{METRICS_PREFIX}_email_index_{name}" + (
+                "_total" if metric_type == "counter" else ""
+            )
+            sections.append(
+                f"# TYPE {metric_name} {metric_type}\n{metric_name} {value}"
+            )
+
+        return "\n".join(sections) + "\n"
+
+
+metrics = Metrics()
+
+
+class RequestMetrics:
+    """Timings of the current request, reported on its Server-Timing header."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_queries = 0
+        self.sql_time = 0.0
+        self.stages: Dict[str, float] = {}
+
+    def server_timing(self) -> str:
+        """Formats the request timings as a Server-Timing header value."""
+        total = (time.perf_counter() - self.started) * 1000
+        entries = [
+            f"total;dur={total:.3f}",
+            f'db;dur={self.sql_time * 1000:.3f};desc="{self.sql_queries} queries"',
+        ]
+        entries += [
+            f"{stage};dur={duration * 1000:.3f}"
+            for stage, duration in self.stages.items()
+        ]
+        return ", ".join(entries)
+
+
+def _current_request_metrics() -> RequestMetrics | None:
+    """Returns the timings of the current request, if any."""
+    from flask import g, has_request_context
+
+    return g.get("request_metrics") if has_request_context() else None
+
+
+def timed(stage: str):
+    """Decorator timing a function as a stage, both on the stage histogram and on the request Server-Timing."""
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return func(*args, **kwargs)
+
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                metrics.stage_duration.observe(elapsed, stage)
+                request_metrics = _current_request_metrics()
+                if request_metrics is not None:
+                    request_metrics.stages[stage] = (
+                        request_metrics.stages.get(stage, 0.0) + elapsed
+                    )
+
+        return wrapper
+
+    return decorator
+
+
+def instrument_methods(cls):
+    """Class decorator applying `timed` to every public method (generators excluded, as they return right away)."""
+    for name, attr in list(vars(cls).items()):
+        if (
+            name.startswith("_")
+            or not inspect.isfunction(attr)
+            or inspect.isgeneratorfunction(attr)
+        ):
+            continue
+        setattr(cls, name, timed(f"{cls.__name__}.{name}")(attr))
+    return cls
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Marks the start of a query."""
+    if metrics.enabled:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Records the query latency, logging it if slow."""
+    started_stack = conn.info.get("query_started")
+    if not metrics.enabled or not started_stack:
+        return
+
+    elapsed = time.perf_counter() - started_stack.pop()
+    metrics.sql_duration.observe(elapsed)
+    if elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        metrics.slow_queries += 1
+        logger.warning("m=slow_query, %.1fms: %s", elapsed * 1000, statement)
+
+    request_metrics = _current_request_metrics()
+    if request_metrics is not None:
+        request_metrics.sql_queries += 1
+        request_metrics.sql_time += elapsed
+
+
+def _before_request():
+    """Starts timing the request."""
+    from flask import g
+
+    g.request_metrics = RequestMetrics()
+
+
+def _after_request(response: "Response") -> "Response":
+    """Records the request latency and adds the Server-Timing header."""
+    from flask import g, request
+
+    request_metrics = g.pop("request_metrics", None)
+    if request_metrics is None:
+        return response
+
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    metrics.request_duration.observe(
+        time.perf_counter() - request_metrics.started,
+        request.method,
+        route,
+        response.status_code,
+    )
+    response.headers["Server-Timing"] = request_metrics.server_timing()
+    return response
+
+
+def _metrics_view() -> "Response":
+    """Returns every metric in the Prometheus text format."""
+    from flask import Response
+
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+def init_metrics(app: "Flask") -> None:
+    """Enables metrics and instruments the app: request hooks, SQL event listeners and the /metrics endpoint."""
+    metrics.enabled = True
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.add_url_rule("/metrics", "metrics", _metrics_view, methods=["GET"])
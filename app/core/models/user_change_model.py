@@ -0,0 +1,27 @@
+"""Model for table user_changes."""
+from datetime import datetime
+
+from sqlalchemy import Boolean, Column, DateTime, Integer
+
+from app.core.models.base_model import BaseModel
+
+
+class UserChangeModel(BaseModel):
+    """
+    Model for table user_changes, the users change log backing the change feed.
+
+    Every write on a user takes the next `seq` (never reused, as the table is AUTOINCREMENT) and replaces the previous
+    change of that user, so the log keeps a single row per user: its latest change, or a tombstone once deleted.
+    """
+
+    __tablename__ = "user_changes"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    seq = Column(Integer, primary_key=True)
+    user_id = Column(Integer, unique=True, nullable=False)
+    deleted = Column(Boolean, default=False, nullable=False)
+    dt_changed = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        """Return a string representation of the object."""
+        return f"<UserChangeModel(seq={self.seq}, user_id={self.user_id}, deleted={self.deleted})>"
@@ -2,7 +2,7 @@
 from datetime import datetime
 from typing import Optional
 
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Index, func
 
 from app.core.models.base_model import BaseModel
 
@@ -14,12 +14,15 @@ class UserModel(BaseModel):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255))
-    email = Column(String(255))
-    dt_created = Column(DateTime, default=datetime.utcnow)
+    email = Column(String(255), unique=True, index=True)
+    dt_created = Column(DateTime, default=datetime.utcnow, index=True)
     dt_updated: Optional[datetime] = Column(
-        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True
     )
 
+    # backs case-insensitive name prefix searches
+    __table_args__ = (Index("ix_users_name_lower", func.lower(name)),)
+
     def __repr__(self):
         """Return a string representation of the object."""
         return f"<UserModel(id={self.id}, name={self.name}, email={self.email})>"
@@ -0,0 +1,25 @@
+"""Model for table user_stats."""
+from sqlalchemy import Column, Index, Integer, String
+
+from app.core.models.base_model import BaseModel
+
+
+class UserStatModel(BaseModel):
+    """
+    Model for table user_stats, the user counters backing `GET /users/stats`.
+
+    Each row counts the users of a `kind` of counter under a `key`: the single "total" counter (empty key), "day" and
+    "week" counters by creation date (e.g. 2026-10-18, 2026-W42) and "domain" counters by email domain. They are kept
+    up to date on the same transaction as every user write, and can be recomputed from the users table.
+    """
+
+    __tablename__ = "user_stats"
+    __table_args__ = (Index("ix_user_stats_kind_count", "kind", "count"),)
+
+    kind = Column(String(16), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    count = Column(Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        """Return a string representation of the object."""
+        return f"<UserStatModel(kind={self.kind}, key={self.key}, count={self.count})>"
@@ -0,0 +1,51 @@
+"""Keyset pagination helpers."""
+import base64
+import binascii
+
+from app.settings import settings
+
+# cursors hold ids or sequences, signed 64-bit integers on the database
+CURSOR_MAX = 2**63 - 1
+
+
+def encode_cursor(last_id: int, key: str = "id") -> str:
+    """Encodes the last seen id (or other `key`, like a change sequence) into an opaque cursor."""
+    return base64.urlsafe_b64encode(f"{key}:{last_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str | None, key: str = "id") -> int | None:
+    """
+    Decodes an opaque cursor back into the last seen id (or other `key`).
+
+    Returns None when no cursor is given. Raises ValueError if the cursor is malformed, was built for another key or
+    holds a value past CURSOR_MAX.
+    """
+    if not cursor:
+        return None
+
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        decoded = base64.urlsafe_b64decode(cursor + padding).decode()
+    except (binascii.Error, UnicodeDecodeError) as error:
+        raise ValueError(f"Invalid cursor: {cursor}") from error
+
+    prefix, _, last_id = decoded.partition(":")
+    if prefix != key or not last_id.isdigit() or int(last_id) > CURSOR_MAX:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+    return int(last_id)
+
+
+def parse_limit(limit: str | None) -> int:
+    """
+    Parses the page size, falling back to the default and capping it on the server-side maximum.
+
+    Raises ValueError if the limit is not a positive integer.
+    """
+    if limit is None or limit == "":
+        return settings.PAGE_DEFAULT_LIMIT
+
+    if not limit.isdigit() or int(limit) < 1:
+        raise ValueError(f"Invalid limit: {limit}")
+
+    return min(int(limit), settings.PAGE_MAX_LIMIT)
@@ -0,0 +1,168 @@
+"""Encapsulates direct async database operations."""
+from typing import AsyncContextManager, Callable, List
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database.async_database import AsyncDatabase
+from app.core.models.user_model import UserModel
+from app.core.repositories.base_repository import BaseRepository
+from app.core.repositories.user_repository import (
+    USER_COLUMNS,
+    record_user_changes,
+    update_user_stats,
+)
+from app.core.schemas.user_schema import UserSchema
+from app.core.write_errors import UserWriteError
+from app.logger import logger
+
+
+class AsyncUserRepository(BaseRepository):
+    """Async counterpart of UserRepository, backed by SQLAlchemy AsyncSession."""
+
+    def __init__(self):
+        super().__init__(schema=UserSchema)
+
+    @property
+    def db_session(self) -> AsyncContextManager[AsyncSession]:
+        """Creates a new async db session."""
+        return AsyncDatabase.create_new_session()
+
+    async def fetch_users_page(
+        self, limit: int, after_id: int | None = None
+    ) -> List[dict]:
+        """Fetches up to `limit` users ordered by id, starting right after `after_id` (keyset pagination)."""
+        query = select(*USER_COLUMNS)
+        if after_id is not None:
+            query = query.where(UserModel.id > after_id)
+
+        async with self.db_session as db_session:
+            result = await db_session.execute(query.order_by(UserModel.id).limit(limit))
+            keys = tuple(result.keys())
+            return [dict(zip(keys, row)) for row in result]
+
+    async def get_user_by_id(self, user_id: int) -> UserSchema | None:
+        """Fetches a user by id."""
+        async with self.db_session as db_session:
+            return self.from_orm(await db_session.get(UserModel, user_id))
+
+    async def get_user_by_email(self, email: str) -> UserSchema | None:
+        """Fetches a user by email."""
+        async with self.db_session as db_session:
+            user_model = await db_session.scalar(
+                select(UserModel).where(UserModel.email == email)
+            )
+            return self.from_orm(user_model)
+
+    async def create_user(self, user: UserModel) -> UserSchema | None:
+        """Creates a user and return the created user object, or None if the email is already taken."""
+        async with self.db_session as db_session:
+            db_session.add(user)
+            try:
+                await db_session.flush()
+                await db_session.run_sync(record_user_changes, [user.id])
+                await db_session.run_sync(
+                    update_user_stats, added=[(user.dt_created, user.email)]
+                )
+                await db_session.commit()
+            except IntegrityError:
+                await db_session.rollback()
+                logger.error("m=create_user, Email already in use: %s", user.email)
+                return None
+            await db_session.refresh(user)
+
+            return self.from_orm(user)
+
+    @staticmethod
+    async def _fetch_current(db_session: AsyncSession, user_id: int) -> dict | None:
+        """Fetches the current state of a user on the session of a write, so from the database and not any cache."""
+        row = (
+            await db_session.execute(
+                select(*USER_COLUMNS).where(UserModel.id == user_id)
+            )
+        ).first()
+        return row._asdict() if row else None
+
+    async def update_user(
+        self, user: UserModel, precondition: Callable[[dict], bool] | None = None
+    ) -> UserSchema | UserWriteError:
+        """Updates a user and return the updated user object, or why it could not be, like the sync one."""
+        async with self.db_session as db_session:
+            current = await self._fetch_current(db_session, user.id)
+            if current is None:
+                logger.error("m=update_user, User %s not found", user.id)
+                return UserWriteError.NOT_FOUND
+            if precondition is not None and not precondition(current):
+                logger.error("m=update_user, Precondition failed for user %s", user.id)
+                return UserWriteError.PRECONDITION_FAILED
+
+            statement = update(UserModel).where(UserModel.id == user.id)
+            if precondition is not None:
+                statement = statement.where(
+                    UserModel.dt_updated == current["dt_updated"]
+                )
+            try:
+                row = (
+                    await db_session.execute(
+                        statement.values(name=user.name, email=user.email).returning(
+                            *USER_COLUMNS
+                        )
+                    )
+                ).first()
+                if row is None:
+                    logger.error("m=update_user, User %s changed meanwhile", user.id)
+                    return (
+                        UserWriteError.NOT_FOUND
+                        if precondition is None
+                        else UserWriteError.PRECONDITION_FAILED
+                    )
+
+                await db_session.run_sync(record_user_changes, [user.id])
+                await db_session.run_sync(
+                    update_user_stats,
+                    added=[(current["dt_created"], user.email)],
+                    removed=[(current["dt_created"], current["email"])],
+                )
+                await db_session.commit()
+            except IntegrityError:
+                await db_session.rollback()
+                logger.error("m=update_user, Email already in use: %s", user.email)
+                return UserWriteError.EMAIL_TAKEN
+
+            return self.schema(**row._asdict())
+
+    async def delete_user(
+        self, user_id: int, precondition: Callable[[dict], bool] | None = None
+    ) -> bool | UserWriteError:
+        """Deletes an user if exists and return True if the user was deleted, or why it could not be deleted."""
+        async with self.db_session as db_session:
+            current = await self._fetch_current(db_session, user_id)
+            if current is None:
+                logger.error("m=delete_user, User %s not found", user_id)
+                return UserWriteError.NOT_FOUND
+            if precondition is not None and not precondition(current):
+                logger.error("m=delete_user, Precondition failed for user %s", user_id)
+                return UserWriteError.PRECONDITION_FAILED
+
+            statement = delete(UserModel).where(UserModel.id == user_id)
+            if precondition is not None:
+                statement = statement.where(
+                    UserModel.dt_updated == current["dt_updated"]
+                )
+            if not (await db_session.execute(statement)).rowcount:
+                logger.error("m=delete_user, User %s changed meanwhile", user_id)
+                return (
+                    UserWriteError.NOT_FOUND
+                    if precondition is None
+                    else UserWriteError.PRECONDITION_FAILED
+                )
+
+            await db_session.run_sync(record_user_changes, [user_id], deleted=True)
+            await db_session.run_sync(
+                update_user_stats,
+                removed=[(current["dt_created"], current["email"])],
+            )
+            await db_session.commit()
+
+            return True
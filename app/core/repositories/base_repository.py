@@ -5,6 +5,7 @@ from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
 from app.core.database.database import Database
+from app.core.database.unit_of_work import UnitOfWork
 from app.core.models.user_model import UserModel
 
 
@@ -16,9 +17,49 @@ class BaseRepository:
 
     @property
     def db_session(self) -> Generator[Session, None, None]:
-        """Creates a new db session."""
+        """Returns the session of the current unit of work, or creates a new db session if there is none."""
+        unit_of_work = UnitOfWork.current()
+        if unit_of_work is not None:
+            return unit_of_work.session_scope()
+
         return Database.create_new_session()
 
+    @staticmethod
+    def reads_from_replica() -> bool:
+        """
+        Tells whether `read_session` reads from a read replica, whose rows may lag behind the primary.
+
+        It does not when there are no replicas, or when the current unit of work reads from the primary (it already
+        wrote, or its client wrote shortly before), so a client reads its own writes.
+        """
+        unit_of_work = UnitOfWork.current()
+        return bool(Database.replica_engines()) and not (
+            unit_of_work is not None and unit_of_work.reads_primary
+        )
+
+    @property
+    def read_session(self) -> Generator[Session, None, None]:
+        """Returns a db session on a read replica, for reads that tolerate replication lag, or on the primary."""
+        if not self.reads_from_replica():
+            return self.db_session
+
+        return Database.create_new_session(read_only=True)
+
+    @staticmethod
+    def commit(db_session: Session) -> None:
+        """
+        Commits a standalone db session.
+
+        Within a unit of work it only flushes (so errors like IntegrityError still surface here), and the unit of
+        work commits once at its end.
+        """
+        unit_of_work = UnitOfWork.current()
+        if unit_of_work is not None:
+            unit_of_work.has_written = True
+            db_session.flush()
+        else:
+            db_session.commit()
+
     def from_orm(self, user_model: UserModel) -> None | BaseModel:
         """Converts an SQLAlchemy UserModel got from databse into a Pydantic BaseModel object."""
         if not user_model:
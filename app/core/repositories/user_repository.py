@@ -1,12 +1,170 @@
 """Encapsulates direct database operations."""
-from typing import List
+import sys
+from collections import Counter
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Set, Tuple
 
+from sqlalchemy import Select, delete, func, insert, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.metrics.metrics import instrument_methods
+from app.core.models.user_change_model import UserChangeModel
 from app.core.models.user_model import UserModel
+from app.core.models.user_stat_model import UserStatModel
 from app.core.repositories.base_repository import BaseRepository
-from app.core.schemas.user_schema import UserSchema
+from app.core.schemas.user_schema import UserSchema, UserSearchSchema
+from app.core.write_errors import UserWriteError
 from app.logger import logger
+from app.settings import settings
+
+
+USER_COLUMNS = (
+    UserModel.id,
+    UserModel.name,
+    UserModel.email,
+    UserModel.dt_created,
+    UserModel.dt_updated,
+)
+
+
+def _prefix_range(column, prefix: str) -> tuple:
+    """
+    Returns the conditions matching values starting with the prefix, as an index-friendly range.
+
+    The upper bound is the prefix with its last character incremented. Trailing U+10FFFF characters have no next one,
+    so they are dropped first, and a prefix made only of them has no upper bound at all.
+    """
+    stem = prefix.rstrip(chr(sys.maxunicode))
+    if not stem:
+        return (column >= prefix,)
+
+    next_char = ord(stem[-1]) + 1
+    # surrogates can not be encoded, the next character after them is U+E000
+    if 0xD800 <= next_char <= 0xDFFF:
+        next_char = 0xE000
+    return column >= prefix, column < stem[:-1] + chr(next_char)
+
+
+def _search_conditions(filters: UserSearchSchema) -> list:
+    """Returns the conditions matching the users that satisfy every given search filter."""
+    conditions = []
+    if filters.email_prefix:
+        conditions.extend(_prefix_range(UserModel.email, filters.email_prefix))
+    if filters.name_prefix:
+        conditions.extend(
+            _prefix_range(func.lower(UserModel.name), filters.name_prefix.lower())
+        )
+    if filters.created_from:
+        conditions.append(UserModel.dt_created >= filters.created_from)
+    if filters.created_to:
+        conditions.append(UserModel.dt_created <= filters.created_to)
+    if filters.updated_from:
+        conditions.append(UserModel.dt_updated >= filters.updated_from)
+    if filters.updated_to:
+        conditions.append(UserModel.dt_updated <= filters.updated_to)
+
+    return conditions
+
+
+def record_user_changes(
+    db_session: Session, user_ids: Iterable[int], deleted: bool = False
+) -> None:
+    """
+    Records, on the given session and so on the same transaction as the write itself, that the users changed.
+
+    Each user gets a new change sequence, replacing its previous change: the change log keeps one row per user.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+
+    db_session.execute(
+        delete(UserChangeModel).where(UserChangeModel.user_id.in_(user_ids))
+    )
+    db_session.execute(
+        insert(UserChangeModel),
+        [{"user_id": user_id, "deleted": deleted} for user_id in user_ids],
+    )
+
+
+def iso_week(day: date) -> str:
+    """Returns the ISO week of a date, as its week counter key (e.g. 2026-W42)."""
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def user_stat_keys(dt_created: datetime, email: str) -> List[Tuple[str, str]]:
+    """Returns the (kind, key) counters a user is counted on, by its creation date and email domain."""
+    return [
+        ("total", ""),
+        ("day", dt_created.date().isoformat()),
+        ("week", iso_week(dt_created.date())),
+        ("domain", email.rpartition("@")[2].lower()),
+    ]
+
+
+def count_user_stats(users: Iterable[Tuple[datetime, str]], sign: int = 1) -> Counter:
+    """Counts the (dt_created, email) users on their counters, negated if `sign` is -1."""
+    counts = Counter()
+    for dt_created, email in users:
+        for stat_key in user_stat_keys(dt_created, email):
+            counts[stat_key] += sign
+    return counts
+
+
+def update_user_stats(
+    db_session: Session,
+    added: Iterable[Tuple[datetime, str]] = (),
+    removed: Iterable[Tuple[datetime, str]] = (),
+) -> None:
+    """
+    Updates, on the given session and so on the same transaction as the write itself, the counters of the users.
+
+    Users are given as (dt_created, email) pairs; an updated user is removed with its old email and added with its
+    new one, only moving its domain counter. Each counter is incremented by an upsert, so writers creating the same
+    counter at once do not conflict, in a fixed order, so they do not deadlock on databases with row locks.
+    """
+    counts = count_user_stats(added)
+    counts.update(count_user_stats(removed, -1))
+    rows = [
+        {"kind": kind, "key": key, "count": count}
+        for (kind, key), count in sorted(counts.items())
+        if count
+    ]
+    if not rows:
+        return
+
+    dialect = {"sqlite": sqlite, "postgresql": postgresql}.get(
+        db_session.get_bind().dialect.name
+    )
+    if dialect is None:
+        # no portable upsert, a counter created by two writers at once fails one of them on its primary key
+        for row in rows:
+            updated = db_session.execute(
+                update(UserStatModel)
+                .where(
+                    UserStatModel.kind == row["kind"], UserStatModel.key == row["key"]
+                )
+                .values(count=UserStatModel.count + row["count"])
+                .execution_options(synchronize_session=False)
+            )
+            if not updated.rowcount:
+                db_session.execute(insert(UserStatModel), [row])
+        return
+
+    statement = dialect.insert(UserStatModel)
+    db_session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[UserStatModel.kind, UserStatModel.key],
+            set_={"count": UserStatModel.count + statement.excluded.count},
+        ),
+        rows,
+    )
 
 
+@instrument_methods
 class UserRepository(BaseRepository):
     """Interface to handle interactions with database via SQLAlchemy model objects."""
 
@@ -15,13 +173,250 @@ class UserRepository(BaseRepository):
 
     def fetch_all_users(self) -> List[UserSchema]:
         """Fetches all users from database (without limit or pagination)."""
-        with self.db_session as db_session:
+        with self.read_session as db_session:
             user_models = db_session.query(UserModel).all()
             return [UserSchema.from_orm(user) for user in user_models]
 
+    def fetch_users_page(self, limit: int, after_id: int | None = None) -> List[dict]:
+        """
+        Fetches up to `limit` users ordered by id, starting right after `after_id` (keyset pagination).
+
+        Seeks on the primary key instead of using OFFSET, so deep pages cost the same as the first one. Users are
+        returned as plain dicts built from the rows, skipping ORM objects and schema validation: the data comes
+        from our own database, already validated on write.
+        """
+        query = select(*USER_COLUMNS)
+        if after_id is not None:
+            query = query.where(UserModel.id > after_id)
+
+        with self.db_session as db_session:
+            result = db_session.execute(query.order_by(UserModel.id).limit(limit))
+            keys = tuple(result.keys())
+            return [dict(zip(keys, row)) for row in result]
+
+    def search_query(
+        self, filters: UserSearchSchema, limit: int, after_id: int | None = None
+    ) -> Select:
+        """
+        Builds the users search query, keyset paginated by id like `fetch_users_page`, seeking the filter indexes.
+
+        Prefixes are turned into ranges (prefix <= column < next prefix) instead of LIKE, so they seek the email
+        index and the lower(name) expression index on any database, regardless of LIKE case sensitivity rules. The
+        matches past the cursor are then sorted by id, so this plan suits filters matching few users.
+        """
+        conditions = _search_conditions(filters)
+        # with a filter, ordering and seeking on the plain primary key lets the planner prefer walking it in order and
+        # checking the filter row by row; `id + 0` keeps the same semantics but makes it seek the filter index instead
+        key = UserModel.id + 0 if conditions else UserModel.id
+        query = select(*USER_COLUMNS).where(*conditions)
+        if after_id is not None:
+            query = query.where(key > after_id)
+
+        return query.order_by(key).limit(limit)
+
+    @staticmethod
+    def search_count_query(filters: UserSearchSchema, cap: int) -> Select:
+        """Builds the query counting the users matching the filters on their indexes, reading `cap` of them at most."""
+        query = select(UserModel.id).where(*_search_conditions(filters)).limit(cap)
+        return select(func.count()).select_from(query.subquery())
+
+    @staticmethod
+    def search_scan_query(
+        filters: UserSearchSchema, limit: int, from_id: int, until_id: int
+    ) -> Select:
+        """Builds the users search query walking the primary key from `from_id` to `until_id`, filtering row by row."""
+        # bounding the id on both ends is what makes the planner prefer walking it over seeking a filter index
+        return (
+            select(*USER_COLUMNS)
+            .where(UserModel.id.between(from_id, until_id))
+            .where(*_search_conditions(filters))
+            .order_by(UserModel.id)
+            .limit(limit)
+        )
+
+    def search_users(
+        self, filters: UserSearchSchema, limit: int, after_id: int | None = None
+    ) -> Tuple[List[dict], int | None]:
+        """
+        Fetches up to `limit` users matching the filters, ordered by id and starting right after `after_id`.
+
+        No index serves both a range filter and the id order, so the plan depends on how many users match. Up to
+        SEARCH_SORT_MAX_ROWS, they are sought on the filter indexes and sorted. Past it, sorting them all would cost
+        more on every page, so the users are walked in id order instead, checking the filters row by row, and a walk
+        stops after SEARCH_SCAN_MAX_ROWS ids. Either way a page costs the same whatever the number of users, but a walk
+        may stop short of `limit` users: it then also returns the id it stopped at, for the next page to resume from.
+        """
+        with self.db_session as db_session:
+            stopped_at = None
+            if not self._matches_many(db_session, filters):
+                query = self.search_query(filters, limit, after_id)
+            else:
+                from_id, last_id = self._scan_window(db_session, after_id)
+                if from_id is None:
+                    return [], None
+
+                until_id = from_id + settings.SEARCH_SCAN_MAX_ROWS - 1
+                query = self.search_scan_query(filters, limit, from_id, until_id)
+                if until_id < last_id:
+                    stopped_at = until_id
+
+            result = db_session.execute(query)
+            keys = tuple(result.keys())
+            return [dict(zip(keys, row)) for row in result], stopped_at
+
+    def _matches_many(self, db_session: Session, filters: UserSearchSchema) -> bool:
+        """Tells whether more than SEARCH_SORT_MAX_ROWS users match the filters, reading that many at most."""
+        if not _search_conditions(filters):
+            return False
+
+        cap = settings.SEARCH_SORT_MAX_ROWS
+        return (
+            db_session.execute(self.search_count_query(filters, cap + 1)).scalar() > cap
+        )
+
+    @staticmethod
+    def _scan_window(db_session: Session, after_id: int | None) -> Tuple[int, int]:
+        """Returns the id of the first user past the cursor and the last user id, both sought on the primary key."""
+        first_id = select(UserModel.id)
+        if after_id is not None:
+            first_id = first_id.where(UserModel.id > after_id)
+        first_id = first_id.order_by(UserModel.id).limit(1).scalar_subquery()
+        return tuple(db_session.execute(select(first_id, func.max(UserModel.id))).one())
+
+    def fetch_changes(self, limit: int, since: int = 0) -> List[dict]:
+        """
+        Fetches up to `limit` user changes with a sequence greater than `since`, in sequence order.
+
+        Seeks on the change log primary key and joins each change with the current state of its user, which is
+        missing (all user columns None) for tombstones. Writes are serialized by SQLite, so sequences are committed in
+        order and a reader never skips one that commits later. Other databases may commit them out of order, so the
+        feed is SQLite only: the app does not start on another one with CHANGE_FEED_ENABLED.
+        """
+        query = (
+            select(
+                UserChangeModel.seq,
+                UserChangeModel.user_id,
+                UserChangeModel.deleted,
+                *USER_COLUMNS,
+            )
+            .outerjoin(UserModel, UserModel.id == UserChangeModel.user_id)
+            .where(UserChangeModel.seq > since)
+            .order_by(UserChangeModel.seq)
+            .limit(limit)
+        )
+        with self.db_session as db_session:
+            result = db_session.execute(query)
+            keys = tuple(result.keys())
+            return [dict(zip(keys, row)) for row in result]
+
+    def stream_users(self, batch_size: int) -> Iterator[dict]:
+        """
+        Yields all users ordered by id, as plain dicts, reading `batch_size` rows at a time from a server-side cursor.
+
+        The session stays open while the generator is consumed, and is closed when it is exhausted or closed.
+        """
+        with self.db_session as db_session:
+            result = db_session.execute(
+                select(*USER_COLUMNS)
+                .order_by(UserModel.id)
+                .execution_options(yield_per=batch_size)
+            )
+            keys = tuple(result.keys())
+            for row in result:
+                yield dict(zip(keys, row))
+
+    def stream_emails(self, batch_size: int) -> Iterator[str]:
+        """Yields every user email, reading `batch_size` rows at a time from a server-side cursor."""
+        with self.db_session as db_session:
+            yield from db_session.scalars(
+                select(UserModel.email).execution_options(yield_per=batch_size)
+            )
+
+    def count_users(self) -> int:
+        """Counts the users."""
+        with self.db_session as db_session:
+            return db_session.scalar(select(func.count()).select_from(UserModel))
+
+    def fetch_stats(self, since: date, domains: int) -> Dict[str, Dict[str, int]]:
+        """
+        Fetches the user counters by kind.
+
+        Returns the total, the days and weeks from `since` on (in date order) and the `domains` biggest domains
+        (biggest first). Reads the maintained counters only, seeking the primary key and the (kind, count) index, so its
+        cost does not grow with the users table. Counters left at zero by deletes are skipped.
+        """
+        queries = (
+            select(UserStatModel.kind, UserStatModel.key, UserStatModel.count)
+            .where(
+                or_(
+                    UserStatModel.kind == "total",
+                    (UserStatModel.kind == "day")
+                    & (UserStatModel.key >= since.isoformat()),
+                    (UserStatModel.kind == "week")
+                    & (UserStatModel.key >= iso_week(since)),
+                ),
+                UserStatModel.count > 0,
+            )
+            .order_by(UserStatModel.kind, UserStatModel.key),
+            select(UserStatModel.kind, UserStatModel.key, UserStatModel.count)
+            .where(UserStatModel.kind == "domain", UserStatModel.count > 0)
+            .order_by(UserStatModel.count.desc(), UserStatModel.key)
+            .limit(domains),
+        )
+        stats = {"total": {}, "day": {}, "week": {}, "domain": {}}
+        with self.db_session as db_session:
+            for query in queries:
+                for kind, key, count in db_session.execute(query):
+                    stats[kind][key] = count
+        return stats
+
+    def reconcile_stats(self, batch_size: int) -> dict:
+        """
+        Recomputes every user counter from a streaming scan of the users table, in one transaction.
+
+        Returns how many counters there are and how many of them had drifted. The counters are deleted first, which on
+        SQLite takes the write lock: no user write can commit between the scan and the new counters, so none is lost or
+        counted twice.
+        """
+        with self.db_session as db_session:
+            previous = {
+                (kind, key): count
+                for kind, key, count in db_session.execute(
+                    select(UserStatModel.kind, UserStatModel.key, UserStatModel.count)
+                )
+            }
+            db_session.execute(delete(UserStatModel))
+            counts = count_user_stats(
+                db_session.execute(
+                    select(UserModel.dt_created, UserModel.email).execution_options(
+                        yield_per=batch_size
+                    )
+                )
+            )
+            if counts:
+                db_session.execute(
+                    insert(UserStatModel),
+                    [
+                        {"kind": kind, "key": key, "count": count}
+                        for (kind, key), count in counts.items()
+                    ],
+                )
+            self.commit(db_session)
+
+        drifted = sum(
+            1
+            for stat_key in previous.keys() | counts.keys()
+            if previous.get(stat_key, 0) != counts.get(stat_key, 0)
+        )
+        return {
+            "counters": len(counts),
+            "drifted": drifted,
+            "total": counts.get(("total", ""), 0),
+        }
+
     def get_user_by_id(self, user_id: int) -> UserSchema | None:
         """Fetches a user by id."""
-        with self.db_session as db_session:
+        with self.read_session as db_session:
             user_models = (
                 db_session.query(UserModel).filter(UserModel.id == user_id).first()
             )
@@ -29,46 +424,233 @@ class UserRepository(BaseRepository):
 
     def get_user_by_email(self, email: str) -> UserSchema | None:
         """Fetches a user by email."""
-        with self.db_session as db_session:
+        with self.read_session as db_session:
             user_models = (
                 db_session.query(UserModel).filter(UserModel.email == email).first()
             )
             return self.from_orm(user_models)
 
     def create_user(self, user: UserModel) -> UserSchema | None:
-        """Creates a user and return the created user object."""
+        """Creates a user and return the created user object, or None if the email is already taken."""
         with self.db_session as db_session:
-            db_session.add(user)
-            db_session.commit()
+            try:
+                with db_session.begin_nested():
+                    db_session.add(user)
+                    db_session.flush()
+                    record_user_changes(db_session, [user.id])
+                    update_user_stats(db_session, added=[(user.dt_created, user.email)])
+                self.commit(db_session)
+            except IntegrityError:
+                logger.error("m=create_user, Email already in use: %s", user.email)
+                return None
             db_session.refresh(user)
 
             return self.from_orm(user)
 
-    def update_user(self, user: UserModel) -> UserSchema | None:
-        """Updates a user and return the updated user object."""
+    @staticmethod
+    def _fetch_current(db_session: Session, user_id: int) -> dict | None:
+        """Fetches the current state of a user on the session of a write, so from the primary and not any cache."""
+        row = db_session.execute(
+            select(*USER_COLUMNS).where(UserModel.id == user_id)
+        ).first()
+        return row._asdict() if row else None
+
+    def update_user(
+        self, user: UserModel, precondition: Callable[[dict], bool] | None = None
+    ) -> UserSchema | UserWriteError:
+        """
+        Updates a user and return the updated user object, or why it could not be updated.
+
+        The current user is read on the write transaction and checked against `precondition` (e.g. the request
+        If-Match). The UPDATE is then conditional on the dt_updated that was read, so a write landing in between
+        matches no row and fails this one with PRECONDITION_FAILED, instead of being overwritten by it.
+        """
         with self.db_session as db_session:
-            _user = db_session.query(UserModel).filter(UserModel.id == user.id).first()
-            if not _user:
-                logger.error(f"m=update_user, User {user.id} not found")
-                return None
+            current = self._fetch_current(db_session, user.id)
+            if current is None:
+                logger.error("m=update_user, User %s not found", user.id)
+                return UserWriteError.NOT_FOUND
+            if precondition is not None and not precondition(current):
+                logger.error("m=update_user, Precondition failed for user %s", user.id)
+                return UserWriteError.PRECONDITION_FAILED
 
-            _user.name = user.name
-            _user.email = user.email
+            statement = update(UserModel).where(UserModel.id == user.id)
+            if precondition is not None:
+                statement = statement.where(
+                    UserModel.dt_updated == current["dt_updated"]
+                )
+            try:
+                with db_session.begin_nested():
+                    row = db_session.execute(
+                        statement.values(name=user.name, email=user.email).returning(
+                            *USER_COLUMNS
+                        )
+                    ).first()
+                    if row is None:
+                        logger.error(
+                            "m=update_user, User %s changed meanwhile", user.id
+                        )
+                        return (
+                            UserWriteError.NOT_FOUND
+                            if precondition is None
+                            else UserWriteError.PRECONDITION_FAILED
+                        )
 
-            db_session.commit()
-            db_session.refresh(_user)
+                    record_user_changes(db_session, [user.id])
+                    update_user_stats(
+                        db_session,
+                        added=[(current["dt_created"], user.email)],
+                        removed=[(current["dt_created"], current["email"])],
+                    )
+                self.commit(db_session)
+            except IntegrityError:
+                logger.error("m=update_user, Email already in use: %s", user.email)
+                return UserWriteError.EMAIL_TAKEN
 
-            return self.from_orm(_user)
+            return self.schema(**row._asdict())
 
-    def delete_user(self, user_id: UserModel) -> bool:
-        """Deletes an user if exists and return True if the user was deleted."""
+    def delete_user(
+        self, user_id: int, precondition: Callable[[dict], bool] | None = None
+    ) -> bool | UserWriteError:
+        """
+        Deletes an user if exists and return True if the user was deleted, or why it could not be deleted.
+
+        Checks `precondition` and deletes conditionally, like `update_user`.
+        """
         with self.db_session as db_session:
-            user = db_session.query(UserModel).filter(UserModel.id == user_id).first()
-            if user is None:
-                logger.error(f"m=delete_user, User {user_id} not found")
-                return False
+            current = self._fetch_current(db_session, user_id)
+            if current is None:
+                logger.error("m=delete_user, User %s not found", user_id)
+                return UserWriteError.NOT_FOUND
+            if precondition is not None and not precondition(current):
+                logger.error("m=delete_user, Precondition failed for user %s", user_id)
+                return UserWriteError.PRECONDITION_FAILED
+
+            statement = delete(UserModel).where(UserModel.id == user_id)
+            if precondition is not None:
+                statement = statement.where(
+                    UserModel.dt_updated == current["dt_updated"]
+                )
+            if not db_session.execute(statement).rowcount:
+                logger.error("m=delete_user, User %s changed meanwhile", user_id)
+                return (
+                    UserWriteError.NOT_FOUND
+                    if precondition is None
+                    else UserWriteError.PRECONDITION_FAILED
+                )
 
-            db_session.delete(user)
-            db_session.commit()
+            record_user_changes(db_session, [user_id], deleted=True)
+            update_user_stats(
+                db_session, removed=[(current["dt_created"], current["email"])]
+            )
+            self.commit(db_session)
 
             return True
+
+    def fetch_email_owners(self, emails: Iterable[str]) -> Dict[str, int]:
+        """Fetches, in a single IN query, the id of the user owning each of the given emails (if any)."""
+        with self.db_session as db_session:
+            rows = db_session.execute(
+                select(UserModel.email, UserModel.id).where(
+                    UserModel.email.in_(list(emails))
+                )
+            )
+            return {email: user_id for email, user_id in rows}
+
+    def fetch_existing_ids(self, user_ids: Iterable[int]) -> Set[int]:
+        """Fetches, in a single IN query, which of the given user ids exist."""
+        with self.db_session as db_session:
+            return set(
+                db_session.scalars(
+                    select(UserModel.id).where(UserModel.id.in_(list(user_ids)))
+                )
+            )
+
+    def create_users(self, users: List[dict]) -> List[UserSchema] | None:
+        """
+        Creates many users with a single multi-row INSERT ... RETURNING, in one transaction.
+
+        Returns the created users in the same order as given, or None (and nothing is written) if any email is
+        already taken.
+        """
+        with self.db_session as db_session:
+            try:
+                with db_session.begin_nested():
+                    user_models = db_session.scalars(
+                        insert(UserModel).returning(
+                            UserModel, sort_by_parameter_order=True
+                        ),
+                        users,
+                    ).all()
+                    created_users = [self.from_orm(user) for user in user_models]
+                    record_user_changes(db_session, [user.id for user in created_users])
+                    update_user_stats(
+                        db_session,
+                        added=[(user.dt_created, user.email) for user in created_users],
+                    )
+                self.commit(db_session)
+            except IntegrityError:
+                logger.error("m=create_users, Email already in use on batch")
+                return None
+
+            return created_users
+
+    def update_users(self, users: List[dict]) -> List[UserSchema] | None:
+        """
+        Updates many users by primary key with a single executemany UPDATE, in one transaction.
+
+        Returns the updated users ordered by id, or None (and nothing is written) if any email is already taken.
+        """
+        user_ids = [user["id"] for user in users]
+        with self.db_session as db_session:
+            try:
+                with db_session.begin_nested():
+                    # the previous emails, to move the domain counters of the users changing domain
+                    previous_emails = dict(
+                        db_session.execute(
+                            select(UserModel.id, UserModel.email).where(
+                                UserModel.id.in_(user_ids)
+                            )
+                        ).all()
+                    )
+                    db_session.execute(update(UserModel), users)
+                    user_models = db_session.scalars(
+                        select(UserModel)
+                        .where(UserModel.id.in_(user_ids))
+                        .order_by(UserModel.id)
+                    ).all()
+                    updated_users = [self.from_orm(user) for user in user_models]
+                    record_user_changes(db_session, [user.id for user in updated_users])
+                    update_user_stats(
+                        db_session,
+                        added=[(user.dt_created, user.email) for user in updated_users],
+                        removed=[
+                            (user.dt_created, previous_emails[user.id])
+                            for user in updated_users
+                        ],
+                    )
+                self.commit(db_session)
+            except IntegrityError:
+                logger.error("m=update_users, Email already in use on batch")
+                return None
+
+            return updated_users
+
+    def delete_users(self, user_ids: Iterable[int]) -> Set[int]:
+        """Deletes many users with a single DELETE, in one transaction, and returns the ids actually deleted."""
+        with self.db_session as db_session:
+            deleted_rows = db_session.execute(
+                delete(UserModel)
+                .where(UserModel.id.in_(list(user_ids)))
+                .returning(UserModel.id, UserModel.dt_created, UserModel.email)
+                .execution_options(synchronize_session=False)
+            ).all()
+            deleted_ids = {user_id for user_id, _, _ in deleted_rows}
+            record_user_changes(db_session, deleted_ids, deleted=True)
+            update_user_stats(
+                db_session,
+                removed=[(dt_created, email) for _, dt_created, email in deleted_rows],
+            )
+            self.commit(db_session)
+
+            return deleted_ids
@@ -1,7 +1,7 @@
 """User schema."""
-from datetime import datetime
+from datetime import datetime, timezone
 
-from pydantic import BaseModel
+from pydantic import BaseModel, validator
 
 
 class UserSchema(BaseModel):
@@ -32,3 +32,31 @@ class UserSchema(BaseModel):
             "dt_created": self.dt_created,
             "dt_updated": self.dt_updated,
         }
+
+
+class UserSearchSchema(BaseModel):
+    """Schema for the users search filters, all optional and combined with AND."""
+
+    email_prefix: str | None = None
+    name_prefix: str | None = None
+    created_from: datetime | None = None
+    created_to: datetime | None = None
+    updated_from: datetime | None = None
+    updated_to: datetime | None = None
+
+    class Config:
+        """Pydantic's config, rejecting unknown filters."""
+
+        extra = "forbid"
+
+    @validator("email_prefix", "name_prefix")
+    def prefix_not_empty(cls, value: str | None) -> str | None:
+        """Treats empty prefixes as no filter."""
+        return value or None
+
+    @validator("created_from", "created_to", "updated_from", "updated_to")
+    def to_naive_utc(cls, value: datetime | None) -> datetime | None:
+        """Converts aware datetimes to naive UTC, as they are stored on the database."""
+        if value is not None and value.tzinfo is not None:
+            return value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
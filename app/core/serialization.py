@@ -0,0 +1,122 @@
+"""
+Fast JSON serialization, byte-compatible with Flask's default JSON provider.
+
+Uses orjson when installed and falls back to the stdlib json module. Either way the output matches `jsonify`:
+compact separators, sorted keys, ASCII only and datetimes formatted as HTTP dates.
+
+When msgpack is installed, clients asking for `Accept: application/msgpack` get MessagePack instead, with the same
+values (datetimes included) as the JSON output.
+"""
+import json
+from datetime import date, datetime, timezone
+from typing import Any
+
+from flask import Response, has_request_context, request
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+MSGPACK_MIMETYPE = "application/msgpack"
+
+
+_WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+_MONTHS = (
+    "Jan",
+    "Feb",
+    "Mar",
+    "Apr",
+    "May",
+    "Jun",
+    "Jul",
+    "Aug",
+    "Sep",
+    "Oct",
+    "Nov",
+    "Dec",
+)
+
+
+def _http_datetime(value: datetime) -> str:
+    """Formats a datetime as an HTTP date, same as werkzeug's `http_date` but several times faster."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+
+    return (
+        f"{_WEEKDAYS[value.weekday()]}, {value.day:02d} {_MONTHS[value.month - 1]} {value.year:04d} "
+        f"{value.hour:02d}:{value.minute:02d}:{value.second:02d} GMT"
+    )
+
+
+def _default(value: Any) -> str:
+    """Encodes the values JSON does not support natively, the same way Flask does."""
+    if isinstance(value, datetime):
+        return _http_datetime(value)
+
+    if isinstance(value, date):
+        return http_date(value)
+
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    """Encodes the object to JSON bytes with the stdlib json module."""
+    return json.dumps(
+        obj, default=_default, sort_keys=True, separators=(",", ":")
+    ).encode()
+
+
+def dumps(obj: Any) -> bytes:
+    """Encodes the object to JSON bytes."""
+    if orjson is None:
+        return _stdlib_dumps(obj)
+
+    output = orjson.dumps(
+        obj,
+        default=_default,
+        option=orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+    )
+    # orjson does not escape non-ASCII characters, unlike jsonify
+    return output if output.isascii() else _stdlib_dumps(obj)
+
+
+def json_response(obj: Any, status: int = 200) -> Response:
+    """Returns a JSON response, the same as `jsonify` would build, encoded with the fast path."""
+    return Response(dumps(obj) + b"\n", status=status, mimetype="application/json")
+
+
+def msgpack_dumps(obj: Any) -> bytes:
+    """Encodes the object to MessagePack bytes, datetimes as HTTP dates like on JSON."""
+    return msgpack.packb(obj, default=_default, datetime=False)
+
+
+def wants_msgpack() -> bool:
+    """Checks if the client of the current request prefers MessagePack over JSON (and msgpack is installed)."""
+    if msgpack is None or not has_request_context():
+        return False
+
+    best = request.accept_mimetypes.best_match(
+        ["application/json", MSGPACK_MIMETYPE], default="application/json"
+    )
+    return best == MSGPACK_MIMETYPE
+
+
+def negotiated_response(obj: Any, status: int = 200) -> Response:
+    """Returns a MessagePack response if the client asked for it, the same as `json_response` otherwise."""
+    if wants_msgpack():
+        response = Response(
+            msgpack_dumps(obj), status=status, mimetype=MSGPACK_MIMETYPE
+        )
+    else:
+        response = json_response(obj, status)
+
+    if msgpack is not None:
+        response.vary.add("Accept")
+    return response
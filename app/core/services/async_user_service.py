@@ -0,0 +1,99 @@
+"""Async User Service."""
+from typing import Callable
+
+from app.core.cache.cache import CacheBackend, get_user_cache
+from app.core.models.user_model import UserModel
+from app.core.repositories.async_user_repository import AsyncUserRepository
+from app.core.services.user_service import UserService
+from app.core.validation import is_id_valid, validate_user
+from app.core.write_errors import UserWriteError
+from app.logger import logger
+
+
+class AsyncUserService:
+    """
+    Async counterpart of UserService, used by the ASGI app.
+
+    Validation, pagination and caching are shared with UserService, so both deployment modes behave the same.
+    """
+
+    def __init__(self, user_repository=None, user_cache: CacheBackend | None = None):
+        self.user_repository = user_repository or AsyncUserRepository()
+        self.user_cache = user_cache if user_cache is not None else get_user_cache()
+
+    async def list_page(self, limit: int, after_id: int | None = None) -> dict:
+        """Returns a page of users and the cursor of the next page, if there is one."""
+        users = await self.user_repository.fetch_users_page(limit + 1, after_id)
+        return UserService._build_page(users, limit)
+
+    async def get_user(self, user_id) -> dict | None:
+        """Returns a user by its id if exists, reading through the user cache."""
+        if not is_id_valid(user_id):
+            return None
+
+        user_model = self.user_cache.get(user_id)
+        if user_model is None:
+            user_model = await self.user_repository.get_user_by_id(user_id)
+            self.user_cache.set(user_id, user_model)
+
+        return user_model.to_dict() if user_model else None
+
+    async def create_user(self, name, email) -> dict | None:
+        """Creates a new user if name and email are valid and email is unique."""
+        errors = validate_user({"name": name, "email": email})
+        if errors:
+            logger.error(
+                "m=create_user, Invalid user data: name=%s, email=%s, errors=%s",
+                name,
+                email,
+                errors,
+            )
+            return None
+
+        user_model = await self.user_repository.create_user(
+            UserModel(name=name, email=email)
+        )
+        if not user_model:
+            return None
+
+        self.user_cache.delete(user_model.id)
+        return user_model.to_dict()
+
+    async def update_user(
+        self, user_id, name, email, precondition: Callable[[dict], bool] | None = None
+    ) -> dict | UserWriteError:
+        """
+        Updates a user by its id if exists, returning why it could not if it was not updated.
+
+        `precondition` (e.g. the request If-Match) is checked against the current user on the write itself.
+        """
+        errors = validate_user({"name": name, "email": email})
+        if errors:
+            logger.error(
+                "m=update_user, Invalid user data: name=%s, email=%s, errors=%s",
+                name,
+                email,
+                errors,
+            )
+            return UserWriteError.INVALID
+        if not is_id_valid(user_id):
+            return UserWriteError.NOT_FOUND
+
+        user_model = await self.user_repository.update_user(
+            UserModel(id=user_id, name=name, email=email), precondition
+        )
+        self.user_cache.delete(user_id)
+        if isinstance(user_model, UserWriteError):
+            return user_model
+        return user_model.to_dict()
+
+    async def delete_user(
+        self, user_id, precondition: Callable[[dict], bool] | None = None
+    ) -> bool | UserWriteError:
+        """Deletes a user by its id if exists and `precondition` holds, returning True or why it could not."""
+        if not is_id_valid(user_id):
+            return UserWriteError.NOT_FOUND
+
+        deleted = await self.user_repository.delete_user(user_id, precondition)
+        self.user_cache.delete(user_id)
+        return deleted
@@ -1,36 +1,164 @@
 """User Service."""
-import re
-from typing import List
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List
 
+from app.core.cache.bloom import EmailIndex, get_email_index
+from app.core.cache.cache import CacheBackend, get_user_cache
+from app.core.database.unit_of_work import UnitOfWork
+from app.core.metrics.metrics import instrument_methods
 from app.core.models.user_model import UserModel
-from app.core.repositories.user_repository import UserRepository
+from app.core.pagination import encode_cursor
+from app.core.repositories.user_repository import USER_COLUMNS, UserRepository
+from app.core.schemas.user_schema import UserSearchSchema
+from app.core.validation import (
+    is_email_valid,
+    is_id_valid,
+    is_name_valid,
+    validate_many,
+    validate_user,
+)
+from app.core.write_errors import UserWriteError
 from app.logger import logger
+from app.settings import settings
 
 
+@instrument_methods
 class UserService:
     """Manages business logic and validations for user operations."""
 
-    def __init__(self, user_repository=None):
+    def __init__(
+        self,
+        user_repository=None,
+        user_cache: CacheBackend | None = None,
+        email_index: EmailIndex | None = None,
+    ):
         self.user_repository = user_repository or UserRepository()
+        self.user_cache = user_cache if user_cache is not None else get_user_cache()
+        self.email_index = email_index if email_index is not None else get_email_index()
 
     def list_all(self) -> List[dict]:
         """Returns a list of all users."""
         user_models = self.user_repository.fetch_all_users()
         return [user_model.to_dict() for user_model in user_models]
 
+    def list_page(self, limit: int, after_id: int | None = None) -> dict:
+        """Returns a page of users and the cursor of the next page, if there is one."""
+        # fetch one extra row to know whether there is a next page
+        users = self.user_repository.fetch_users_page(limit + 1, after_id)
+        return self._build_page(users, limit)
+
+    def search_page(
+        self, filters: UserSearchSchema, limit: int, after_id: int | None = None
+    ) -> dict:
+        """
+        Returns a page of the users matching the filters and the cursor of the next page, if there is one.
+
+        A page may hold fewer than `limit` users and still have a next one, when the search stopped walking the users
+        before filling it (see `UserRepository.search_users`).
+        """
+        users, stopped_at = self.user_repository.search_users(
+            filters, limit + 1, after_id
+        )
+        page = self._build_page(users, limit)
+        if page["next_cursor"] is None and stopped_at is not None:
+            page["next_cursor"] = encode_cursor(stopped_at)
+        return page
+
+    def list_changes(self, limit: int, since: int | None = None) -> dict:
+        """
+        Returns up to `limit` user changes after the `since` sequence, and the cursor to resume from.
+
+        Each change carries the current user, or is a tombstone (`"op": "delete"`, no user) if it was deleted. The
+        cursor is returned even on the last page, so clients keep polling from it.
+        """
+        since = since or 0
+        rows = self.user_repository.fetch_changes(limit + 1, since)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        changes = []
+        for row in rows:
+            deleted = row["deleted"] or row["id"] is None
+            changes.append(
+                {
+                    "seq": row["seq"],
+                    "id": row["user_id"],
+                    "op": "delete" if deleted else "upsert",
+                    "user": None
+                    if deleted
+                    else {column.key: row[column.key] for column in USER_COLUMNS},
+                }
+            )
+
+        return {
+            "changes": changes,
+            "next_cursor": encode_cursor(rows[-1]["seq"] if rows else since, "seq"),
+            "has_more": has_more,
+        }
+
+    def export_all(self) -> Iterator[dict]:
+        """Lazily yields every user, keeping memory flat regardless of the table size."""
+        yield from self.user_repository.stream_users(settings.EXPORT_BATCH_SIZE)
+
+    def get_stats(self, days: int, domains: int) -> dict:
+        """
+        Returns the user count, the users created by day and week, and the email domains with the most users.
+
+        Covers each of the last `days` days (UTC) and their ISO weeks, and the `domains` biggest domains. Days and weeks
+        without users are left out.
+        """
+        since = datetime.utcnow().date() - timedelta(days=days - 1)
+        stats = self.user_repository.fetch_stats(since, domains)
+        return {
+            "total": stats["total"].get("", 0),
+            "by_day": stats["day"],
+            "by_week": stats["week"],
+            "by_domain": stats["domain"],
+        }
+
+    def reconcile_stats(self) -> dict:
+        """Recomputes the user counters from the users table, returning how many had drifted."""
+        summary = self.user_repository.reconcile_stats(settings.EXPORT_BATCH_SIZE)
+        if summary["drifted"]:
+            logger.warning(
+                "m=reconcile_stats, %s of %s user counters had drifted",
+                summary["drifted"],
+                summary["counters"],
+            )
+        return summary
+
     def get_user(self, user_id) -> dict | None:
-        """Returns a user by its id if exists."""
-        user_model = self.user_repository.get_user_by_id(user_id)
+        """
+        Returns a user by its id if exists, reading through the user cache.
+
+        Only users read from the primary are cached: a replica may lag behind, and caching what it returns would keep
+        serving a stale user for up to USER_CACHE_TTL after the replica caught up.
+        """
+        if not is_id_valid(user_id):
+            return None
+
+        user_model = self.user_cache.get(user_id)
+        if user_model is None:
+            from_replica = self.user_repository.reads_from_replica()
+            user_model = self.user_repository.get_user_by_id(user_id)
+            if not from_replica:
+                self.user_cache.set(user_id, user_model)
 
         return user_model.to_dict() if user_model else None
 
     def create_user(self, name, email) -> dict | None:
-        """Creates a new user if name and email are valid and email is unique."""
-        if not (
-            self._is_name_valid(name) and self.is_email_valid(email)
-        ) or self.user_repository.get_user_by_email(email):
+        """
+        Creates a new user if name and email are valid and email is unique.
+
+        Uniqueness is enforced by the unique index on users.email, so the insert itself rejects duplicates.
+        """
+        errors = validate_user({"name": name, "email": email})
+        if errors:
             logger.error(
-                f"m=create_user, Invalid user data: name={name}, email={email}"
+                "m=create_user, Invalid user data: name=%s, email=%s, errors=%s",
+                name,
+                email,
+                errors,
             )
             return None
 
@@ -40,55 +168,275 @@ class UserService:
                 email=email,
             )
         )
+        if not user_model:
+            return None
 
-        return user_model.to_dict() if user_model else None
+        self._invalidate_cache(user_model.id)
+        self._index_emails([email])
+        return user_model.to_dict()
+
+    def update_user(
+        self, user_id, name, email, precondition: Callable[[dict], bool] | None = None
+    ) -> dict | UserWriteError:
+        """
+        Updates a user by its id if exists, returning why it could not if it was not updated.
 
-    def update_user(self, user_id, name, email) -> dict | None:
-        """Updates a user by its id if exists."""
-        if not self._is_name_valid(name) and self.is_email_valid(email):
+        `precondition` (e.g. the request If-Match) is checked against the current user on the write itself.
+        """
+        errors = validate_user({"name": name, "email": email})
+        if errors:
             logger.error(
-                f"m=update_uder, Invalid user data: name={name}, email={email}"
+                "m=update_user, Invalid user data: name=%s, email=%s, errors=%s",
+                name,
+                email,
+                errors,
             )
-            return None
+            return UserWriteError.INVALID
+        if not is_id_valid(user_id):
+            return UserWriteError.NOT_FOUND
 
         user_model = self.user_repository.update_user(
-            UserModel(id=user_id, name=name, email=email)
+            UserModel(id=user_id, name=name, email=email), precondition
         )
-        return user_model.to_dict() if user_model else None
+        self._invalidate_cache(user_id)
+        if isinstance(user_model, UserWriteError):
+            return user_model
 
-    def delete_user(self, user_id) -> bool:
-        """Deletes a user by its id if exists."""
-        return self.user_repository.delete_user(user_id)
+        self._index_emails([email])
+        return user_model.to_dict()
 
-    @staticmethod
-    def _is_name_valid(name):
+    def delete_user(
+        self, user_id, precondition: Callable[[dict], bool] | None = None
+    ) -> bool | UserWriteError:
+        """Deletes a user by its id if exists and `precondition` holds, returning True or why it could not."""
+        if not is_id_valid(user_id):
+            return UserWriteError.NOT_FOUND
+
+        deleted = self.user_repository.delete_user(user_id, precondition)
+        self._invalidate_cache(user_id)
+        if deleted is True and self.email_index is not None:
+            self.email_index.note_removed(1)
+        return deleted
+
+    def create_users(self, users: List[dict]) -> List[dict] | None:
+        """
+        Creates many users at once and returns one result per item, in the given order.
+
+        The whole batch is validated up front, emails are checked against the database with a single query and all
+        valid items are written in a single transaction. If the insert still conflicts (an email written meanwhile,
+        or missed by the email index), the emails are checked on the database again and the free ones retried once.
+        Returns None if that conflicted too, in which case nothing is written.
         """
-        Validate a name string.
+        results: List[dict | None] = [None] * len(users)
+        pending, batch_emails = {}, set()
+        for index, (user, errors) in enumerate(zip(users, validate_many(users))):
+            if errors:
+                results[index] = self._bulk_error(
+                    index, 400, "Invalid name or email", errors
+                )
+            elif user["email"] in batch_emails:
+                results[index] = self._bulk_error(
+                    index, 409, "Duplicated email on batch"
+                )
+            else:
+                batch_emails.add(user["email"])
+                pending[index] = {"name": user["name"], "email": user["email"]}
+
+        if pending:
+            self._reject_taken_emails(
+                results,
+                pending,
+                self._fetch_email_owners([row["email"] for row in pending.values()]),
+            )
+
+        if pending:
+            emails = [row["email"] for row in pending.values()]
+            created_users = self.user_repository.create_users(list(pending.values()))
+            if created_users is None:
+                self._reject_taken_emails(
+                    results, pending, self.user_repository.fetch_email_owners(emails)
+                )
+                created_users = (
+                    self.user_repository.create_users(list(pending.values()))
+                    if pending
+                    else []
+                )
+            # taken ones too, so later batches check them on the database
+            self._index_emails(emails)
+            if created_users is None:
+                return None
+
+            for index, user_model in zip(pending, created_users):
+                self._invalidate_cache(user_model.id)
+                results[index] = {
+                    "index": index,
+                    "status": 201,
+                    "user": user_model.to_dict(),
+                }
 
-        A valid name must:
-          - Be at least 2 characters long (after stripping whitespace).
-          - Contain only alphabetic characters, spaces, hyphens, or apostrophes.
-          - Start and end with an alphabetic character.
+        return results
 
-        Returns True if the name is valid, False otherwise.
+    def update_users(self, users: List[dict]) -> List[dict] | None:
         """
-        name = name.strip()
-        if len(name) < 2:
-            return False
+        Updates many users at once and returns one result per item, in the given order.
 
-        # - The first character should be a letter.
-        # - Allowed characters in the middle: letters, spaces, hyphens, apostrophes.
-        # - The last character to be a letter.
-        pattern = re.compile(r"^[A-Za-z][A-Za-z\s'-]*[A-Za-z]$")
+        Ids and emails are checked against the database with one query each and all valid items are written in a
+        single transaction. A conflicting update is checked and retried once like in `create_users`, returning None
+        if that conflicted too, in which case nothing is written.
+        """
+        results: List[dict | None] = [None] * len(users)
+        pending, batch_ids, batch_emails = {}, set(), set()
+        validations = validate_many(users, with_id=True)
+        for index, (user, errors) in enumerate(zip(users, validations)):
+            if errors:
+                results[index] = self._bulk_error(
+                    index, 400, "Invalid id, name or email", errors
+                )
+            elif user["id"] in batch_ids:
+                results[index] = self._bulk_error(
+                    index, 409, "Duplicated user on batch"
+                )
+            elif user["email"] in batch_emails:
+                results[index] = self._bulk_error(
+                    index, 409, "Duplicated email on batch"
+                )
+            else:
+                batch_ids.add(user["id"])
+                batch_emails.add(user["email"])
+                pending[index] = {
+                    "id": user["id"],
+                    "name": user["name"],
+                    "email": user["email"],
+                }
 
-        return pattern.match(name) is not None
+        if pending:
+            existing_ids = self.user_repository.fetch_existing_ids(
+                row["id"] for row in pending.values()
+            )
+            for index, row in list(pending.items()):
+                if row["id"] not in existing_ids:
+                    results[index] = self._bulk_error(index, 404, "User not found")
+                    del pending[index]
+            self._reject_taken_emails(
+                results,
+                pending,
+                self._fetch_email_owners([row["email"] for row in pending.values()]),
+            )
 
-    @staticmethod
-    def is_email_valid(email: str) -> bool:
+        if pending:
+            emails = [row["email"] for row in pending.values()]
+            updated_users = self.user_repository.update_users(list(pending.values()))
+            if updated_users is None:
+                self._reject_taken_emails(
+                    results, pending, self.user_repository.fetch_email_owners(emails)
+                )
+                updated_users = (
+                    self.user_repository.update_users(list(pending.values()))
+                    if pending
+                    else []
+                )
+            self._index_emails(emails)
+            if updated_users is None:
+                return None
+
+            updated_by_id = {user_model.id: user_model for user_model in updated_users}
+            for index, row in pending.items():
+                self._invalidate_cache(row["id"])
+                results[index] = {
+                    "index": index,
+                    "status": 200,
+                    "user": updated_by_id[row["id"]].to_dict(),
+                }
+
+        return results
+
+    def delete_users(self, user_ids: List[int]) -> List[dict]:
+        """Deletes many users at once and returns one result per id, in the given order."""
+        # checked per item first, as invalid ids may not even be hashable (e.g. lists)
+        valid = [is_id_valid(user_id) for user_id in user_ids]
+        valid_ids = {user_id for user_id, is_valid in zip(user_ids, valid) if is_valid}
+        deleted_ids = (
+            self.user_repository.delete_users(valid_ids) if valid_ids else set()
+        )
+        for user_id in deleted_ids:
+            self._invalidate_cache(user_id)
+        if self.email_index is not None:
+            self.email_index.note_removed(len(deleted_ids))
+
+        results = []
+        for index, (user_id, is_valid) in enumerate(zip(user_ids, valid)):
+            if not is_valid:
+                results.append(self._bulk_error(index, 400, "Invalid id"))
+            elif user_id not in deleted_ids:
+                results.append(self._bulk_error(index, 404, "User not found"))
+            else:
+                results.append({"index": index, "status": 200, "id": user_id})
+
+        return results
+
+    def _reject_taken_emails(
+        self,
+        results: List[dict | None],
+        pending: Dict[int, dict],
+        owners: Dict[str, int],
+    ) -> None:
+        """Moves the pending bulk items whose email is owned by another user out of `pending`, as 409 results."""
+        for index, row in list(pending.items()):
+            if owners.get(row["email"], row.get("id")) != row.get("id"):
+                results[index] = self._bulk_error(index, 409, "Email already in use")
+                del pending[index]
+
+    def _fetch_email_owners(self, emails: List[str]) -> Dict[str, int]:
+        """Fetches the id of the user owning each email, skipping the query if the email index has none of them."""
+        if self.email_index is not None and self.email_index.all_absent(emails):
+            return {}
+        return self.user_repository.fetch_email_owners(emails)
+
+    def _index_emails(self, emails: Iterable[str]) -> None:
+        """Adds the emails of written users to the email index, if enabled."""
+        if self.email_index is not None:
+            self.email_index.add_many(emails)
+
+    def _invalidate_cache(self, user_id: int) -> None:
         """
-        Validate the email address using a regular expression.
+        Drops a user from the cache.
 
-        Returns True if the email is valid, False otherwise.
+        Within a unit of work it is dropped again once committed, so a read of the old version cached while the write
+        was running does not outlive it. A read that fetched the old version before the commit can still cache it
+        after that second drop, leaving it cached for up to USER_CACHE_TTL.
         """
-        email_regex = re.compile(r"(^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$)")
-        return email_regex.match(email) is not None
+        self.user_cache.delete(user_id)
+        unit_of_work = UnitOfWork.current()
+        if unit_of_work is not None:
+            unit_of_work.after_commit(lambda: self.user_cache.delete(user_id))
+
+    @staticmethod
+    def _build_page(users: List[dict], limit: int) -> dict:
+        """Builds a page out of up to `limit + 1` users, the extra one only telling there is a next page."""
+        has_next = len(users) > limit
+        users = users[:limit]
+
+        return {
+            "users": users,
+            "next_cursor": encode_cursor(users[-1]["id"]) if has_next else None,
+        }
+
+    @staticmethod
+    def _bulk_error(
+        index: int, status: int, error: str, fields: dict | None = None
+    ) -> dict:
+        """Builds the result of a bulk item that was not written, with the errors by field if it was invalid."""
+        result = {"index": index, "status": status, "error": error}
+        if fields:
+            result["fields"] = fields
+        return result
+
+    @staticmethod
+    def _is_name_valid(name) -> bool:
+        """Validate a name string, see `app.core.validation.name_error` for the rules."""
+        return is_name_valid(name)
+
+    @staticmethod
+    def is_email_valid(email: str) -> bool:
+        """Validate the email address, see `app.core.validation.email_error` for the rules."""
+        return is_email_valid(email)
@@ -0,0 +1,120 @@
+"""
+User data validation.
+
+Patterns are compiled once, at import, and length limits follow the users table columns. Errors are reported per
+field, so a whole batch can be validated in one pass with `validate_many`.
+"""
+import re
+from typing import Dict, Iterable, List
+
+from app.core.models.user_model import UserModel
+
+# - The first character should be a letter.
+# - Allowed characters in the middle: letters, spaces, hyphens, apostrophes.
+# - The last character to be a letter.
+NAME_PATTERN = re.compile(r"[A-Za-z][A-Za-z\s'-]*[A-Za-z]")
+EMAIL_PATTERN = re.compile(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+")
+
+NAME_MAX_LENGTH = UserModel.name.type.length
+EMAIL_MAX_LENGTH = UserModel.email.type.length
+# ids are signed 64-bit integers on the database
+ID_MAX = 2**63 - 1
+
+# errors by field name, empty when the item is valid
+FieldErrors = Dict[str, str]
+
+
+def name_error(name) -> str | None:
+    """
+    Validate a name string, returning why it is invalid or None if it is valid.
+
+    A valid name must:
+      - Be at least 2 characters long (after stripping whitespace), and fit the name column.
+      - Contain only alphabetic characters, spaces, hyphens, or apostrophes.
+      - Start and end with an alphabetic character.
+    """
+    if not isinstance(name, str):
+        return "Name must be a string"
+    if len(name) > NAME_MAX_LENGTH:
+        return f"Name must have at most {NAME_MAX_LENGTH} characters"
+    if NAME_PATTERN.fullmatch(name.strip()) is None:
+        return "Name must have at least 2 letters, spaces, hyphens or apostrophes, starting and ending with a letter"
+    return None
+
+
+def email_error(email) -> str | None:
+    """Validate an email address, returning why it is invalid or None if it is valid."""
+    if not isinstance(email, str):
+        return "Email must be a string"
+    if len(email) > EMAIL_MAX_LENGTH:
+        return f"Email must have at most {EMAIL_MAX_LENGTH} characters"
+    if EMAIL_PATTERN.fullmatch(email) is None:
+        return "Email is invalid"
+    return None
+
+
+def id_error(user_id) -> str | None:
+    """Validate a user id, returning why it is invalid or None if it is a positive integer up to ID_MAX."""
+    if (
+        isinstance(user_id, bool)
+        or not isinstance(user_id, int)
+        or not 1 <= user_id <= ID_MAX
+    ):
+        return f"Id must be a positive integer up to {ID_MAX}"
+    return None
+
+
+def is_name_valid(name) -> bool:
+    """Returns True if the name is valid, False otherwise."""
+    return name_error(name) is None
+
+
+def is_email_valid(email) -> bool:
+    """Returns True if the email is valid, False otherwise."""
+    return email_error(email) is None
+
+
+def is_id_valid(user_id) -> bool:
+    """Returns True if the user id is a positive integer up to ID_MAX, False otherwise."""
+    return id_error(user_id) is None
+
+
+# the field validators of a user item, by whether it carries its id
+_FIELD_VALIDATORS = {
+    False: (("name", name_error), ("email", email_error)),
+    True: (("id", id_error), ("name", name_error), ("email", email_error)),
+}
+
+_match_name = NAME_PATTERN.fullmatch
+_match_email = EMAIL_PATTERN.fullmatch
+
+
+def validate_user(user, with_id: bool = False) -> FieldErrors:
+    """Validates a user item (name, email and, if `with_id`, its id), returning its errors by field."""
+    if not isinstance(user, dict):
+        return {"user": "User must be an object"}
+
+    # fast path for the common valid item, the same rules inlined without building any error
+    name, email = user.get("name"), user.get("email")
+    if (
+        isinstance(name, str)
+        and isinstance(email, str)
+        and len(name) <= NAME_MAX_LENGTH
+        and len(email) <= EMAIL_MAX_LENGTH
+        and _match_name(name.strip())
+        and _match_email(email)
+        and (not with_id or id_error(user.get("id")) is None)
+    ):
+        return {}
+
+    errors = {}
+    for field, field_error in _FIELD_VALIDATORS[with_id]:
+        error = field_error(user.get(field))
+        if error is not None:
+            errors[field] = error
+    return errors
+
+
+def validate_many(users: Iterable, with_id: bool = False) -> List[FieldErrors]:
+    """Validates a batch of user items in one pass, returning the errors by field of each item, in order."""
+    return [validate_user(user, with_id) for user in users]
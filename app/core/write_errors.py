@@ -0,0 +1,24 @@
+"""Outcomes of a failed single user write, shared by the repositories, services and routes."""
+from enum import IntEnum
+
+
+class UserWriteError(IntEnum):
+    """Why a single user write failed, valued as the HTTP status the routes answer with."""
+
+    INVALID = 400
+    NOT_FOUND = 404
+    EMAIL_TAKEN = 409
+    PRECONDITION_FAILED = 412
+
+    @property
+    def message(self) -> str:
+        """Returns the error message of the response."""
+        return _MESSAGES[self]
+
+
+_MESSAGES = {
+    UserWriteError.INVALID: "Invalid name or email",
+    UserWriteError.NOT_FOUND: "User not found",
+    UserWriteError.EMAIL_TAKEN: "Email already in use",
+    UserWriteError.PRECONDITION_FAILED: "User was modified",
+}
@@ -1,9 +1,156 @@
+"""
+Application logging.
+
+By default records are written as text lines by the thread logging them. With `LOG_QUEUE` they are handed to a
+queue and written in batches by a background listener thread instead, so the request path never blocks on I/O, and with
+`LOG_JSON` they are written as JSON lines. Every record carries the id of the request it was logged on, and
+`LOG_INFO_SAMPLE_RATE` keeps only a share of the high-volume info records.
+
+Importing it configures nothing: entry points call `configure_logging` (`create_app` does), so scripts importing
+the services do not pay for it.
+"""
+import atexit
+import json
 import logging
+import queue
+import random
+import re
+import time
+import uuid
+from contextvars import ContextVar
 from logging.config import dictConfig
+from logging.handlers import QueueHandler, QueueListener
+from typing import IO
+
 from pydantic import BaseModel
 
 from app.settings import settings
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+REQUEST_ID_HEADER = "X-Request-ID"
+# ids sent by clients are only reused if they look like one, so they can not forge log lines
+_REQUEST_ID_PATTERN = re.compile(r"[\w.-]{1,128}")
+
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamps records with the id of the request being handled, if any (a filter that never drops)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Stamps the record, unless it already was on the thread that logged it."""
+        if not hasattr(record, "request_id"):
+            record.request_id = request_id_var.get()
+        return True
+
+
+class InfoSamplingFilter(logging.Filter):
+    """Keeps only a `rate` share of the INFO (and DEBUG) records, warnings and errors always pass."""
+
+    def __init__(self, rate: float = 1.0):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Randomly drops low level records, at the configured rate."""
+        return (
+            record.levelno > logging.INFO
+            or self.rate >= 1.0
+            or random.random() < self.rate
+        )
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as JSON lines."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Formats the record as a single line JSON object."""
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+            + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        if orjson is not None:
+            return orjson.dumps(entry, default=str).decode()
+        return json.dumps(entry, default=str)
+
+
+class _LocalQueueHandler(QueueHandler):
+    """
+    Queue handler for a listener on the same process.
+
+    The standard one formats the message on the logging thread, to make records picklable. In process there is
+    no need, so formatting is left to the listener thread too.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Enqueues the record as it is."""
+        return record
+
+
+class BatchingStreamHandler(logging.StreamHandler):
+    """
+    Stream handler buffering the formatted records and writing them out in a single write per batch.
+
+    Used behind the queue, where the listener flushes it whenever the queue is drained, or once `BATCH_SIZE`
+    records are buffered.
+    """
+
+    BATCH_SIZE = 512
+
+    def __init__(self, stream=None):
+        super().__init__(stream)
+        self.buffer = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Buffers the formatted record."""
+        try:
+            self.buffer.append(self.format(record) + self.terminator)
+        except Exception:
+            # same as StreamHandler, never raise on logging
+            self.handleError(record)
+            return
+
+        if len(self.buffer) >= self.BATCH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes out the buffered records."""
+        with self.lock:
+            if self.buffer:
+                self.stream.write("".join(self.buffer))
+                self.buffer.clear()
+            super().flush()
+
+
+class _BatchingQueueListener(QueueListener):
+    """Queue listener flushing its handlers whenever it drains the queue, so records are written in batches."""
+
+    def handle(self, record: logging.LogRecord) -> None:
+        """Handles the record, flushing the handlers if no other record is waiting."""
+        super().handle(record)
+        if self.queue.empty():
+            self.flush()
+
+    def flush(self) -> None:
+        """Flushes the handlers."""
+        for handler in self.handlers:
+            handler.flush()
+
+    def stop(self) -> None:
+        """Stops the listener once the queued records are handled, and writes out the last batch."""
+        super().stop()
+        self.flush()
+
 
 class LogConfig(BaseModel):
     """Logging configuration for the application."""
@@ -19,12 +166,18 @@ class LogConfig(BaseModel):
         "default": {
             "format": "%(levelname)s | %(asctime)s | %(message)s",
             "datefmt": "%Y-%m-%d %H:%M:%S",
-        }
+        },
+        "json": {"()": JsonFormatter},
+    }
+    filters: dict = {
+        "request_id": {"()": RequestIdFilter},
+        "info_sampling": {"()": InfoSamplingFilter},
     }
     handlers: dict = {
         "default": {
             "class": "logging.StreamHandler",
             "formatter": "default",
+            "filters": ["request_id"],
             "stream": "ext://sys.stderr",
         }
     }
@@ -32,13 +185,94 @@ class LogConfig(BaseModel):
     def dict(self, **kwargs):
         """Override to inject dynamic logger configuration."""
         config = super().dict(**kwargs)
+        # read when (re)configuring, so settings changed at runtime apply
+        config["filters"]["info_sampling"]["rate"] = settings.LOG_INFO_SAMPLE_RATE
+        if settings.LOG_JSON:
+            config["handlers"]["default"]["formatter"] = "json"
+        if settings.LOG_QUEUE:
+            del config["handlers"]["default"]["class"]
+            config["handlers"]["default"]["()"] = BatchingStreamHandler
         config["loggers"] = {
-            self.LOGGER_NAME: {"handlers": ["default"], "level": self.LOG_LEVEL}
+            self.LOGGER_NAME: {
+                "handlers": ["default"],
+                "level": self.LOG_LEVEL,
+                "filters": ["info_sampling"],
+            }
         }
         return config
 
 
-# Configure logging using the dictionary configuration
-logger_config = LogConfig()
-dictConfig(logger_config.dict())
-logger = logging.getLogger(logger_config.LOGGER_NAME)
+_listener: QueueListener | None = None
+
+
+def _stop_listener() -> None:
+    """Stops the background listener, if any, writing out the records still queued."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def configure_logging(stream: IO | None = None) -> logging.Logger:
+    """
+    (Re)configures the application logger from settings, writing to `stream` (stderr by default).
+
+    With `LOG_QUEUE` the configured handlers move behind a queue, drained by a background listener thread that
+    writes the records in batches.
+    """
+    _stop_listener()
+
+    logger_config = LogConfig()
+    config = logger_config.dict()
+    if stream is not None:
+        config["handlers"]["default"]["stream"] = stream
+    app_logger = logging.getLogger(logger_config.LOGGER_NAME)
+    # dictConfig replaces the logger handlers, but only adds to its filters
+    app_logger.filters.clear()
+    dictConfig(config)
+
+    if settings.LOG_QUEUE:
+        global _listener
+        log_queue = queue.SimpleQueue()
+        queue_handler = _LocalQueueHandler(log_queue)
+        # stamped on the request thread, the listener one does not see the request context
+        queue_handler.addFilter(RequestIdFilter())
+        _listener = _BatchingQueueListener(
+            log_queue, *app_logger.handlers, respect_handler_level=True
+        )
+        app_logger.handlers = [queue_handler]
+        _listener.start()
+
+    return app_logger
+
+
+def register_request_id(blueprint) -> None:
+    """Binds an id to every request handled by the blueprint (or app), reusing the client one if valid."""
+    from flask import g, request
+
+    @blueprint.before_request
+    def bind_request_id():
+        """Binds the request id to the context, so every record logged while handling it carries it."""
+        request_id = request.headers.get(REQUEST_ID_HEADER, "")
+        if not _REQUEST_ID_PATTERN.fullmatch(request_id):
+            request_id = uuid.uuid4().hex
+        g.request_id_token = request_id_var.set(request_id)
+
+    @blueprint.after_request
+    def add_request_id_header(response):
+        """Returns the request id to the client."""
+        request_id = request_id_var.get()
+        if request_id is not None:
+            response.headers[REQUEST_ID_HEADER] = request_id
+        return response
+
+    @blueprint.teardown_request
+    def unbind_request_id(error=None):
+        """Unbinds the request id from the context."""
+        token = g.pop("request_id_token", None)
+        if token is not None:
+            request_id_var.reset(token)
+
+
+atexit.register(_stop_listener)
+logger = logging.getLogger(settings.PROJECT_NAME)
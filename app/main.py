@@ -1,21 +1,17 @@
-"""Main module for the Flask app."""
+"""
+Flask application factory.
+
+Importing this module has no side effects: `create_app` configures logging, creates the tables and builds the app,
+importing the routes and the optional extensions only then. Run it with `flask --app app.main run` for development
+and `python -m app.server` in production.
+"""
 from flask import Flask, request, jsonify
 from werkzeug.exceptions import HTTPException
 
-from app.api.v1.routes.user import user_routes
-
-from app.core.database.database import Database
-from app.logger import logger
+from app.logger import configure_logging, logger
 from app.settings import settings
 
-Database.initialize_db()
-
-logger.info("Application starting...")
-app = Flask(__name__)
-app.register_blueprint(user_routes, url_prefix=settings.API_V1_PREFIX)
 
-
-@app.errorhandler(Exception)
 def handle_exception(error):
     """Global error handler for the application. Intercept all exceptions and log them."""
     # If it's an HTTPException, let Flask handle it normally.
@@ -23,10 +19,47 @@ def handle_exception(error):
         return error
 
     logger.error(
-        f"m=handle_exception, Unhandled exception at path {request.path}: {error}"
+        "m=handle_exception, Unhandled exception at path %s: %s", request.path, error
     )
     response = jsonify(
         {"detail": "Internal server error =/ Please contact the support team."}
     )
     response.status_code = 500
     return response
+
+
+def create_app(initialize_db: bool = True) -> Flask:
+    """Builds the app, creating the tables first unless `initialize_db` is False (e.g. they are known to exist)."""
+    from app.api.health import health_routes
+    from app.api.v1.routes.user import user_routes
+    from app.core.database.database import Database
+
+    configure_logging()
+    if settings.CHANGE_FEED_ENABLED and Database.backend_name() != "sqlite":
+        # see UserRepository.fetch_changes
+        raise RuntimeError(
+            "The user change feed needs SQLite, set CHANGE_FEED_ENABLED=false to run on another database"
+        )
+    if initialize_db:
+        Database.initialize_db()
+    if settings.EMAIL_INDEX_ENABLED:
+        from app.core.cache.bloom import get_email_index
+
+        # built before serving (and, under the prefork server, before forking the workers)
+        get_email_index().rebuild()
+
+    logger.info("Application starting...")
+    app = Flask(__name__)
+    app.register_blueprint(user_routes, url_prefix=settings.API_V1_PREFIX)
+    app.register_blueprint(health_routes)
+    app.register_error_handler(Exception, handle_exception)
+    if settings.COMPRESSION_ENABLED:
+        from app.api.compression import init_compression
+
+        init_compression(app)
+    if settings.METRICS_ENABLED:
+        from app.core.metrics.metrics import init_metrics
+
+        init_metrics(app)
+
+    return app
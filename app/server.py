@@ -0,0 +1,409 @@
+"""
+Production server: a master process preforking WSGI workers on a shared listening socket.
+
+    python -m app.server --bind 0.0.0.0:8000 --workers 4
+
+The master loads the settings, the app and the schema once and then forks the workers, which share its socket and
+build their own database engines. Each worker connects to the database before accepting requests and logs how long
+it took to be ready and to serve its first request.
+
+Signals on the master: SIGHUP gracefully reloads the workers (a new generation starts, then the old one finishes its
+in-flight requests and exits), SIGTERM or SIGINT gracefully stops the server. Workers that die are replaced, and
+workers whose master died stop the same way, releasing the socket for the next server.
+"""
+import argparse
+import os
+import select
+import signal
+import socket
+import sys
+import threading
+import time
+from typing import Callable, Dict, Tuple
+
+from flask import Flask
+from werkzeug.serving import ThreadedWSGIServer, WSGIRequestHandler
+
+from app.api import health
+from app.core.cache.cache import NullCache, set_user_cache, user_cache_enabled
+from app.core.database.database import Database
+from app.logger import configure_logging, logger
+from app.settings import settings
+
+# exit code of a worker failing before it could serve, the master stops instead of respawning it in a loop
+WORKER_BOOT_ERROR = 3
+# signals handled by the master, blocked while forking so a worker never runs the master's handlers
+MASTER_SIGNALS = (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGCHLD)
+
+
+class _RequestHandler(WSGIRequestHandler):
+    """Request handler keeping connections alive, but not idle forever, and leaving access logs to the metrics."""
+
+    protocol_version = "HTTP/1.1"
+    # idle keep-alive connections are dropped after it, so a draining worker is not held by them
+    timeout = 5
+
+    def log_request(self, code="-", size="-") -> None:
+        """Does not log every request."""
+
+
+class _WorkerServer(ThreadedWSGIServer):
+    """
+    Threaded server running at most `threads` requests at once, leaving the others queued on the socket.
+
+    `on_poll` is called on every poll interval of the accept loop.
+    """
+
+    def __init__(self, threads: int, on_poll: Callable[[], None], *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._slots = threading.BoundedSemaphore(threads)
+        self._on_poll = on_poll
+        # request threads are joined on close, so stopping lets them finish
+        self.daemon_threads = False
+
+    def service_actions(self) -> None:
+        """Runs the poll callback."""
+        super().service_actions()
+        self._on_poll()
+
+    def process_request(self, request, client_address) -> None:
+        """Hands the request to a thread once one of the slots is free."""
+        self._slots.acquire()
+        try:
+            super().process_request(request, client_address)
+        except BaseException:
+            # the slot is given back on any error
+            self._slots.release()
+            raise
+
+    def process_request_thread(self, request, client_address) -> None:
+        """Serves the request, then gives back its slot."""
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self._slots.release()
+
+
+def parse_bind(bind: str) -> Tuple[str, int]:
+    """Parses a `host:port` address."""
+    host, _, port = bind.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Invalid bind address, expected host:port: {bind}")
+    return host, int(port)
+
+
+def _elapsed_ms(since: float) -> float:
+    """Returns the ms elapsed since a `time.perf_counter` reading."""
+    return round((time.perf_counter() - since) * 1000, 2)
+
+
+class Worker:
+    """
+    A forked worker process, serving the app with up to `threads` request threads on the inherited socket.
+
+    It stops once its master (`master_pid`) is gone, so it does not keep the socket after the server died.
+    """
+
+    def __init__(
+        self, app: Flask, listener: socket.socket, threads: int, master_pid: int
+    ):
+        self.app = app
+        self.listener = listener
+        self.threads = threads
+        self.master_pid = master_pid
+        self.stopping = False
+        self.forked_at = time.perf_counter()
+        self.server: _WorkerServer | None = None
+        self._first_request = threading.Lock()
+
+    def run(self) -> None:
+        """Boots the worker and serves until it is told to stop, then waits for the in-flight requests."""
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, self._on_stop)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+        # the inherited engines (and log listener thread) belong to the master, build this worker's own
+        Database.dispose(close=False)
+        if settings.LOG_QUEUE:
+            configure_logging()
+
+        host, port = self.listener.getsockname()[:2]
+        self.server = _WorkerServer(
+            self.threads,
+            self._check_master,
+            host,
+            port,
+            self._wsgi_app,
+            _RequestHandler,
+            fd=self.listener.fileno(),
+        )
+
+        if not health.is_database_available():
+            raise RuntimeError("Database is not available")
+        health.startup_stats["startup_ms"] = _elapsed_ms(self.forked_at)
+        logger.info(
+            "m=Worker.run, Worker %s ready in %s ms",
+            os.getpid(),
+            health.startup_stats["startup_ms"],
+        )
+
+        try:
+            self.server.serve_forever(poll_interval=0.5)
+        finally:
+            self.server.server_close()
+            Database.dispose()
+            logger.info("m=Worker.run, Worker %s stopped", os.getpid())
+
+    def _wsgi_app(self, environ, start_response):
+        """Serves a request with the app, timing the first one."""
+        response = self.app(environ, start_response)
+        if "first_request_ms" not in health.startup_stats:
+            with self._first_request:
+                if "first_request_ms" not in health.startup_stats:
+                    health.startup_stats["first_request_ms"] = _elapsed_ms(
+                        self.forked_at
+                    )
+                    logger.info(
+                        "m=Worker._wsgi_app, Worker %s served its first request %s ms after fork",
+                        os.getpid(),
+                        health.startup_stats["first_request_ms"],
+                    )
+        return response
+
+    def _on_stop(self, signum, frame) -> None:
+        """Stops taking requests: readiness turns to 503 and the accept loop ends."""
+        self.stop()
+
+    def _check_master(self) -> None:
+        """Stops the worker if its master died (and it was reparented)."""
+        if os.getppid() != self.master_pid and not self.stopping:
+            logger.error(
+                "m=Worker._check_master, Master %s is gone, stopping worker %s",
+                self.master_pid,
+                os.getpid(),
+            )
+            self.stop()
+
+    def stop(self) -> None:
+        """Stops taking requests: readiness turns to 503 and the accept loop ends, letting in-flight requests finish."""
+        self.stopping = True
+        health.set_draining()
+        if self.server is not None:
+            # shutdown waits for the accept loop, which may run on this very thread
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+        else:
+            raise SystemExit(0)
+
+
+class Master:
+    """Forks and supervises the workers, replacing dead ones and handling reloads and graceful stops."""
+
+    def __init__(
+        self,
+        app: Flask,
+        bind: Tuple[str, int],
+        workers: int,
+        threads: int,
+        graceful_timeout: float,
+    ):
+        self.app = app
+        self.bind = bind
+        self.worker_count = workers
+        self.threads = threads
+        self.graceful_timeout = graceful_timeout
+        self.listener: socket.socket | None = None
+        # serving workers by pid, with when they were forked
+        self.workers: Dict[int, float] = {}
+        # stopping workers by pid, with when they get killed if still running
+        self.draining: Dict[int, float] = {}
+        self.stopping = False
+        self.exit_code = 0
+        self._signals = []
+        self._wakeup_read = self._wakeup_write = None
+
+    def run(self) -> int:
+        """Serves until stopped, returning the exit code."""
+        self.listener = socket.create_server(self.bind, backlog=2048)
+        self._wakeup_read, self._wakeup_write = os.pipe()
+        for signum in MASTER_SIGNALS:
+            signal.signal(signum, self._on_signal)
+
+        logger.info(
+            "m=Master.run, Serving on %s:%s with %s workers (master %s)",
+            *self.listener.getsockname()[:2],
+            self.worker_count,
+            os.getpid(),
+        )
+        self._spawn_workers()
+        while self.workers or self.draining:
+            self._wait()
+            self._handle_signals()
+            self._reap_workers()
+            self._kill_overdue_workers()
+            if not self.stopping:
+                self._spawn_workers()
+
+        self.listener.close()
+        logger.info("m=Master.run, Server stopped")
+        return self.exit_code
+
+    def reload(self) -> None:
+        """Replaces every worker: the new generation starts first, then the old one drains."""
+        logger.info("m=Master.reload, Reloading workers")
+        old_workers, self.workers = self.workers, {}
+        self._spawn_workers()
+        self._stop_workers(old_workers)
+
+    def stop(self) -> None:
+        """Drains every worker and stops."""
+        logger.info("m=Master.stop, Stopping workers")
+        self.stopping = True
+        old_workers, self.workers = self.workers, {}
+        self._stop_workers(old_workers)
+
+    def _spawn_workers(self) -> None:
+        """Forks workers until there are `worker_count` of them serving."""
+        master_pid = os.getpid()
+        while len(self.workers) < self.worker_count:
+            # the signals arriving meanwhile are handled by the master once unblocked, never by the worker
+            signal.pthread_sigmask(signal.SIG_BLOCK, MASTER_SIGNALS)
+            pid = os.fork()
+            if pid:
+                signal.pthread_sigmask(signal.SIG_UNBLOCK, MASTER_SIGNALS)
+                self.workers[pid] = time.monotonic()
+                continue
+
+            # on the worker, which never returns from here
+            exit_code = 0
+            try:
+                for signum in MASTER_SIGNALS:
+                    signal.signal(signum, signal.SIG_DFL)
+                signal.pthread_sigmask(signal.SIG_UNBLOCK, MASTER_SIGNALS)
+                os.close(self._wakeup_read)
+                os.close(self._wakeup_write)
+                worker = Worker(self.app, self.listener, self.threads, master_pid)
+                worker.run()
+            except SystemExit:
+                pass
+            except BaseException as error:
+                # a worker must never return into the master loop
+                booted = "startup_ms" in health.startup_stats
+                logger.error(
+                    "m=Master._spawn_workers, Worker %s failed: %s", os.getpid(), error
+                )
+                exit_code = 1 if booted else WORKER_BOOT_ERROR
+            finally:
+                os._exit(exit_code)
+
+    def _stop_workers(self, workers: Dict[int, float]) -> None:
+        """Asks the workers to finish their in-flight requests and exit, killing them after the graceful timeout."""
+        deadline = time.monotonic() + self.graceful_timeout
+        for pid in workers:
+            self._kill(pid, signal.SIGTERM)
+            self.draining[pid] = deadline
+
+    def _reap_workers(self) -> None:
+        """Collects the exited workers, stopping the server if one could not boot."""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if not pid:
+                return
+
+            exit_code = os.waitstatus_to_exitcode(status)
+            self.draining.pop(pid, None)
+            if self.workers.pop(pid, None) is None:
+                continue
+
+            logger.error(
+                "m=Master._reap_workers, Worker %s exited with %s", pid, exit_code
+            )
+            if exit_code == WORKER_BOOT_ERROR and not self.stopping:
+                self.exit_code = WORKER_BOOT_ERROR
+                self.stop()
+
+    def _kill_overdue_workers(self) -> None:
+        """Kills the draining workers past their graceful timeout."""
+        now = time.monotonic()
+        for pid, deadline in list(self.draining.items()):
+            if deadline <= now:
+                logger.error(
+                    "m=Master._kill_overdue_workers, Killing worker %s, still running after %ss",
+                    pid,
+                    self.graceful_timeout,
+                )
+                self._kill(pid, signal.SIGKILL)
+                self.draining[pid] = now + self.graceful_timeout
+
+    def _on_signal(self, signum, frame) -> None:
+        """Queues the signal for the master loop, waking it up."""
+        self._signals.append(signum)
+        os.write(self._wakeup_write, b"\0")
+
+    def _wait(self) -> None:
+        """Sleeps until a signal arrives, or a second passes."""
+        if self._signals:
+            return
+        readable, _, _ = select.select([self._wakeup_read], [], [], 1.0)
+        if readable:
+            os.read(self._wakeup_read, 1024)
+
+    def _handle_signals(self) -> None:
+        """Handles the queued signals."""
+        while self._signals:
+            signum = self._signals.pop(0)
+            if signum == signal.SIGHUP and not self.stopping:
+                self.reload()
+            elif signum in (signal.SIGTERM, signal.SIGINT) and not self.stopping:
+                self.stop()
+
+    @staticmethod
+    def _kill(pid: int, signum: int) -> None:
+        """Signals a worker, if still running."""
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+
+def main(argv=None) -> int:
+    """Loads the app and its schema in the master process, then serves it with the prefork workers."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--bind", default=settings.SERVER_BIND, help="host:port")
+    parser.add_argument(
+        "--workers", type=int, default=settings.SERVER_WORKERS or os.cpu_count() or 1
+    )
+    parser.add_argument("--threads", type=int, default=settings.SERVER_THREADS)
+    parser.add_argument(
+        "--graceful-timeout", type=float, default=settings.SERVER_GRACEFUL_TIMEOUT
+    )
+    args = parser.parse_args(argv)
+
+    started_at = time.perf_counter()
+    from app.main import create_app
+
+    if not user_cache_enabled(args.workers):
+        # each worker would drop the written users only from its own cache
+        set_user_cache(NullCache())
+    elif args.workers > 1:
+        logger.warning(
+            "m=main, User cache enabled on %s workers, reads may be stale for up to %ss",
+            args.workers,
+            settings.USER_CACHE_TTL,
+        )
+    app = create_app()
+
+    # the schema is created by now, workers build their own connections
+    Database.dispose()
+    logger.info("m=main, App loaded in %s ms", _elapsed_ms(started_at))
+
+    master = Master(
+        app, parse_bind(args.bind), args.workers, args.threads, args.graceful_timeout
+    )
+    return master.run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
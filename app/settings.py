@@ -1,3 +1,5 @@
+from typing import Dict, List, Tuple
+
 from pydantic import BaseSettings
 
 
@@ -6,11 +8,91 @@ class Settings(BaseSettings):
 
     PROJECT_NAME: str = "user-api"
     LOG_LEVEL = "INFO"
+    # write records from a background thread, as JSON lines, and keep only this share of the info ones
+    LOG_QUEUE: bool = False
+    LOG_JSON: bool = False
+    LOG_INFO_SAMPLE_RATE: float = 1.0
 
     API_PREFIX: str = "/api"
     API_V1_PREFIX: str = f"{API_PREFIX}/v1"
 
     DB_PATH: str = "user_api_db.db"
+    # full SQLAlchemy URL of the primary database, defaults to SQLite on DB_PATH
+    DB_URL: str = ""
+    # read replicas (a JSON list on the environment), used for single user reads
+    DB_REPLICA_URLS: List[str] = []
+    # how a replica is picked: "round_robin" or "least_connections"
+    DB_REPLICA_SELECTION: str = "round_robin"
+    # after a write, the same client reads from the primary for this many seconds (through a cookie), 0 to never
+    DB_REPLICA_READ_PRIMARY_SECONDS: int = 5
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_RECYCLE: int = 3600
+    DB_POOL_PRE_PING: bool = True
+
+    # SQLite profile applied on every connection, see app/core/database/sqlite.py
+    DB_SQLITE_TUNING: bool = True
+    DB_JOURNAL_MODE: str = "WAL"
+    DB_SYNCHRONOUS: str = "NORMAL"
+    DB_BUSY_TIMEOUT_MS: int = 5000
+    DB_MMAP_SIZE: int = 268435456
+    # negative values are in KiB, so 64 MiB
+    DB_CACHE_SIZE: int = -65536
+    DB_TEMP_STORE: str = "MEMORY"
+    # serializes writes through a single connection per process, while reads use the pool
+    DB_SINGLE_WRITER: bool = False
+    DB_WRITER_TIMEOUT: float = 30.0
+
+    PAGE_DEFAULT_LIMIT: int = 100
+    PAGE_MAX_LIMIT: int = 1000
+    EXPORT_BATCH_SIZE: int = 1000
+    BULK_MAX_ITEMS: int = 1000
+    # a search page sorts the matches past its cursor when at most this many, else walks this many users in id order
+    SEARCH_SORT_MAX_ROWS: int = 1000
+    SEARCH_SCAN_MAX_ROWS: int = 10000
+    # GET /users/changes, which needs SQLite: the app does not start on another database unless it is disabled
+    CHANGE_FEED_ENABLED: bool = True
+    # days of daily (and weekly) counters returned by GET /users/stats by default, and at most
+    STATS_DEFAULT_DAYS: int = 30
+    STATS_MAX_DAYS: int = 366
+    STATS_DEFAULT_DOMAINS: int = 10
+
+    # per process: unset, it is only on when a single process serves, as a write only drops it on its own process
+    USER_CACHE_ENABLED: bool | None = None
+    USER_CACHE_MAX_SIZE: int = 10000
+    USER_CACHE_TTL: float = 60.0
+
+    # bloom filter of the user emails, skipping the duplicate email query of bulk writes of new emails
+    EMAIL_INDEX_ENABLED: bool = False
+    EMAIL_INDEX_CAPACITY: int = 1000000
+    EMAIL_INDEX_ERROR_RATE: float = 0.01
+    # seconds between rebuilds from the users table, dropping the bits of deleted emails, 0 to never rebuild
+    EMAIL_INDEX_REBUILD_INTERVAL: float = 3600.0
+
+    # compresses responses negotiated through Accept-Encoding, from this body size on
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+
+    # token bucket per client and route, `RATE_LIMIT_ROUTE_LIMITS` maps endpoints (e.g. "user_routes.export_users")
+    # to their own [rate per second, burst], and clients are told apart by RATE_LIMIT_CLIENT_HEADER or their address
+    RATE_LIMIT_ENABLED: bool = False
+    RATE_LIMIT_PER_SECOND: float = 20.0
+    RATE_LIMIT_BURST: int = 40
+    RATE_LIMIT_ROUTE_LIMITS: Dict[str, Tuple[float, int]] = {}
+    RATE_LIMIT_CLIENT_HEADER: str = ""
+    RATE_LIMIT_MAX_CLIENTS: int = 100000
+    # in-flight expensive requests (list, export, bulk) per process, 0 for no cap
+    ADMISSION_MAX_EXPENSIVE: int = 0
+    ADMISSION_RETRY_AFTER: float = 1.0
+
+    # prefork server (python -m app.server), 0 workers means one per CPU
+    SERVER_BIND: str = "127.0.0.1:8000"
+    SERVER_WORKERS: int = 0
+    SERVER_THREADS: int = 8
+    SERVER_GRACEFUL_TIMEOUT: float = 30.0
+
+    METRICS_ENABLED: bool = False
+    SLOW_QUERY_MS: float = 100.0
 
 
 settings = Settings()
@@ -0,0 +1 @@
+"""Load and latency benchmarks for the user API."""
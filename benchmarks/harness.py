@@ -0,0 +1,337 @@
+"""Benchmark harness: seeds users, drives every user route with concurrent clients and collects latency stats."""
+import http.client
+import itertools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Deque, List, Tuple
+
+from flask import Flask
+from werkzeug.serving import make_server
+
+from app.core.cache.cache import get_user_cache
+from app.core.database.database import Database
+from app.core.repositories.user_repository import UserRepository
+from app.settings import settings
+
+# (method, path, json body)
+Request = Tuple[str, str, dict | None]
+# sends a request and returns (status, body)
+Sender = Callable[[Request], Tuple[int, bytes]]
+
+SEED_BATCH_SIZE = 10_000
+BULK_BATCH_SIZE = 100
+
+
+@dataclass
+class Scenario:
+    """A benchmarked route: builds the i-th request and optionally collects something from each response."""
+
+    name: str
+    build: Callable[[int], Request]
+    collect: Callable[[int, bytes], None] | None = None
+    max_requests: int | None = None
+
+
+@dataclass
+class ScenarioResult:
+    """Latencies and errors collected while running a scenario."""
+
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    elapsed: float = 0.0
+
+    def to_dict(self) -> dict:
+        """Summarizes the run as percentiles (in milliseconds), throughput and the process peak RSS."""
+        latencies = sorted(self.latencies)
+        return {
+            "requests": len(latencies),
+            "errors": self.errors,
+            "rps": round(len(latencies) / self.elapsed, 2) if self.elapsed else 0.0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+            "peak_rss_kb": peak_rss_kb(),
+        }
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Returns the nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+
+    rank = max(int(round(pct / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def peak_rss_kb() -> int:
+    """Returns the peak resident set size of the process, in KB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports KB
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def seed_users(total: int) -> None:
+    """
+    Recreates the database and creates `total` users in batches through the repository.
+
+    Like any other write, the batches record the users on the change log and the stats counters, so the change feed
+    and stats scenarios run against the seeded users.
+    """
+    Database.reinitializate_db()
+    get_user_cache().clear()
+    user_repository = UserRepository()
+    for start in range(0, total, SEED_BATCH_SIZE):
+        user_repository.create_users(
+            [
+                {"name": "Seed User", "email": f"seed-{i}@example.com"}
+                for i in range(start, min(start + SEED_BATCH_SIZE, total))
+            ]
+        )
+
+
+def create_app() -> Flask:
+    """
+    Builds the app under benchmark with the real factory, so every layer of the deployed request path is measured.
+
+    The tables are not created, as `seed_users` (to run first) already did.
+    """
+    from app.main import create_app as create_main_app
+
+    return create_main_app(initialize_db=False)
+
+
+def build_scenarios(total_users: int) -> List[Scenario]:
+    """Returns one scenario per user route, ordered so writes only touch rows created by earlier scenarios."""
+    prefix = settings.API_V1_PREFIX
+    run_id = f"{os.getpid()}-{time.time_ns()}"
+    created_ids: Deque[int] = deque()
+    bulk_created_ids: Deque[List[int]] = deque()
+
+    def seeded_id(i: int) -> int:
+        return i % total_users + 1
+
+    def collect_created(i: int, body: bytes) -> None:
+        created_ids.append(json.loads(body)["id"])
+
+    def collect_bulk_created(i: int, body: bytes) -> None:
+        results = json.loads(body)["results"]
+        bulk_created_ids.append([result["user"]["id"] for result in results])
+
+    def take_bulk_ids() -> List[int]:
+        return bulk_created_ids.popleft() if bulk_created_ids else [0]
+
+    bulk_patch_ids: Deque[List[int]] = deque()
+    # the change feed is walked page after page, starting over once it is caught up
+    change_cursors: Deque[str] = deque()
+
+    def changes_page(i: int) -> Request:
+        since = f"&since={change_cursors.popleft()}" if change_cursors else ""
+        return "GET", f"{prefix}/users/changes?limit=100{since}", None
+
+    def collect_change_cursor(i: int, body: bytes) -> None:
+        page = json.loads(body)
+        if page["has_more"]:
+            change_cursors.append(page["next_cursor"])
+
+    def bulk_patch(i: int) -> Request:
+        ids = take_bulk_ids()
+        bulk_patch_ids.append(ids)
+        return (
+            "PATCH",
+            f"{prefix}/users/bulk",
+            {
+                "users": [
+                    {
+                        "id": user_id,
+                        "name": "Bulk Patched",
+                        "email": f"bp-{run_id}-{user_id}@example.com",
+                    }
+                    for user_id in ids
+                ]
+            },
+        )
+
+    return [
+        Scenario("list_users", lambda i: ("GET", f"{prefix}/users", None)),
+        Scenario("get_user", lambda i: ("GET", f"{prefix}/users/{seeded_id(i)}", None)),
+        # every seeded user matches the name prefix, while an email prefix matches a user and the ones of longer ids
+        Scenario(
+            "search_users_dense",
+            lambda i: ("GET", f"{prefix}/users/search?name_prefix=seed", None),
+        ),
+        Scenario(
+            "search_users_selective",
+            lambda i: (
+                "GET",
+                f"{prefix}/users/search?email_prefix=seed-{seeded_id(i)}",
+                None,
+            ),
+        ),
+        Scenario("list_user_changes", changes_page, collect=collect_change_cursor),
+        Scenario(
+            "get_user_stats",
+            lambda i: ("GET", f"{prefix}/users/stats?days=30&domains=10", None),
+        ),
+        Scenario(
+            "export_users",
+            lambda i: ("GET", f"{prefix}/users/export", None),
+            max_requests=3,
+        ),
+        Scenario(
+            "create_user",
+            lambda i: (
+                "POST",
+                f"{prefix}/users",
+                {"name": "Bench User", "email": f"c-{run_id}-{i}@example.com"},
+            ),
+            collect=collect_created,
+        ),
+        Scenario(
+            "update_user",
+            lambda i: (
+                "PUT",
+                f"{prefix}/users/{seeded_id(i)}",
+                {"name": "Bench Updated", "email": f"u-{run_id}-{i}@example.com"},
+            ),
+        ),
+        Scenario(
+            "delete_user",
+            lambda i: (
+                "DELETE",
+                f"{prefix}/users/{created_ids.popleft() if created_ids else 0}",
+                None,
+            ),
+        ),
+        Scenario(
+            "bulk_create_users",
+            lambda i: (
+                "POST",
+                f"{prefix}/users/bulk",
+                {
+                    "users": [
+                        {
+                            "name": "Bulk User",
+                            "email": f"b-{run_id}-{i}-{j}@example.com",
+                        }
+                        for j in range(BULK_BATCH_SIZE)
+                    ]
+                },
+            ),
+            collect=collect_bulk_created,
+        ),
+        Scenario("bulk_update_users", bulk_patch),
+        Scenario(
+            "bulk_delete_users",
+            lambda i: (
+                "DELETE",
+                f"{prefix}/users/bulk",
+                {"ids": bulk_patch_ids.popleft() if bulk_patch_ids else [0]},
+            ),
+        ),
+    ]
+
+
+def run_scenario(
+    send: Sender, scenario: Scenario, total_requests: int, concurrency: int
+) -> ScenarioResult:
+    """Sends `total_requests` requests of the scenario from `concurrency` concurrent clients."""
+    total_requests = min(total_requests, scenario.max_requests or total_requests)
+    counter = itertools.count()
+    result = ScenarioResult()
+    lock = threading.Lock()
+    # requests are built under the lock, since builders share queues between scenarios
+    build_lock = threading.Lock()
+
+    def worker():
+        while True:
+            i = next(counter)
+            if i >= total_requests:
+                return
+
+            with build_lock:
+                request = scenario.build(i)
+
+            started = time.perf_counter()
+            try:
+                status, body = send(request)
+            except Exception:
+                # any client failure counts as an error
+                status, body = 599, b""
+            latency = time.perf_counter() - started
+
+            with lock:
+                result.latencies.append(latency)
+                if status >= 500:
+                    result.errors += 1
+
+            if scenario.collect and status < 300:
+                with build_lock:
+                    scenario.collect(i, body)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(worker)
+    result.elapsed = time.perf_counter() - started
+
+    return result
+
+
+def test_client_sender(app: Flask) -> Sender:
+    """Returns a sender driving the app in-process through Flask test clients (one per thread)."""
+    local = threading.local()
+
+    def send(request: Request) -> Tuple[int, bytes]:
+        if not hasattr(local, "client"):
+            local.client = app.test_client()
+
+        method, path, body = request
+        response = local.client.open(path, method=method, json=body)
+        return response.status_code, response.get_data()
+
+    return send
+
+
+class WSGIServer:
+    """Serves the app with a real threaded WSGI server on a background thread."""
+
+    def __init__(self, app: Flask):
+        self.server = make_server("127.0.0.1", 0, app, threaded=True)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self) -> "WSGIServer":
+        """Starts serving."""
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        """Stops serving."""
+        self.server.shutdown()
+        self.thread.join()
+
+    def sender(self) -> Sender:
+        """Returns a sender driving the server over HTTP."""
+        port = self.server.server_port
+
+        def send(request: Request) -> Tuple[int, bytes]:
+            method, path, body = request
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=300)
+            try:
+                payload = json.dumps(body) if body is not None else None
+                headers = (
+                    {"Content-Type": "application/json"} if body is not None else {}
+                )
+                connection.request(method, path, body=payload, headers=headers)
+                response = connection.getresponse()
+                return response.status, response.read()
+            finally:
+                connection.close()
+
+        return send
@@ -0,0 +1,143 @@
+"""
+Measures the per-request logging overhead of each logging mode, driving GET /users/<id> in-process.
+
+    python -m benchmarks.logging_overhead --requests 2000
+    python -m benchmarks.logging_overhead --requests 2000 --sink-latency-us 200
+
+`--sink-latency-us` makes every write to the log block for a while, as writes to a congested pipe or socket do.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from app.settings import settings
+
+# settings of each mode, "off" is the baseline the others are compared against
+MODES = {
+    "off": {"LOG_QUEUE": False, "LOG_JSON": False, "LOG_INFO_SAMPLE_RATE": 1.0},
+    "sync_text": {"LOG_QUEUE": False, "LOG_JSON": False, "LOG_INFO_SAMPLE_RATE": 1.0},
+    "queue_json": {"LOG_QUEUE": True, "LOG_JSON": True, "LOG_INFO_SAMPLE_RATE": 1.0},
+    "queue_json_sampled": {
+        "LOG_QUEUE": True,
+        "LOG_JSON": True,
+        "LOG_INFO_SAMPLE_RATE": 0.1,
+    },
+}
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parses the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000, help="users seeded")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per mode")
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="rounds over every mode, the best is kept"
+    )
+    parser.add_argument(
+        "--sink-latency-us",
+        type=float,
+        default=0.0,
+        help="time each write to the log blocks, in microseconds",
+    )
+    return parser.parse_args(argv)
+
+
+class SlowStream:
+    """Wraps a stream, blocking on every write as a congested sink does."""
+
+    def __init__(self, stream, latency: float):
+        self.stream = stream
+        self.latency = latency
+
+    def write(self, data: str) -> int:
+        """Blocks for the sink latency, then writes."""
+        if self.latency:
+            time.sleep(self.latency)
+        return self.stream.write(data)
+
+    def flush(self) -> None:
+        """Flushes the wrapped stream."""
+        self.stream.flush()
+
+
+def run_mode(
+    client, paths, mode: str, mode_settings: dict, tmp_dir: str, latency: float
+) -> float:
+    """Sends the requests with the logging mode configured, returning the elapsed seconds."""
+    from app.core.cache.cache import get_user_cache
+    from app.logger import configure_logging
+
+    for key, value in mode_settings.items():
+        setattr(settings, key, value)
+    get_user_cache().clear()
+    # line buffered, so each record costs a write, as on stderr
+    with open(os.path.join(tmp_dir, f"{mode}.log"), "w", buffering=1) as log:
+        app_logger = configure_logging(stream=SlowStream(log, latency))
+        if mode == "off":
+            app_logger.setLevel(logging.WARNING)
+
+        started = time.perf_counter()
+        for path in paths:
+            client.get(path)
+        elapsed = time.perf_counter() - started
+        # writes out what is still queued before the file closes
+        configure_logging(stream=sys.stderr).setLevel(logging.WARNING)
+
+    return elapsed
+
+
+def run(args: argparse.Namespace) -> dict:
+    """Runs the requests under every logging mode, each writing to a line buffered file, in rounds to even out noise."""
+    from app.logger import configure_logging
+    from benchmarks.harness import create_app, seed_users
+
+    report = {"meta": vars(args).copy(), "results": {}}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        settings.DB_PATH = os.path.join(tmp_dir, "benchmark.db")
+        seed_users(args.users)
+        client = create_app().test_client()
+        paths = [
+            f"{settings.API_V1_PREFIX}/users/{i % args.users + 1}"
+            for i in range(args.requests)
+        ]
+
+        timings = {mode: [] for mode in MODES}
+        for _ in range(args.repeat):
+            for mode, mode_settings in MODES.items():
+                timings[mode].append(
+                    run_mode(
+                        client,
+                        paths,
+                        mode,
+                        mode_settings,
+                        tmp_dir,
+                        args.sink_latency_us / 1e6,
+                    )
+                )
+
+        for mode, mode_timings in timings.items():
+            report["results"][mode] = {
+                "us_per_request": min(mode_timings) / args.requests * 1e6
+            }
+
+    baseline = report["results"]["off"]["us_per_request"]
+    for result in report["results"].values():
+        result["overhead_us"] = round(result["us_per_request"] - baseline, 2)
+        result["us_per_request"] = round(result["us_per_request"], 2)
+
+    configure_logging()
+    return report
+
+
+def main(argv=None) -> int:
+    """Runs every mode and prints the JSON report."""
+    print(json.dumps(run(parse_args(argv)), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+"""
+Runs the user API benchmarks and optionally compares them against a stored baseline.
+
+    python -m benchmarks.run --users 1000 --requests 500 --concurrency 8 --output bench.json
+    python -m benchmarks.run --users 1000 --baseline bench.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+
+from app.settings import settings
+
+TARGETS = ("test-client", "wsgi")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parses the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--users",
+        type=int,
+        default=1000,
+        help="users seeded before running (e.g. 1000, 100000, 1000000)",
+    )
+    parser.add_argument("--requests", type=int, default=500, help="requests per route")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent clients")
+    parser.add_argument(
+        "--target", choices=(*TARGETS, "all"), default="all", help="what to drive"
+    )
+    parser.add_argument(
+        "--scenario", action="append", help="only run these routes (repeatable)"
+    )
+    parser.add_argument(
+        "--output", help="write the JSON report to this file (default: stdout)"
+    )
+    parser.add_argument(
+        "--baseline", help="JSON report to compare against; exits with 1 on regression"
+    )
+    parser.add_argument(
+        "--log-level",
+        default="WARNING",
+        help="app and server log level while benchmarking (default: WARNING)",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.10,
+        help="allowed relative regression (default: 0.10)",
+    )
+    return parser.parse_args(argv)
+
+
+def run(args: argparse.Namespace) -> dict:
+    """Seeds a temporary SQLite database and runs every scenario on every target."""
+    # imported here so settings.DB_PATH points to the temporary database before any engine is built
+    from app.core.database.database import Database
+    from benchmarks.harness import (
+        WSGIServer,
+        build_scenarios,
+        create_app,
+        run_scenario,
+        seed_users,
+        test_client_sender,
+    )
+
+    report = {
+        "meta": {
+            "users": args.users,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "results": {},
+    }
+    targets = TARGETS if args.target == "all" else (args.target,)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        settings.DB_PATH = os.path.join(tmp_dir, "benchmark.db")
+        try:
+            for target in targets:
+                seed_users(args.users)
+                app = create_app()
+                # set after the app configured logging, as per-request logging would otherwise dominate both the
+                # timings and the output
+                for logger_name in (settings.PROJECT_NAME, "werkzeug"):
+                    logging.getLogger(logger_name).setLevel(args.log_level)
+                results = report["results"][target] = {}
+                scenarios = [
+                    scenario
+                    for scenario in build_scenarios(args.users)
+                    if not args.scenario or scenario.name in args.scenario
+                ]
+                if target == "wsgi":
+                    with WSGIServer(app) as server:
+                        for scenario in scenarios:
+                            result = run_scenario(
+                                server.sender(),
+                                scenario,
+                                args.requests,
+                                args.concurrency,
+                            )
+                            results[scenario.name] = result.to_dict()
+                else:
+                    send = test_client_sender(app)
+                    for scenario in scenarios:
+                        result = run_scenario(
+                            send, scenario, args.requests, args.concurrency
+                        )
+                        results[scenario.name] = result.to_dict()
+        finally:
+            Database.dispose()
+
+    return report
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Compares a report with a baseline, route by route.
+
+    Returns one row per route present on both, flagging as regression a p95 latency above, or a throughput below,
+    the baseline by more than `tolerance`.
+    """
+    rows = []
+    for target, results in report["results"].items():
+        for name, result in results.items():
+            base = baseline.get("results", {}).get(target, {}).get(name)
+            if not base:
+                continue
+
+            p95_change = (
+                (result["p95_ms"] - base["p95_ms"]) / base["p95_ms"]
+                if base["p95_ms"]
+                else 0.0
+            )
+            rps_change = (
+                (result["rps"] - base["rps"]) / base["rps"] if base["rps"] else 0.0
+            )
+            rows.append(
+                {
+                    "target": target,
+                    "scenario": name,
+                    "p95_change": round(p95_change, 4),
+                    "rps_change": round(rps_change, 4),
+                    "regression": p95_change > tolerance or rps_change < -tolerance,
+                }
+            )
+    return rows
+
+
+def main(argv=None) -> int:
+    """Runs the benchmarks, writes the report and compares it with the baseline, if given."""
+    args = parse_args(argv)
+    report = run(args)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            report["comparison"] = compare(
+                report, json.load(baseline_file), args.tolerance
+            )
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(output + "\n")
+    else:
+        print(output)
+
+    regressions = [row for row in report.get("comparison", []) if row["regression"]]
+    for row in regressions:
+        print(
+            f"REGRESSION {row['target']}/{row['scenario']}: "
+            f"p95 {row['p95_change']:+.1%}, rps {row['rps_change']:+.1%}",
+            file=sys.stderr,
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+Compares user reads and writes throughput under the SQLite profiles, from several processes and threads at once.
+
+    python -m benchmarks.sqlite_profile --processes 4 --threads 4 --operations 500 --write-ratio 0.2
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from typing import List, Tuple
+
+from app.settings import settings
+
+PROFILES = {
+    "default": {"DB_SQLITE_TUNING": False, "DB_SINGLE_WRITER": False},
+    "tuned": {"DB_SQLITE_TUNING": True, "DB_SINGLE_WRITER": False},
+    "tuned_single_writer": {"DB_SQLITE_TUNING": True, "DB_SINGLE_WRITER": True},
+}
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parses the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000, help="users seeded")
+    parser.add_argument("--processes", type=int, default=4, help="worker processes")
+    parser.add_argument("--threads", type=int, default=4, help="threads per process")
+    parser.add_argument(
+        "--operations", type=int, default=500, help="operations per process"
+    )
+    parser.add_argument(
+        "--write-ratio", type=float, default=0.2, help="share of the operations writing"
+    )
+    parser.add_argument(
+        "--profile", choices=PROFILES, action="append", help="only these (repeatable)"
+    )
+    return parser.parse_args(argv)
+
+
+def run_worker(args: Tuple[int, int, int, float, int]) -> Tuple[List[float], int]:
+    """Runs a worker process share of the operations on its threads, returning its latencies and errors."""
+    from sqlalchemy.exc import OperationalError
+
+    from app.core.cache.cache import NullCache
+    from app.core.database.database import Database
+    from app.core.services.user_service import UserService
+
+    worker, operations, threads, write_ratio, total_users = args
+    # drop the pool inherited from the parent, this process builds its own
+    Database.dispose(close=False)
+    service = UserService(user_cache=NullCache())
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def run_thread(thread: int) -> None:
+        rng = random.Random(worker * 1000 + thread)
+        for i in range(operations // threads):
+            user_id = rng.randint(1, total_users)
+            started = time.perf_counter()
+            try:
+                if rng.random() < write_ratio:
+                    service.update_user(
+                        user_id,
+                        "Bench Updated",
+                        f"u-{worker}-{thread}-{i}@example.com",
+                    )
+                else:
+                    service.get_user(user_id)
+            except OperationalError:
+                # "database is locked"
+                with lock:
+                    errors[0] += 1
+                continue
+            latency = time.perf_counter() - started
+            with lock:
+                latencies.append(latency)
+
+    workers = [
+        threading.Thread(target=run_thread, args=(thread,)) for thread in range(threads)
+    ]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    Database.dispose()
+    return latencies, errors[0]
+
+
+def run_profile(name: str, args: argparse.Namespace, db_path: str) -> dict:
+    """Seeds a fresh database with the profile settings and runs every worker process against it."""
+    from app.core.database.database import Database
+    from benchmarks.harness import ScenarioResult, seed_users
+
+    for key, value in PROFILES[name].items():
+        setattr(settings, key, value)
+    settings.DB_PATH = db_path
+    seed_users(args.users)
+    Database.dispose()
+
+    context = multiprocessing.get_context("fork")
+    started = time.perf_counter()
+    with context.Pool(args.processes) as pool:
+        outcomes = pool.map(
+            run_worker,
+            [
+                (worker, args.operations, args.threads, args.write_ratio, args.users)
+                for worker in range(args.processes)
+            ],
+        )
+    result = ScenarioResult(elapsed=time.perf_counter() - started)
+    for latencies, errors in outcomes:
+        result.latencies.extend(latencies)
+        result.errors += errors
+
+    return result.to_dict()
+
+
+def run(args: argparse.Namespace) -> dict:
+    """Runs every selected profile on its own temporary database."""
+    report = {"meta": vars(args).copy(), "results": {}}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name in args.profile or PROFILES:
+            db_path = os.path.join(tmp_dir, f"{name}.db")
+            report["results"][name] = run_profile(name, args, db_path)
+    return report
+
+
+def main(argv=None) -> int:
+    """Runs the profiles and prints the JSON report."""
+    print(json.dumps(run(parse_args(argv)), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+Startup benchmark: import time of the app entry points, checked against a budget, and app creation time.
+
+    python -m benchmarks.startup --repeat 5
+
+Each module is imported on a fresh interpreter with `-X importtime`, keeping the best of `--repeat` runs. The command
+exits with 1 when an import goes over its budget or pulls in a module it should not (e.g. Flask for the services).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List
+
+# best import time allowed per module, in ms: the measured best times (about 480 and 265 ms) plus a 25% margin
+IMPORT_BUDGETS_MS = {
+    "app.core.services.user_service": 600,
+    "app.main": 330,
+}
+# runs of each import, keeping the best, so a busy machine does not go over the budget
+IMPORT_RUNS = 5
+# modules a cold import must not load, as they are only needed later (or by other entry points)
+FORBIDDEN_IMPORTS = {
+    "app.core.services.user_service": ("flask", "werkzeug"),
+    "app.main": ("sqlalchemy", "brotli", "zstandard", "msgpack"),
+}
+
+_CREATE_APP_SCRIPT = """
+import json, time
+started = time.perf_counter()
+from app.main import create_app
+imported = time.perf_counter()
+app = create_app()
+created = time.perf_counter()
+app.test_client().get("/health/ready")
+served = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "first_request_ms": (served - created) * 1000,
+}))
+"""
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parses the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--repeat", type=int, default=IMPORT_RUNS, help="runs, the best is kept"
+    )
+    return parser.parse_args(argv)
+
+
+def _run_python(args: List[str], env: Dict[str, str] | None = None):
+    """Runs a fresh interpreter with the project on its path."""
+    env = {**os.environ, **(env or {}), "PYTHONPATH": os.getcwd()}
+    return subprocess.run(
+        [sys.executable, *args], env=env, capture_output=True, text=True, check=True
+    )
+
+
+def import_profile(module: str) -> dict:
+    """Imports the module on a fresh interpreter, returning its import time and every module it loaded."""
+    stderr = _run_python(["-X", "importtime", "-c", f"import {module}"]).stderr
+    cumulative_us, modules = 0, set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # the header line
+        modules.add(name.strip())
+        if name.strip() == module:
+            cumulative_us = int(cumulative)
+
+    return {"import_ms": round(cumulative_us / 1000, 2), "modules": modules}
+
+
+def create_app_timings() -> dict:
+    """Times importing the factory, creating the app and serving a first request, on a fresh database."""
+    with tempfile.TemporaryDirectory() as directory:
+        output = _run_python(
+            ["-c", _CREATE_APP_SCRIPT],
+            {"DB_PATH": os.path.join(directory, "startup.db")},
+        ).stdout
+    return {name: round(value, 2) for name, value in json.loads(output).items()}
+
+
+def check_imports(module: str, profile: dict) -> List[str]:
+    """Returns the budget and forbidden import violations of a module profile."""
+    violations = []
+    budget = IMPORT_BUDGETS_MS.get(module)
+    if budget is not None and profile["import_ms"] > budget:
+        violations.append(f"{module} imports in {profile['import_ms']}ms > {budget}ms")
+    for forbidden in FORBIDDEN_IMPORTS.get(module, ()):
+        if forbidden in profile["modules"]:
+            violations.append(f"{module} imports {forbidden}")
+    return violations
+
+
+def main(argv=None) -> int:
+    """Profiles every budgeted import and the app creation, printing the report and failing on violations."""
+    args = parse_args(argv)
+    report, violations = {"imports": {}}, []
+    for module in IMPORT_BUDGETS_MS:
+        profiles = [import_profile(module) for _ in range(args.repeat)]
+        best = min(profiles, key=lambda profile: profile["import_ms"])
+        violations.extend(check_imports(module, best))
+        report["imports"][module] = {
+            "import_ms": best["import_ms"],
+            "budget_ms": IMPORT_BUDGETS_MS[module],
+            "modules": len(best["modules"]),
+        }
+
+    report["create_app"] = min(
+        (create_app_timings() for _ in range(args.repeat)),
+        key=lambda timings: sum(timings.values()),
+    )
+    report["violations"] = violations
+    print(json.dumps(report, indent=2))
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,41 @@
+import pytest
+from flask import Flask
+
+from app.api import health
+from app.api.health import health_routes
+from app.core.database.database import Database
+from app.settings import settings
+
+
+@pytest.fixture
+def client():
+    settings.DB_PATH = "test.db"
+    Database.reinitializate_db()
+    app = Flask(__name__)
+    app.register_blueprint(health_routes)
+    yield app.test_client()
+    health._draining.clear()
+
+
+def test_live(client):
+    assert client.get("/health/live").status_code == 200
+
+
+def test_ready_until_draining(client):
+    assert client.get("/health/ready").json["status"] == "ready"
+
+    health.set_draining()
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json["status"] == "draining"
+
+
+def test_not_ready_without_database(client):
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(settings, "DB_URL", "sqlite:////nonexistent/dir/db.db")
+        Database.dispose()
+        response = client.get("/health/ready")
+    Database.dispose()
+
+    assert response.status_code == 503
+    assert response.json["status"] == "unavailable"
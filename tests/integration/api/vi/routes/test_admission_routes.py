@@ -0,0 +1,134 @@
+import pytest
+from flask import Flask
+from sqlalchemy.exc import OperationalError
+
+from app.api.v1.routes.user import user_routes
+from app.core.admission.admission import (
+    EXPENSIVE_KEY,
+    InMemoryAdmissionBackend,
+    get_admission_backend,
+    set_admission_backend,
+)
+from app.core.cache.cache import get_user_cache
+from app.core.database.database import Database
+from app.core.database.unit_of_work import UnitOfWork
+from app.settings import settings
+
+
+@pytest.fixture
+def client():
+    """A Flask app on a fresh database, with a fresh admission backend, restoring the settings afterwards."""
+    settings.DB_PATH = "test.db"
+    Database.reinitializate_db()
+    get_user_cache().clear()
+    set_admission_backend(InMemoryAdmissionBackend())
+    app = Flask(__name__)
+    app.register_blueprint(user_routes, url_prefix=settings.API_V1_PREFIX)
+
+    defaults = settings.copy()
+    yield app.test_client()
+    for name in (
+        "RATE_LIMIT_ENABLED",
+        "RATE_LIMIT_BURST",
+        "RATE_LIMIT_PER_SECOND",
+        "RATE_LIMIT_ROUTE_LIMITS",
+        "RATE_LIMIT_CLIENT_HEADER",
+        "ADMISSION_MAX_EXPENSIVE",
+    ):
+        setattr(settings, name, getattr(defaults, name))
+    set_admission_backend(None)
+
+
+def get(client, path, **headers):
+    return client.get(f"{settings.API_V1_PREFIX}{path}", headers=headers)
+
+
+def test_admits_everything_by_default(client):
+    for _ in range(50):
+        assert get(client, "/users").status_code == 200
+
+
+def test_rate_limited_client_gets_429_with_retry_after(client):
+    settings.RATE_LIMIT_ENABLED = True
+    settings.RATE_LIMIT_PER_SECOND = 0.5
+    settings.RATE_LIMIT_BURST = 2
+
+    assert get(client, "/users").status_code == 200
+    assert get(client, "/users").status_code == 200
+    response = get(client, "/users")
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "2"
+    # the bucket is per route
+    assert get(client, "/users/1").status_code == 404
+
+
+def test_rate_limit_is_per_client(client):
+    settings.RATE_LIMIT_ENABLED = True
+    settings.RATE_LIMIT_PER_SECOND = 0.1
+    settings.RATE_LIMIT_BURST = 1
+    settings.RATE_LIMIT_CLIENT_HEADER = "X-Client-ID"
+
+    assert get(client, "/users", **{"X-Client-ID": "a"}).status_code == 200
+    assert get(client, "/users", **{"X-Client-ID": "a"}).status_code == 429
+    assert get(client, "/users", **{"X-Client-ID": "b"}).status_code == 200
+
+
+def test_route_limit_overrides_default(client):
+    settings.RATE_LIMIT_ENABLED = True
+    settings.RATE_LIMIT_ROUTE_LIMITS = {"user_routes.export_users": (0.1, 1)}
+
+    assert get(client, "/users/export").status_code == 200
+    assert get(client, "/users/export").status_code == 429
+    assert get(client, "/users").status_code == 200
+
+
+def test_expensive_request_gets_503_when_slots_are_taken(client):
+    settings.ADMISSION_MAX_EXPENSIVE = 1
+    get_admission_backend().acquire_slot(EXPENSIVE_KEY, 1)
+
+    response = get(client, "/users")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    # cheap routes are still served
+    assert get(client, "/users/1").status_code == 404
+
+
+def test_slot_is_held_until_the_stream_is_consumed(client):
+    settings.ADMISSION_MAX_EXPENSIVE = 1
+
+    response = get(client, "/users/export")
+    assert get_admission_backend().stats()["in_flight"] == {EXPENSIVE_KEY: 1}
+    assert get(client, "/users").status_code == 503
+
+    response.get_data()
+    response.close()
+    assert get_admission_backend().stats()["in_flight"] == {}
+    assert get(client, "/users").status_code == 200
+
+
+@pytest.mark.parametrize(
+    "error",
+    [OperationalError("COMMIT", {}, Exception("disk I/O error")), RuntimeError()],
+)
+def test_slot_is_released_when_the_commit_fails(client, monkeypatch, error):
+    settings.ADMISSION_MAX_EXPENSIVE = 2
+
+    def failing_commit(self):
+        raise error
+
+    monkeypatch.setattr(UnitOfWork, "commit", failing_commit)
+    for _ in range(2):
+        response = client.post(
+            f"{settings.API_V1_PREFIX}/users/bulk",
+            json={"users": [{"name": "Bulk User", "email": "bulk@example.com"}]},
+        )
+        assert response.status_code == 500
+        if isinstance(error, OperationalError):
+            # a database error is answered as JSON, like any other
+            assert "detail" in response.get_json()
+    assert get_admission_backend().stats()["in_flight"] == {}
+
+    monkeypatch.undo()
+    assert get(client, "/users").status_code == 200
+    assert get(client, "/users").get_json()["users"] == []
@@ -0,0 +1,187 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("quart")
+pytest.importorskip("aiosqlite")
+
+from quart import Quart  # noqa: E402
+
+from app.api.v1.routes.async_user import async_user_routes  # noqa: E402
+from app.core.cache.cache import get_user_cache  # noqa: E402
+from app.core.database.async_database import AsyncDatabase  # noqa: E402
+from app.core.database.database import Database  # noqa: E402
+from app.core.services.user_service import UserService  # noqa: E402
+from app.settings import settings  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    """Create and configure a Quart app for testing."""
+    settings.DB_PATH = "test.db"
+    Database.reinitializate_db()
+    get_user_cache().clear()
+    app = Quart(__name__)
+    app.register_blueprint(async_user_routes, url_prefix=settings.API_V1_PREFIX)
+    return app
+
+
+def run(app, scenario):
+    """Runs the async scenario against a test client, disposing the async engine on its loop."""
+
+    async def main():
+        try:
+            await scenario(app.test_client())
+        finally:
+            await AsyncDatabase.dispose()
+
+    asyncio.run(main())
+
+
+def test_async_create_get_update_delete_user(app):
+    async def scenario(client):
+        post_response = await client.post(
+            f"{settings.API_V1_PREFIX}/users",
+            json={"name": "Test User", "email": "test.user@example.com"},
+        )
+        assert post_response.status_code == 201
+        created_user = await post_response.get_json()
+        user_id = created_user["id"]
+
+        duplicated = await client.post(
+            f"{settings.API_V1_PREFIX}/users",
+            json={"name": "Other User", "email": "test.user@example.com"},
+        )
+        assert duplicated.status_code == 409
+
+        get_response = await client.get(f"{settings.API_V1_PREFIX}/users/{user_id}")
+        assert get_response.status_code == 200
+        assert (await get_response.get_json())["name"] == "Test User"
+
+        not_modified = await client.get(
+            f"{settings.API_V1_PREFIX}/users/{user_id}",
+            headers={"If-None-Match": get_response.headers["ETag"]},
+        )
+        assert not_modified.status_code == 304
+
+        put_response = await client.put(
+            f"{settings.API_V1_PREFIX}/users/{user_id}",
+            json={"name": "Updated User", "email": "updated.user@example.com"},
+            headers={"If-Match": get_response.headers["ETag"]},
+        )
+        assert put_response.status_code == 200
+        assert (await put_response.get_json())["name"] == "Updated User"
+
+        list_response = await client.get(f"{settings.API_V1_PREFIX}/users?limit=1")
+        page = await list_response.get_json()
+        assert [user["id"] for user in page["users"]] == [user_id]
+        assert page["next_cursor"] is None
+
+        delete_response = await client.delete(
+            f"{settings.API_V1_PREFIX}/users/{user_id}"
+        )
+        assert delete_response.status_code == 200
+
+        missing = await client.get(f"{settings.API_V1_PREFIX}/users/{user_id}")
+        assert missing.status_code == 404
+
+    run(app, scenario)
+    # the async writes kept the user counters too, ending with none
+    assert UserService().get_stats(days=1, domains=10)["total"] == 0
+    assert UserService().reconcile_stats()["drifted"] == 0
+
+
+def test_async_update_invalid_email(app):
+    async def scenario(client):
+        post_response = await client.post(
+            f"{settings.API_V1_PREFIX}/users",
+            json={"name": "Test User", "email": "test.user@example.com"},
+        )
+        user_id = (await post_response.get_json())["id"]
+
+        put_response = await client.put(
+            f"{settings.API_V1_PREFIX}/users/{user_id}",
+            json={"name": "Test User", "email": "invalid-email"},
+        )
+        assert put_response.status_code == 400
+
+    run(app, scenario)
+
+
+def test_async_update_user_email_taken(app):
+    async def scenario(client):
+        for name, email in (
+            ("First User", "first@example.com"),
+            ("Second User", "second@example.com"),
+        ):
+            post_response = await client.post(
+                f"{settings.API_V1_PREFIX}/users", json={"name": name, "email": email}
+            )
+        user_id = (await post_response.get_json())["id"]
+
+        put_response = await client.put(
+            f"{settings.API_V1_PREFIX}/users/{user_id}",
+            json={"name": "Second User", "email": "first@example.com"},
+        )
+        assert put_response.status_code == 409
+        assert (await put_response.get_json())["error"] == "Email already in use"
+
+        missing = await client.put(
+            f"{settings.API_V1_PREFIX}/users/99999",
+            json={"name": "Second User", "email": "other@example.com"},
+        )
+        assert missing.status_code == 404
+
+    run(app, scenario)
+
+
+def test_async_update_delete_user_if_match(app):
+    async def scenario(client):
+        post_response = await client.post(
+            f"{settings.API_V1_PREFIX}/users",
+            json={"name": "Test User", "email": "test.user@example.com"},
+        )
+        user_id = (await post_response.get_json())["id"]
+        etag = post_response.headers["ETag"]
+
+        first_put = await client.put(
+            f"{settings.API_V1_PREFIX}/users/{user_id}",
+            json={"name": "Updated User", "email": "updated@example.com"},
+            headers={"If-Match": etag},
+        )
+        assert first_put.status_code == 200
+
+        stale_put = await client.put(
+            f"{settings.API_V1_PREFIX}/users/{user_id}",
+            json={"name": "Other User", "email": "other@example.com"},
+            headers={"If-Match": etag},
+        )
+        assert stale_put.status_code == 412
+
+        stale_delete = await client.delete(
+            f"{settings.API_V1_PREFIX}/users/{user_id}", headers={"If-Match": etag}
+        )
+        assert stale_delete.status_code == 412
+
+        delete_response = await client.delete(
+            f"{settings.API_V1_PREFIX}/users/{user_id}",
+            headers={"If-Match": first_put.headers["ETag"]},
+        )
+        assert delete_response.status_code == 200
+
+        missing = await client.delete(f"{settings.API_V1_PREFIX}/users/{user_id}")
+        assert missing.status_code == 404
+
+    run(app, scenario)
+
+
+def test_async_ids_out_of_the_database_range(app):
+    async def scenario(client):
+        for method in ("get", "put", "delete"):
+            response = await getattr(client, method)(
+                f"{settings.API_V1_PREFIX}/users/{2**70}",
+                json={"name": "Ana", "email": "a@a.com"},
+            )
+            assert response.status_code == 404
+
+    run(app, scenario)
@@ -0,0 +1,130 @@
+import gzip
+import json
+import zlib
+
+import pytest
+from flask import Flask
+
+from app.api.compression import init_compression
+from app.api.v1.routes.user import user_routes
+from app.core.cache.cache import get_user_cache
+from app.core.database.database import Database
+from app.settings import Settings, settings
+
+
+@pytest.fixture
+def client():
+    """A Flask app compressing its responses, with enough users for a large list."""
+    settings.DB_PATH = "test.db"
+    Database.reinitializate_db()
+    get_user_cache().clear()
+    app = Flask(__name__)
+    app.register_blueprint(user_routes, url_prefix=settings.API_V1_PREFIX)
+    init_compression(app)
+    client = app.test_client()
+    client.post(
+        f"{settings.API_V1_PREFIX}/users/bulk",
+        json={
+            "users": [
+                {"name": "Bulk User", "email": f"user-{i}@example.com"}
+                for i in range(50)
+            ]
+        },
+    )
+    return client
+
+
+def get(client, path, **headers):
+    return client.get(f"{settings.API_V1_PREFIX}{path}", headers=headers)
+
+
+@pytest.mark.parametrize(
+    "encoding, decompress",
+    [
+        ("gzip", gzip.decompress),
+        ("deflate", zlib.decompress),
+        ("br", lambda data: pytest.importorskip("brotli").decompress(data)),
+        (
+            "zstd",
+            lambda data: pytest.importorskip("zstandard")
+            .ZstdDecompressor()
+            .decompressobj()
+            .decompress(data),
+        ),
+    ],
+)
+def test_list_users_is_compressed(client, encoding, decompress):
+    identity = get(client, "/users")
+    assert "Content-Encoding" not in identity.headers
+    assert "Accept-Encoding" in identity.headers["Vary"]
+
+    response = get(client, "/users", **{"Accept-Encoding": encoding})
+    assert response.headers["Content-Encoding"] == encoding
+    assert int(response.headers["Content-Length"]) < len(identity.data)
+    assert decompress(response.data) == identity.data
+
+
+def test_encoding_negotiation(client):
+    response = get(client, "/users", **{"Accept-Encoding": "gzip;q=0.5, deflate"})
+    assert response.headers["Content-Encoding"] == "deflate"
+
+    response = get(client, "/users", **{"Accept-Encoding": "compress"})
+    assert "Content-Encoding" not in response.headers
+
+
+def test_small_responses_are_not_compressed(client):
+    response = get(client, "/users/1", **{"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert response.get_json()["id"] == 1
+
+
+def test_streamed_export_is_compressed(client):
+    identity = get(client, "/users/export")
+    response = get(client, "/users/export", **{"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    assert gzip.decompress(response.data) == identity.data
+
+
+def test_msgpack_output(client):
+    msgpack = pytest.importorskip("msgpack")
+    as_json = get(client, "/users?limit=5")
+    response = get(client, "/users?limit=5", Accept="application/msgpack")
+    assert response.mimetype == "application/msgpack"
+    assert "Accept" in response.headers["Vary"]
+    assert msgpack.unpackb(response.data) == json.loads(as_json.data)
+
+    response = get(client, "/users?limit=5", Accept="application/json")
+    assert response.get_json() == json.loads(as_json.data)
+
+
+def test_compressed_etag_stays_strong_for_conditional_requests(client):
+    settings.COMPRESSION_MIN_SIZE = 0
+    try:
+        response = get(client, "/users/1", **{"Accept-Encoding": "gzip"})
+        assert response.headers["Content-Encoding"] == "gzip"
+        etag, weak = response.get_etag()
+        assert not weak and etag.endswith("-gzip")
+
+        not_modified = get(
+            client,
+            "/users/1",
+            **{"Accept-Encoding": "gzip", "If-None-Match": f'"{etag}"'},
+        )
+        assert not_modified.status_code == 304
+
+        put_response = client.put(
+            f"{settings.API_V1_PREFIX}/users/1",
+            json={"name": "Updated User", "email": "updated@example.com"},
+            headers={"Accept-Encoding": "gzip", "If-Match": f'"{etag}"'},
+        )
+        assert put_response.status_code == 200
+
+        stale_put = client.put(
+            f"{settings.API_V1_PREFIX}/users/1",
+            json={"name": "Other User", "email": "other@example.com"},
+            headers={"If-Match": f'"{etag}"'},
+        )
+        assert stale_put.status_code == 412
+    finally:
+        settings.COMPRESSION_MIN_SIZE = Settings().COMPRESSION_MIN_SIZE
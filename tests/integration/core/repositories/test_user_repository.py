@@ -0,0 +1,228 @@
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import insert, text, update
+
+from app.core.database.database import Database
+from app.core.database.unit_of_work import UnitOfWork
+from app.core.models.base_model import BaseModel
+from app.core.models.user_model import UserModel
+from app.core.models.user_stat_model import UserStatModel
+from app.core.repositories.user_repository import UserRepository
+from app.core.schemas.user_schema import UserSearchSchema
+from app.core.write_errors import UserWriteError
+from app.settings import settings
+
+
+@pytest.fixture(autouse=True)
+def database(tmp_path):
+    settings.DB_PATH = str(tmp_path / "integration.db")
+    Database.reinitializate_db()
+    yield
+    Database.dispose()
+
+
+def query_plan(query) -> str:
+    compiled = query.compile(Database.engine(), compile_kwargs={"literal_binds": True})
+    with Database.engine().connect() as connection:
+        rows = connection.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))
+        return "\n".join(row[-1] for row in rows)
+
+
+@pytest.mark.parametrize(
+    "filters, index",
+    [
+        ({"email_prefix": "ana"}, "ix_users_email"),
+        ({"name_prefix": "Ana"}, "ix_users_name_lower"),
+        ({"created_from": "2024-01-01T00:00:00"}, "ix_users_dt_created"),
+        ({"created_to": "2024-01-01T00:00:00"}, "ix_users_dt_created"),
+        ({"updated_from": "2024-01-01T00:00:00"}, "ix_users_dt_updated"),
+        ({"updated_to": "2024-01-01T00:00:00"}, "ix_users_dt_updated"),
+    ],
+)
+@pytest.mark.parametrize("after_id", [None, 100])
+def test_search_filters_use_indexes(filters, index, after_id):
+    query = UserRepository().search_query(UserSearchSchema(**filters), 10, after_id)
+    plan = query_plan(query)
+    assert f"USING INDEX {index}" in plan or f"USING COVERING INDEX {index}" in plan
+    assert "SCAN users" not in plan
+
+
+def test_page_after_cursor_seeks_primary_key():
+    query = UserRepository().search_query(UserSearchSchema(), 10, 100)
+    assert "SEARCH users USING INTEGER PRIMARY KEY (rowid>?)" in query_plan(query)
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {"email_prefix": "ana"},
+        {"name_prefix": "Ana"},
+        {"created_from": "2024-01-01T00:00:00", "updated_to": "2024-01-01T00:00:00"},
+    ],
+)
+def test_search_scan_walks_primary_key_without_sorting(filters):
+    query = UserRepository.search_scan_query(UserSearchSchema(**filters), 10, 1, 1000)
+    plan = query_plan(query)
+    assert "SEARCH users USING INTEGER PRIMARY KEY (rowid>? AND rowid<?)" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+@pytest.mark.parametrize(
+    "filters, index",
+    [
+        ({"email_prefix": "ana"}, "ix_users_email"),
+        ({"name_prefix": "Ana"}, "ix_users_name_lower"),
+        ({"created_to": "2024-01-01T00:00:00"}, "ix_users_dt_created"),
+    ],
+)
+def test_search_count_uses_indexes(filters, index):
+    query = UserRepository.search_count_query(UserSearchSchema(**filters), 11)
+    plan = query_plan(query)
+    assert f"USING INDEX {index}" in plan or f"USING COVERING INDEX {index}" in plan
+    assert "SCAN users" not in plan
+
+
+@pytest.mark.parametrize("sort_max_rows", [0, 100])
+def test_search_pages_are_the_same_whatever_the_plan(monkeypatch, sort_max_rows):
+    monkeypatch.setattr(settings, "SEARCH_SORT_MAX_ROWS", sort_max_rows)
+    monkeypatch.setattr(settings, "SEARCH_SCAN_MAX_ROWS", 3)
+    with Database.engine().begin() as connection:
+        connection.execute(
+            insert(UserModel),
+            [
+                {
+                    "name": "Ana" if i in (1, 2, 3, 8, 9) else "Bia",
+                    "email": f"user{i}@example.com",
+                }
+                for i in range(1, 11)
+            ],
+        )
+
+    filters = UserSearchSchema(name_prefix="an")
+    pages, after_id = [], None
+    while True:
+        users, stopped_at = UserRepository().search_users(filters, 2, after_id)
+        pages.append([user["id"] for user in users])
+        if len(users) == 2:
+            after_id = users[-1]["id"]
+        elif stopped_at is not None:
+            after_id = stopped_at
+        else:
+            break
+
+    if sort_max_rows:
+        assert pages == [[1, 2], [3, 8], [9]]
+    else:
+        # each walk reads 3 users at most, stopping short of a full page when they do not match
+        assert pages == [[1, 2], [3], [8], [9]]
+
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch):
+    """A second SQLite file standing for a read replica, lagging behind with its own copy of a user."""
+    replica_url = f"sqlite:///{tmp_path / 'replica.db'}"
+    monkeypatch.setattr(settings, "DB_REPLICA_URLS", [replica_url])
+    Database.dispose()
+    replica_engine = Database.replica_engines()[0]
+    BaseModel.metadata.create_all(bind=replica_engine)
+    with replica_engine.begin() as connection:
+        connection.execute(
+            insert(UserModel).values(id=1, name="Replica", email="joao@gmail.com")
+        )
+    with Database.engine().begin() as connection:
+        connection.execute(
+            insert(UserModel).values(id=1, name="Primary", email="joao@gmail.com")
+        )
+    return replica_engine
+
+
+def test_reads_go_to_replica_and_writes_to_primary(replica):
+    repository = UserRepository()
+    assert repository.get_user_by_id(1).name == "Replica"
+    assert repository.get_user_by_email("joao@gmail.com").name == "Replica"
+    assert [user.name for user in repository.fetch_all_users()] == ["Replica"]
+
+    repository.update_user(UserModel(id=1, name="Updated", email="joao@gmail.com"))
+    with Database.create_new_session() as db_session:
+        assert db_session.get(UserModel, 1).name == "Updated"
+    # replication lag: the replica still has its own copy
+    assert repository.get_user_by_id(1).name == "Replica"
+
+
+def test_unit_of_work_reads_its_own_writes(replica):
+    repository = UserRepository()
+    with UnitOfWork():
+        assert repository.get_user_by_id(1).name == "Replica"
+        repository.update_user(UserModel(id=1, name="Updated", email="joao@gmail.com"))
+        assert repository.get_user_by_id(1).name == "Updated"
+
+
+def test_stream_emails_and_count_users():
+    repository = UserRepository()
+    repository.create_users(
+        [{"name": "Bulk User", "email": f"user-{i}@example.com"} for i in range(5)]
+    )
+
+    assert repository.count_users() == 5
+    assert sorted(repository.stream_emails(batch_size=2)) == [
+        f"user-{i}@example.com" for i in range(5)
+    ]
+
+
+def test_reconcile_stats_fixes_drifted_counters():
+    repository = UserRepository()
+    repository.create_users(
+        [
+            {
+                "name": "Bulk User",
+                "email": f"user-{i}@example.com",
+                "dt_created": datetime(2026, 1, 1 + i),
+            }
+            for i in range(5)
+        ]
+    )
+    with Database.engine().begin() as connection:
+        connection.execute(update(UserStatModel).values(count=UserStatModel.count + 7))
+
+    stats = repository.fetch_stats(date(2026, 1, 4), domains=10)
+    assert stats["total"] == {"": 12}
+
+    assert repository.reconcile_stats(batch_size=2) == {
+        "counters": 9,
+        "drifted": 9,
+        "total": 5,
+    }
+    assert repository.fetch_stats(date(2026, 1, 4), domains=10) == {
+        "total": {"": 5},
+        "day": {"2026-01-04": 1, "2026-01-05": 1},
+        "week": {"2026-W01": 4, "2026-W02": 1},
+        "domain": {"example.com": 5},
+    }
+
+
+def test_conditional_writes_fail_when_the_user_changed_meanwhile():
+    repository = UserRepository()
+    user = repository.create_user(UserModel(name="Joao Silva", email="joao@gmail.com"))
+
+    def changed_meanwhile(current):
+        # a concurrent write committing after the current user was read
+        with Database.engine().begin() as connection:
+            connection.execute(
+                update(UserModel)
+                .where(UserModel.id == user.id)
+                .values(name="Concurrent")
+            )
+        return True
+
+    updated = repository.update_user(
+        UserModel(id=user.id, name="Mine", email="joao@gmail.com"), changed_meanwhile
+    )
+    assert updated is UserWriteError.PRECONDITION_FAILED
+    assert repository.delete_user(user.id, changed_meanwhile) is (
+        UserWriteError.PRECONDITION_FAILED
+    )
+    assert repository.get_user_by_id(user.id).name == "Concurrent"
+
+    assert repository.delete_user(user.id, lambda current: True) is True
+    assert repository.delete_user(user.id) is UserWriteError.NOT_FOUND
@@ -0,0 +1,173 @@
+import csv
+import json
+import os
+
+import pytest
+
+from app.cli import checkpoint_path, main
+from app.core.cache.cache import get_user_cache
+from app.core.database.database import Database
+from app.core.repositories.user_repository import UserRepository
+from app.core.services.user_service import UserService
+from app.settings import settings
+
+
+@pytest.fixture(autouse=True)
+def database():
+    settings.DB_PATH = "test.db"
+    Database.reinitializate_db()
+    get_user_cache().clear()
+
+
+def run(capsys, *argv):
+    assert main(list(argv)) == 0
+    return json.loads(capsys.readouterr().out)
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, ("name", "email"))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def test_import_csv_validates_and_dedupes(tmp_path, capsys):
+    UserService().create_user("Existing User", "taken@example.com")
+    source = tmp_path / "users.csv"
+    write_csv(
+        source,
+        [
+            {"name": "First User", "email": "first@example.com"},
+            {"name": "X", "email": "invalid"},
+            {"name": "Second User", "email": "first@example.com"},
+            {"name": "Third User", "email": "taken@example.com"},
+            {"name": "Fourth User", "email": "fourth@example.com"},
+        ],
+    )
+    rejects = tmp_path / "rejects.ndjson"
+
+    summary = run(
+        capsys,
+        "users",
+        "import",
+        str(source),
+        "--chunk-size",
+        "2",
+        "--rejects",
+        str(rejects),
+    )
+
+    assert summary["rows"] == 5
+    assert summary["created"] == 2
+    assert summary["rejected"] == 3
+    assert summary["rows_per_second"] > 0
+    rejected = [json.loads(line) for line in rejects.read_text().splitlines()]
+    assert [(reject["row"], reject["status"]) for reject in rejected] == [
+        (2, 400),
+        (3, 409),
+        (4, 409),
+    ]
+    assert rejected[0]["fields"].keys() == {"name", "email"}
+    assert not os.path.exists(checkpoint_path(str(source)))
+    assert len(UserRepository().fetch_all_users()) == 3
+
+
+def test_import_ndjson_rejects_unparsable_lines(tmp_path, capsys):
+    source = tmp_path / "users.ndjson"
+    source.write_text(
+        '{"name": "First User", "email": "first@example.com"}\n'
+        "not json\n"
+        "\n"
+        '{"name": "Second User", "email": "second@example.com"}\n'
+    )
+
+    summary = run(capsys, "users", "import", str(source))
+
+    assert (summary["rows"], summary["created"], summary["rejected"]) == (3, 2, 1)
+
+
+def test_import_resumes_from_checkpoint(tmp_path, capsys, monkeypatch):
+    source = tmp_path / "users.csv"
+    write_csv(
+        source,
+        [{"name": "Bulk User", "email": f"user-{i}@example.com"} for i in range(5)],
+    )
+    create_users = UserService.create_users
+    calls = []
+
+    def failing_on_second_chunk(self, users):
+        calls.append(users)
+        if len(calls) == 2:
+            raise OSError("disk gone")
+        return create_users(self, users)
+
+    monkeypatch.setattr(UserService, "create_users", failing_on_second_chunk)
+    assert main(["users", "import", str(source), "--chunk-size", "2"]) == 1
+    assert os.path.exists(checkpoint_path(str(source)))
+    monkeypatch.setattr(UserService, "create_users", create_users)
+
+    summary = run(capsys, "users", "import", str(source), "--chunk-size", "2")
+
+    assert summary["resumed_from"] == 2
+    assert (summary["rows"], summary["created"], summary["rejected"]) == (5, 5, 0)
+    assert len(UserRepository().fetch_all_users()) == 5
+
+
+def test_import_refuses_to_resume_a_changed_file(tmp_path, capsys):
+    source = tmp_path / "users.csv"
+    write_csv(source, [{"name": "First User", "email": "first@example.com"}])
+    with open(checkpoint_path(str(source)), "w") as checkpoint:
+        json.dump(
+            {"size": 1, "counts": {"rows": 1, "created": 1, "rejected": 0}}, checkpoint
+        )
+
+    assert main(["users", "import", str(source)]) == 1
+    summary = run(capsys, "users", "import", str(source), "--restart")
+    assert summary["created"] == 1
+
+
+@pytest.mark.parametrize("chunk_size", ["0", "-1", "many"])
+def test_import_rejects_invalid_chunk_sizes(tmp_path, capsys, chunk_size):
+    source = tmp_path / "users.csv"
+    write_csv(source, [{"name": "First User", "email": "first@example.com"}])
+
+    with pytest.raises(SystemExit):
+        main(["users", "import", str(source), "--chunk-size", chunk_size])
+    assert "--chunk-size: must be a positive integer" in capsys.readouterr().err
+    assert UserRepository().fetch_all_users() == []
+
+
+@pytest.mark.parametrize("extension", ["ndjson", "csv"])
+def test_export_round_trips(tmp_path, capsys, extension):
+    UserService().create_users(
+        [{"name": "Bulk User", "email": f"user-{i}@example.com"} for i in range(3)]
+    )
+    destination = tmp_path / f"users.{extension}"
+
+    summary = run(capsys, "users", "export", str(destination))
+
+    assert summary["rows"] == 3
+    assert not os.path.exists(f"{destination}.tmp")
+    if extension == "csv":
+        with open(destination, newline="") as file:
+            exported = list(csv.DictReader(file))
+    else:
+        exported = [json.loads(line) for line in destination.read_text().splitlines()]
+    assert [user["email"] for user in exported] == [
+        f"user-{i}@example.com" for i in range(3)
+    ]
+    assert exported[0]["dt_created"]
+
+    Database.reinitializate_db()
+    assert run(capsys, "users", "import", str(destination))["created"] == 3
+
+
+def test_reconcile_stats(capsys):
+    UserService().create_user("First User", "first@example.com")
+    UserService().create_user("Second User", "second@example.org")
+
+    summary = run(capsys, "users", "reconcile-stats")
+
+    assert summary["total"] == 2
+    assert summary["counters"] == 5
+    assert summary["drifted"] == 0
@@ -0,0 +1,138 @@
+import contextlib
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get(port, path):
+    try:
+        with urllib.request.urlopen(
+            f"http://127.0.0.1:{port}{path}", timeout=5
+        ) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as error:
+        return error.code, json.loads(error.read())
+
+
+def wait_ready(port, pids=(), timeout=20):
+    """Waits until a worker not in `pids` answers ready, returning its pid."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            status, body = get(port, "/health/ready")
+            if status == 200 and body["pid"] not in pids:
+                return body
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.1)
+    raise AssertionError("server did not get ready")
+
+
+@pytest.fixture
+def server(tmp_path):
+    port = free_port()
+    env = {**os.environ, "DB_PATH": str(tmp_path / "server.db")}
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "app.server",
+            "--bind",
+            f"127.0.0.1:{port}",
+            "--workers",
+            "2",
+        ],
+        env=env,
+        # its own process group, so the workers are killed along with the master
+        start_new_session=True,
+    )
+    yield process, port
+    with contextlib.suppress(ProcessLookupError):
+        os.killpg(process.pid, signal.SIGKILL)
+    process.wait()
+
+
+def test_serves_with_prefork_workers_and_stops_gracefully(server):
+    process, port = server
+
+    ready = wait_ready(port)
+    assert ready["startup_ms"] > 0
+    assert get(port, "/health/live")[0] == 200
+    assert get(port, "/api/v1/users")[0] == 200
+
+    process.send_signal(signal.SIGTERM)
+    assert process.wait(timeout=20) == 0
+
+
+def test_reload_replaces_workers(server):
+    process, port = server
+    old_pids = set()
+    deadline = time.monotonic() + 20
+    while len(old_pids) < 2 and time.monotonic() < deadline:
+        old_pids.add(wait_ready(port)["pid"])
+
+    process.send_signal(signal.SIGHUP)
+    new_worker = wait_ready(port, old_pids)
+
+    assert new_worker["pid"] != process.pid
+    assert get(port, "/api/v1/users")[0] == 200
+    process.send_signal(signal.SIGTERM)
+    assert process.wait(timeout=20) == 0
+
+
+def test_workers_stop_when_the_master_dies(server):
+    process, port = server
+    wait_ready(port)
+
+    process.kill()
+    process.wait()
+
+    # every worker closed the listening socket
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+        except ConnectionRefusedError:
+            return
+        time.sleep(0.1)
+    raise AssertionError("workers kept serving without their master")
+
+
+def send(port, method, path, body):
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}{path}",
+        data=json.dumps(body).encode(),
+        method=method,
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return json.loads(response.read())
+
+
+def test_workers_do_not_serve_users_older_than_a_write(server):
+    process, port = server
+    wait_ready(port)
+    user = send(port, "POST", "/api/v1/users", {"name": "Ana", "email": "a@a.com"})
+    for _ in range(12):
+        get(port, f"/api/v1/users/{user['id']}")
+
+    send(
+        port, "PUT", f"/api/v1/users/{user['id']}", {"name": "Bia", "email": "b@a.com"}
+    )
+
+    names = {get(port, f"/api/v1/users/{user['id']}")[1]["name"] for _ in range(12)}
+    assert names == {"Bia"}
@@ -0,0 +1,65 @@
+from app.core.database.database import Database
+from app.core.repositories.user_repository import UserRepository
+from app.settings import settings
+from benchmarks.harness import ScenarioResult, create_app, percentile, seed_users
+from benchmarks.run import compare
+
+
+def test_percentile():
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 50) == 0.0
+
+
+def test_scenario_result_summary():
+    result = ScenarioResult(latencies=[0.001, 0.002, 0.003, 0.004], errors=1, elapsed=2)
+    summary = result.to_dict()
+    assert summary["requests"] == 4
+    assert summary["errors"] == 1
+    assert summary["rps"] == 2.0
+    assert summary["p50_ms"] == 2.0
+    assert summary["peak_rss_kb"] > 0
+
+
+def test_compare_flags_regressions():
+    baseline = {
+        "results": {
+            "wsgi": {
+                "get_user": {"p95_ms": 10.0, "rps": 100.0},
+                "list_users": {"p95_ms": 10.0, "rps": 100.0},
+            }
+        }
+    }
+    report = {
+        "results": {
+            "wsgi": {
+                "get_user": {"p95_ms": 10.5, "rps": 98.0},
+                "list_users": {"p95_ms": 20.0, "rps": 50.0},
+                "export_users": {"p95_ms": 1.0, "rps": 1.0},
+            }
+        }
+    }
+
+    rows = {row["scenario"]: row for row in compare(report, baseline, 0.1)}
+    assert set(rows) == {"get_user", "list_users"}
+    assert rows["get_user"]["regression"] is False
+    assert rows["list_users"]["regression"] is True
+
+
+def test_seed_users_records_changes_and_stats(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DB_PATH", str(tmp_path / "bench.db"))
+    Database.dispose()
+    try:
+        seed_users(3)
+        user_repository = UserRepository()
+        assert len(user_repository.fetch_changes(10)) == 3
+        assert user_repository.reconcile_stats(10)["drifted"] == 0
+    finally:
+        Database.dispose()
+
+
+def test_benchmarked_app_is_the_deployed_one():
+    app = create_app()
+    assert {"user_routes", "health_routes"} <= set(app.blueprints)
+    assert Exception in app.error_handler_spec[None][None]
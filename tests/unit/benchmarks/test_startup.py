@@ -0,0 +1,50 @@
+import pytest
+
+from benchmarks.startup import (
+    FORBIDDEN_IMPORTS,
+    IMPORT_BUDGETS_MS,
+    IMPORT_RUNS,
+    _run_python,
+    check_imports,
+    import_profile,
+)
+
+
+@pytest.mark.parametrize("module", IMPORT_BUDGETS_MS)
+def test_import_is_within_budget(module):
+    # the best of a few runs, as in the benchmark
+    profile = min(
+        (import_profile(module) for _ in range(IMPORT_RUNS)),
+        key=lambda profile: profile["import_ms"],
+    )
+    assert check_imports(module, profile) == []
+
+
+@pytest.mark.parametrize("module", FORBIDDEN_IMPORTS)
+def test_import_loads_no_forbidden_module(module):
+    modules = import_profile(module)["modules"]
+
+    assert module in modules
+    assert set(FORBIDDEN_IMPORTS[module]) & modules == set()
+
+
+def test_check_imports_flags_violations():
+    module = "app.core.services.user_service"
+    profile = {"import_ms": IMPORT_BUDGETS_MS[module] + 1, "modules": {"flask"}}
+
+    assert len(check_imports(module, profile)) == 2
+    assert "flask" in FORBIDDEN_IMPORTS[module]
+
+
+def test_importing_the_app_has_no_side_effects(tmp_path):
+    db_path = tmp_path / "never.db"
+    output = _run_python(
+        [
+            "-c",
+            "import logging, app.main; print(len(logging.getLogger('user-api').handlers))",
+        ],
+        {"DB_PATH": str(db_path)},
+    ).stdout
+
+    assert output.strip() == "0"
+    assert not db_path.exists()
@@ -0,0 +1,53 @@
+from unittest.mock import patch
+
+from app.core.admission.admission import InMemoryAdmissionBackend
+
+
+def test_token_bucket_allows_burst_then_limits():
+    backend = InMemoryAdmissionBackend()
+    with patch("app.core.admission.admission.time.monotonic", return_value=100.0):
+        assert [backend.take_token("client", 2, 3) for _ in range(3)] == [0, 0, 0]
+        assert backend.take_token("client", 2, 3) == 0.5
+
+    assert backend.stats()["rejected_rate"] == 1
+
+
+def test_token_bucket_refills_over_time():
+    backend = InMemoryAdmissionBackend()
+    with patch("app.core.admission.admission.time.monotonic") as monotonic:
+        monotonic.return_value = 100.0
+        backend.take_token("client", 2, 1)
+        assert backend.take_token("client", 2, 1) > 0
+
+        monotonic.return_value = 100.5
+        assert backend.take_token("client", 2, 1) == 0
+
+
+def test_token_buckets_are_per_key():
+    backend = InMemoryAdmissionBackend()
+    backend.take_token("a", 1, 1)
+
+    assert backend.take_token("a", 1, 1) > 0
+    assert backend.take_token("b", 1, 1) == 0
+
+
+def test_least_recently_seen_buckets_are_dropped():
+    backend = InMemoryAdmissionBackend(max_keys=2)
+    for key in ("a", "b", "c"):
+        backend.take_token(key, 1, 1)
+
+    assert backend.stats()["buckets"] == 2
+    # the forgotten bucket comes back full
+    assert backend.take_token("a", 1, 1) == 0
+
+
+def test_slots_are_capped_and_released():
+    backend = InMemoryAdmissionBackend()
+
+    assert backend.acquire_slot("expensive", 2)
+    assert backend.acquire_slot("expensive", 2)
+    assert not backend.acquire_slot("expensive", 2)
+
+    backend.release_slot("expensive")
+    assert backend.acquire_slot("expensive", 2)
+    assert backend.stats()["rejected_slots"] == 1
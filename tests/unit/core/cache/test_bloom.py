@@ -0,0 +1,113 @@
+import time
+
+from app.core.cache.bloom import BloomFilter, EmailIndex
+
+
+def test_bloom_filter_has_no_false_negatives_and_few_false_positives():
+    bloom = BloomFilter(capacity=10000, error_rate=0.01)
+    for i in range(10000):
+        bloom.add(f"user-{i}@example.com")
+
+    assert all(f"user-{i}@example.com" in bloom for i in range(10000))
+    false_positives = sum(f"other-{i}@example.com" in bloom for i in range(10000))
+    assert false_positives < 200
+    assert 0.005 < bloom.false_positive_rate() < 0.02
+    # about 9.6 bits per item at 1%
+    assert 11000 < bloom.memory_bytes < 13000
+
+
+def run_now(task):
+    task()
+
+
+def index_of(emails, **kwargs):
+    return EmailIndex(
+        lambda: (len(emails), iter(emails)),
+        1000,
+        0.01,
+        run_in_background=run_now,
+        **kwargs,
+    )
+
+
+def test_email_index_builds_on_first_use_and_normalizes():
+    email_index = index_of(["Taken@Example.com"])
+
+    assert not email_index.all_absent(["new@example.com", " taken@example.COM"])
+    assert email_index.all_absent(["new@example.com"])
+    stats = email_index.stats()
+    assert stats["items"] == 1
+    assert stats["rebuilds"] == 1
+    assert (stats["lookups"], stats["skipped_lookups"]) == (2, 1)
+
+
+def test_email_index_rebuild_drops_removed_emails():
+    emails = ["a@example.com", "b@example.com"]
+    email_index = index_of(emails)
+    email_index.rebuild()
+    email_index.add_many(["c@example.com"])
+    assert not email_index.all_absent(["c@example.com"])
+    emails.remove("a@example.com")
+    email_index.note_removed(1)
+    assert email_index.stats()["stale_items"] == 1
+
+    email_index.rebuild()
+
+    assert email_index.all_absent(["a@example.com"])
+    assert email_index.stats()["stale_items"] == 0
+
+
+def test_email_index_keeps_emails_added_while_rebuilding():
+    email_index = None
+
+    def load_emails():
+        def emails():
+            yield "a@example.com"
+            # a write landing while the table is scanned
+            email_index.add_many(["late@example.com"])
+
+        return 1, emails()
+
+    email_index = EmailIndex(load_emails, 1000, 0.01)
+    email_index.rebuild()
+
+    assert not email_index.all_absent(["late@example.com"])
+
+
+def test_email_index_rebuilds_in_background_once_due():
+    email_index = index_of(["a@example.com"], rebuild_interval=0.01)
+    email_index.all_absent(["a@example.com"])
+    email_index.all_absent(["a@example.com"])
+    assert email_index.rebuilds == 1
+    time.sleep(0.02)
+
+    email_index.all_absent(["a@example.com"])
+    assert email_index.rebuilds == 2
+
+
+def test_email_index_is_built_in_background_without_blocking_lookups():
+    tasks = []
+    email_index = EmailIndex(
+        lambda: (1, iter(["a@example.com"])), 1000, 0.01, run_in_background=tasks.append
+    )
+
+    # not built yet, so every email maybe exists, and a single build is scheduled
+    assert not email_index.all_absent(["b@example.com"])
+    assert not email_index.all_absent(["b@example.com"])
+    assert len(tasks) == 1
+    assert email_index.stats()["items"] == 0
+
+    tasks.pop()()
+    assert email_index.all_absent(["b@example.com"])
+    assert email_index.stats()["items"] == 1
+    assert tasks == []
+
+
+def test_email_index_stats_do_not_build_it():
+    tasks = []
+    email_index = EmailIndex(
+        lambda: (0, iter([])), 1000, 0.01, run_in_background=tasks.append
+    )
+
+    assert email_index.stats()["rebuilds"] == 0
+    assert tasks == []
@@ -0,0 +1,93 @@
+from unittest.mock import patch
+
+import pytest
+
+from app.core.cache.cache import (
+    CacheBackend,
+    LRUCache,
+    TieredCache,
+    user_cache_enabled,
+)
+from app.settings import settings
+
+
+class FakeSharedCache(CacheBackend):
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def set(self, key, value):
+        self.entries[key] = value
+
+    def delete(self, key):
+        self.entries.pop(key, None)
+
+    def clear(self):
+        self.entries.clear()
+
+
+def test_lru_cache_hit_and_miss():
+    cache = LRUCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_size=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_cache_expires_entries():
+    cache = LRUCache(max_size=2, ttl=10)
+    with patch("app.core.cache.cache.time.monotonic", return_value=100):
+        cache.set("a", 1)
+    with patch("app.core.cache.cache.time.monotonic", return_value=111):
+        assert cache.get("a") is None
+
+    assert cache.stats()["expirations"] == 1
+    assert len(cache) == 0
+
+
+def test_lru_cache_does_not_store_none():
+    cache = LRUCache(max_size=2, ttl=60)
+    cache.set("a", None)
+    assert len(cache) == 0
+
+
+def test_tiered_cache_falls_back_to_shared():
+    shared = FakeSharedCache()
+    cache = TieredCache(LRUCache(max_size=2, ttl=60), shared)
+    shared.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.local.get("a") == 1
+    assert cache.stats()["shared_hits"] == 1
+
+    cache.delete("a")
+    assert cache.get("a") is None
+    assert shared.get("a") is None
+
+
+@pytest.mark.parametrize(
+    "enabled, processes, expected",
+    [(None, 1, True), (None, 4, False), (True, 4, True), (False, 1, False)],
+)
+def test_user_cache_is_only_enabled_on_a_single_process_by_default(
+    monkeypatch, enabled, processes, expected
+):
+    monkeypatch.setattr(settings, "USER_CACHE_ENABLED", enabled)
+    assert user_cache_enabled(processes) is expected
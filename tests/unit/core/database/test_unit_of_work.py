@@ -0,0 +1,117 @@
+import pytest
+from flask import Blueprint, Flask, jsonify
+
+from app.core.database.database import Database
+from app.core.database.unit_of_work import UnitOfWork, register_unit_of_work
+from app.core.models.user_model import UserModel
+from app.core.repositories.user_repository import UserRepository
+from app.core.write_errors import UserWriteError
+from app.settings import settings
+
+
+@pytest.fixture(autouse=True)
+def fresh_database(tmp_path):
+    settings.DB_PATH = str(tmp_path / "unit.db")
+    Database.reinitializate_db()
+    yield
+    Database.dispose()
+
+
+def test_repository_calls_share_the_session():
+    repository = UserRepository()
+    with UnitOfWork() as unit_of_work:
+        with repository.db_session as first, repository.db_session as second:
+            assert first is second is unit_of_work.session
+
+
+def test_commits_once_at_the_end():
+    repository = UserRepository()
+    with UnitOfWork():
+        user = repository.create_user(UserModel(name="Ana", email="ana@example.com"))
+        assert user.id is not None
+        with Database.create_new_session() as other_session:
+            assert other_session.query(UserModel).count() == 0
+
+    assert repository.get_user_by_id(user.id).email == "ana@example.com"
+
+
+def test_rolls_back_on_error():
+    repository = UserRepository()
+    with pytest.raises(RuntimeError):
+        with UnitOfWork():
+            repository.create_user(UserModel(name="Ana", email="ana@example.com"))
+            raise RuntimeError()
+
+    assert repository.get_user_by_email("ana@example.com") is None
+
+
+def test_failed_write_keeps_the_earlier_writes():
+    repository = UserRepository()
+    with UnitOfWork():
+        ana = repository.create_user(UserModel(name="Ana", email="ana@example.com"))
+        bia = repository.create_user(UserModel(name="Bia", email="bia@example.com"))
+        assert (
+            repository.create_user(UserModel(name="Ana", email="ana@example.com"))
+            is None
+        )
+        assert (
+            repository.create_users([{"name": "Ana", "email": "ana@example.com"}])
+            is None
+        )
+        assert (
+            repository.update_user(
+                UserModel(id=bia.id, name="Bia", email="ana@example.com")
+            )
+            is UserWriteError.EMAIL_TAKEN
+        )
+        assert (
+            repository.update_users(
+                [{"id": bia.id, "name": "Bia", "email": "ana@example.com"}]
+            )
+            is None
+        )
+        repository.update_user(
+            UserModel(id=ana.id, name="Ana Maria", email="ana@example.com")
+        )
+
+    assert repository.get_user_by_id(ana.id).name == "Ana Maria"
+    assert repository.get_user_by_id(bia.id).email == "bia@example.com"
+    assert repository.count_users() == 2
+    assert [change["user_id"] for change in repository.fetch_changes(10)] == [
+        bia.id,
+        ana.id,
+    ]
+
+
+def test_after_commit_callbacks():
+    calls = []
+    with UnitOfWork() as unit_of_work:
+        unit_of_work.after_commit(lambda: calls.append("committed"))
+        assert calls == []
+    assert calls == ["committed"]
+
+    with pytest.raises(RuntimeError):
+        with UnitOfWork() as unit_of_work:
+            unit_of_work.after_commit(lambda: calls.append("rolled back"))
+            raise RuntimeError()
+    assert calls == ["committed"]
+
+
+def test_flask_request_uses_a_single_session():
+    blueprint = Blueprint("uow_test", __name__)
+    register_unit_of_work(blueprint)
+
+    @blueprint.route("/sessions", methods=["POST"])
+    def sessions():
+        repository = UserRepository()
+        repository.create_user(UserModel(name="Ana", email="ana@example.com"))
+        with repository.db_session as first, repository.db_session as second:
+            return jsonify({"shared": first is second}), 201
+
+    app = Flask(__name__)
+    app.register_blueprint(blueprint)
+
+    response = app.test_client().post("/sessions")
+    assert response.get_json() == {"shared": True}
+    assert UserRepository().get_user_by_email("ana@example.com") is not None
+    assert UnitOfWork.current() is None
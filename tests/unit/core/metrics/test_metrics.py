@@ -0,0 +1,74 @@
+import json
+
+import pytest
+from flask import Flask
+
+from app.api.v1.routes.user import user_routes
+from app.core.database.database import Database
+from app.core.metrics.metrics import Histogram, init_metrics, metrics, timed
+from app.settings import settings
+
+
+@pytest.fixture
+def client(tmp_path):
+    settings.DB_PATH = str(tmp_path / "unit.db")
+    Database.reinitializate_db()
+    metrics.clear()
+    app = Flask(__name__)
+    app.register_blueprint(user_routes, url_prefix=settings.API_V1_PREFIX)
+    init_metrics(app)
+    yield app.test_client()
+    metrics.enabled = False
+    metrics.clear()
+    Database.dispose()
+
+
+def test_histogram_render():
+    histogram = Histogram("test_seconds", "Test.", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5, "/a")
+
+    rendered = histogram.render()
+    assert "# TYPE user_api_test_seconds histogram" in rendered
+    assert 'user_api_test_seconds_bucket{route="/a",le="0.1"} 1' in rendered
+    assert 'user_api_test_seconds_bucket{route="/a",le="1.0"} 2' in rendered
+    assert 'user_api_test_seconds_bucket{route="/a",le="+Inf"} 3' in rendered
+    assert 'user_api_test_seconds_count{route="/a"} 3' in rendered
+
+
+def test_timed_is_a_passthrough_when_disabled():
+    metrics.enabled = False
+    metrics.clear()
+
+    @timed("stage")
+    def double(value):
+        return value * 2
+
+    assert double(2) == 4
+    assert 'stage="stage"' not in metrics.stage_duration.render()
+
+
+def test_server_timing_and_metrics_endpoint(client):
+    response = client.post(
+        f"{settings.API_V1_PREFIX}/users",
+        data=json.dumps({"name": "Test User", "email": "test.user@example.com"}),
+        content_type="application/json",
+    )
+    server_timing = response.headers["Server-Timing"]
+    assert server_timing.startswith("total;dur=")
+    assert "db;dur=" in server_timing
+    assert "UserService.create_user;dur=" in server_timing
+    assert "UserRepository.create_user;dur=" in server_timing
+
+    body = client.get("/metrics").get_data(as_text=True)
+    assert (
+        'user_api_http_request_duration_seconds_count{method="POST",route="/api/v1/users",status="201"} 1'
+        in body
+    )
+    assert (
+        'user_api_stage_duration_seconds_count{stage="UserService.create_user"} 1'
+        in body
+    )
+    assert "user_api_sql_query_duration_seconds_count" in body
+    assert "user_api_user_cache_hits_total" in body
@@ -1,8 +1,13 @@
+from datetime import datetime
 from unittest.mock import Mock
 
 import pytest
 
+from app.core.cache.bloom import EmailIndex
+from app.core.cache.cache import LRUCache
+from app.core.pagination import decode_cursor
 from app.core.services.user_service import UserService
+from app.core.write_errors import UserWriteError
 
 
 class FakeUserModel:
@@ -17,12 +22,19 @@ class FakeUserModel:
 
 @pytest.fixture
 def mock_user_repository():
-    return Mock()
+    repository = Mock()
+    repository.reads_from_replica.return_value = False
+    return repository
 
 
 @pytest.fixture
-def user_service(mock_user_repository):
-    return UserService(user_repository=mock_user_repository)
+def user_cache():
+    return LRUCache(max_size=10, ttl=60)
+
+
+@pytest.fixture
+def user_service(mock_user_repository, user_cache):
+    return UserService(user_repository=mock_user_repository, user_cache=user_cache)
 
 
 def test_list_all_users(user_service, mock_user_repository):
@@ -37,6 +49,56 @@ def test_list_all_users(user_service, mock_user_repository):
     assert result == expected
 
 
+def test_list_page_with_next_page(user_service, mock_user_repository):
+    fake_users = [
+        FakeUserModel(i, f"User {i}", f"u{i}@gmail.com").to_dict() for i in (3, 4, 5)
+    ]
+    mock_user_repository.fetch_users_page.return_value = fake_users
+
+    result = user_service.list_page(2, after_id=2)
+    mock_user_repository.fetch_users_page.assert_called_once_with(3, 2)
+    assert result["users"] == fake_users[:2]
+    assert decode_cursor(result["next_cursor"]) == 4
+
+
+def test_list_page_last_page(user_service, mock_user_repository):
+    fake_users = [FakeUserModel(1, "Joao", "joao@gmail.com").to_dict()]
+    mock_user_repository.fetch_users_page.return_value = fake_users
+
+    result = user_service.list_page(2)
+    assert result["users"] == fake_users
+    assert result["next_cursor"] is None
+
+
+def test_list_changes(user_service, mock_user_repository):
+    user = {"id": 1, "name": "Joao", "email": "joao@gmail.com"}
+    user.update(dt_created=None, dt_updated=None)
+    mock_user_repository.fetch_changes.return_value = [
+        {"seq": 4, "user_id": 1, "deleted": False, **user},
+        {"seq": 7, "user_id": 2, "deleted": True, **dict.fromkeys(user)},
+    ]
+
+    result = user_service.list_changes(5, since=3)
+    mock_user_repository.fetch_changes.assert_called_once_with(6, 3)
+    assert result["changes"] == [
+        {"seq": 4, "id": 1, "op": "upsert", "user": user},
+        {"seq": 7, "id": 2, "op": "delete", "user": None},
+    ]
+    assert result["has_more"] is False
+    assert decode_cursor(result["next_cursor"], "seq") == 7
+
+
+def test_export_all(user_service, mock_user_repository):
+    fake_users = [
+        FakeUserModel(i, f"User {i}", f"u{i}@gmail.com").to_dict() for i in (1, 2)
+    ]
+    mock_user_repository.stream_users.return_value = iter(fake_users)
+
+    result = user_service.export_all()
+    mock_user_repository.stream_users.assert_not_called()
+    assert list(result) == fake_users
+
+
 def test_get_user_found(user_service, mock_user_repository):
     fake_user = FakeUserModel(3, "Joao A", "ja@gmail.com")
     mock_user_repository.get_user_by_id.return_value = fake_user
@@ -52,6 +114,34 @@ def test_get_user_not_found(user_service, mock_user_repository):
     assert result is None
 
 
+def test_get_user_reads_through_cache(user_service, mock_user_repository, user_cache):
+    fake_user = FakeUserModel(3, "Joao A", "ja@gmail.com")
+    mock_user_repository.get_user_by_id.return_value = fake_user
+
+    assert user_service.get_user(3) == fake_user.to_dict()
+    assert user_service.get_user(3) == fake_user.to_dict()
+    mock_user_repository.get_user_by_id.assert_called_once_with(3)
+    assert user_cache.stats()["hits"] == 1
+
+
+def test_writes_invalidate_cache(user_service, mock_user_repository, user_cache):
+    mock_user_repository.update_user.return_value = FakeUserModel(3, "Ana", "a@g.com")
+    mock_user_repository.delete_user.return_value = True
+    mock_user_repository.delete_users.return_value = {5}
+
+    user_cache.set(3, FakeUserModel(3, "Joao", "j@g.com"))
+    user_service.update_user(3, "Ana", "a@g.com")
+    assert user_cache.get(3) is None
+
+    user_cache.set(4, FakeUserModel(4, "Joao", "j@g.com"))
+    user_service.delete_user(4)
+    assert user_cache.get(4) is None
+
+    user_cache.set(5, FakeUserModel(5, "Joao", "j@g.com"))
+    user_service.delete_users([5])
+    assert user_cache.get(5) is None
+
+
 def test_create_user_valid(user_service, mock_user_repository):
     name = "Davi"
     email = "davi@gmail.com"
@@ -78,15 +168,12 @@ def test_create_user_invalid_email(user_service, mock_user_repository):
 
 
 def test_create_user_duplicate_email(user_service, mock_user_repository):
-    fake_existing = FakeUserModel(5, "Lucas", "lucas@yahoo.com")
-    mock_user_repository.get_user_by_email.return_value = fake_existing
+    mock_user_repository.create_user.return_value = None
 
     result = user_service.create_user("Lucas", "lucas@yahoo.com")
     assert result is None
-    user_service.user_repository.get_user_by_email.assert_called_once_with(
-        "lucas@yahoo.com"
-    )
-    user_service.user_repository.assert_not_called()
+    mock_user_repository.create_user.assert_called_once()
+    mock_user_repository.get_user_by_email.assert_not_called()
 
 
 def test_update_user_valid(user_service, mock_user_repository):
@@ -107,15 +194,28 @@ def test_update_user_valid(user_service, mock_user_repository):
 
 def test_update_user_invalid_input(user_service, mock_user_repository):
     result = user_service.update_user(7, "E", "e@g.com")
-    assert result is None
+    assert result is UserWriteError.INVALID
 
 
-def test_update_user_duplicate_email(user_service, mock_user_repository):
-    fake_existing = FakeUserModel(8, "User 1", "a@gmail.com")
-    mock_user_repository.get_user_by_email.return_value = fake_existing
+def test_update_user_invalid_email(user_service, mock_user_repository):
+    result = user_service.update_user(7, "Maria", "not-an-email")
+    assert result is UserWriteError.INVALID
+    mock_user_repository.update_user.assert_not_called()
 
-    result = user_service.update_user(8, "User 2", "a@gmail.com")
-    assert result is None
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        UserWriteError.NOT_FOUND,
+        UserWriteError.EMAIL_TAKEN,
+        UserWriteError.PRECONDITION_FAILED,
+    ],
+)
+def test_update_user_failed(user_service, mock_user_repository, error):
+    mock_user_repository.update_user.return_value = error
+
+    result = user_service.update_user(8, "Maria Silva", "a@gmail.com")
+    assert result is error
 
 
 def test_delete_user_success(user_service, mock_user_repository):
@@ -125,9 +225,136 @@ def test_delete_user_success(user_service, mock_user_repository):
 
 
 def test_delete_user_not_found(user_service, mock_user_repository):
-    mock_user_repository.delete_user.return_value = False
+    mock_user_repository.delete_user.return_value = UserWriteError.NOT_FOUND
     result = user_service.delete_user(999)
-    assert result is False
+    assert result is UserWriteError.NOT_FOUND
+
+
+def test_create_users(user_service, mock_user_repository):
+    mock_user_repository.fetch_email_owners.return_value = {"taken@gmail.com": 1}
+    mock_user_repository.create_users.return_value = [
+        FakeUserModel(2, "Joao", "joao@gmail.com")
+    ]
+
+    results = user_service.create_users(
+        [
+            {"name": "Joao", "email": "joao@gmail.com"},
+            {"name": "Maria", "email": "taken@gmail.com"},
+            {"name": "Ze", "email": "joao@gmail.com"},
+            {"name": "X", "email": "x@gmail.com"},
+            "not a user",
+        ]
+    )
+    assert [result["status"] for result in results] == [201, 409, 409, 400, 400]
+    assert set(results[3]["fields"]) == {"name"}
+    assert results[0]["user"] == {"id": 2, "name": "Joao", "email": "joao@gmail.com"}
+    mock_user_repository.fetch_email_owners.assert_called_once()
+    mock_user_repository.create_users.assert_called_once_with(
+        [{"name": "Joao", "email": "joao@gmail.com"}]
+    )
+
+
+def test_create_users_conflict(user_service, mock_user_repository):
+    mock_user_repository.fetch_email_owners.return_value = {}
+    mock_user_repository.create_users.return_value = None
+
+    assert user_service.create_users([{"name": "Joao", "email": "j@gmail.com"}]) is None
+
+
+def test_create_users_skips_email_query_for_new_emails(
+    mock_user_repository, user_cache
+):
+    email_index = EmailIndex(lambda: (1, iter(["taken@gmail.com"])), 1000, 0.01)
+    email_index.rebuild()
+    user_service = UserService(mock_user_repository, user_cache, email_index)
+    mock_user_repository.create_users.return_value = [
+        FakeUserModel(2, "Joao", "joao@gmail.com")
+    ]
+
+    results = user_service.create_users([{"name": "Joao", "email": "joao@gmail.com"}])
+
+    assert results[0]["status"] == 201
+    mock_user_repository.fetch_email_owners.assert_not_called()
+    # now known, the email is checked on the database
+    mock_user_repository.fetch_email_owners.return_value = {"joao@gmail.com": 2}
+    results = user_service.create_users([{"name": "Joao", "email": "joao@gmail.com"}])
+    assert results[0]["status"] == 409
+
+
+def test_create_users_conflict_checks_emails_on_database(
+    mock_user_repository, user_cache
+):
+    email_index = EmailIndex(lambda: (0, iter([])), 1000, 0.01)
+    email_index.rebuild()
+    user_service = UserService(mock_user_repository, user_cache, email_index)
+    mock_user_repository.fetch_email_owners.return_value = {"j@gmail.com": 7}
+    mock_user_repository.create_users.side_effect = [
+        None,
+        [FakeUserModel(8, "Maria", "m@gmail.com")],
+    ]
+
+    # j@gmail.com was taken by another process, unknown to this index
+    results = user_service.create_users(
+        [
+            {"name": "Joao", "email": "j@gmail.com"},
+            {"name": "Maria", "email": "m@gmail.com"},
+        ]
+    )
+    assert [result["status"] for result in results] == [409, 201]
+    mock_user_repository.create_users.assert_called_with(
+        [{"name": "Maria", "email": "m@gmail.com"}]
+    )
+
+    # now known, the email is checked before the insert
+    mock_user_repository.create_users.side_effect = None
+    mock_user_repository.fetch_email_owners.reset_mock()
+    results = user_service.create_users([{"name": "Joao", "email": "j@gmail.com"}])
+    assert results[0]["status"] == 409
+    mock_user_repository.fetch_email_owners.assert_called_once()
+
+
+def test_update_users_conflict_checks_emails_on_database(
+    user_service, mock_user_repository
+):
+    mock_user_repository.fetch_existing_ids.return_value = {1}
+    mock_user_repository.fetch_email_owners.side_effect = [{}, {"j@gmail.com": 7}]
+    mock_user_repository.update_users.return_value = None
+
+    results = user_service.update_users(
+        [{"id": 1, "name": "Joao", "email": "j@gmail.com"}]
+    )
+    assert results[0]["status"] == 409
+    mock_user_repository.update_users.assert_called_once()
+
+
+def test_update_users(user_service, mock_user_repository):
+    mock_user_repository.fetch_existing_ids.return_value = {1, 2, 4}
+    mock_user_repository.fetch_email_owners.return_value = {"maria@gmail.com": 2}
+    mock_user_repository.update_users.return_value = [
+        FakeUserModel(1, "Joao", "joao@gmail.com")
+    ]
+
+    results = user_service.update_users(
+        [
+            {"id": 1, "name": "Joao", "email": "joao@gmail.com"},
+            {"id": 1, "name": "Joao", "email": "other@gmail.com"},
+            {"id": 3, "name": "Ana", "email": "ana@gmail.com"},
+            {"id": 4, "name": "Lia", "email": "maria@gmail.com"},
+            {"name": "Ana", "email": "ana@gmail.com"},
+        ]
+    )
+    assert [result["status"] for result in results] == [200, 409, 404, 409, 400]
+    mock_user_repository.update_users.assert_called_once_with(
+        [{"id": 1, "name": "Joao", "email": "joao@gmail.com"}]
+    )
+
+
+def test_delete_users(user_service, mock_user_repository):
+    mock_user_repository.delete_users.return_value = {1}
+
+    results = user_service.delete_users([1, 2, "3"])
+    assert [result["status"] for result in results] == [200, 404, 400]
+    mock_user_repository.delete_users.assert_called_once_with({1, 2})
 
 
 def test_is_name_valid():
@@ -146,3 +373,35 @@ def test_is_email_valid():
     assert UserService.is_email_valid("user_name+tag@sub.domain.com") is True
     assert UserService.is_email_valid("user1@com") is False
     assert UserService.is_email_valid("email-invalido") is False
+
+
+def test_get_stats(user_service, mock_user_repository):
+    mock_user_repository.fetch_stats.return_value = {
+        "total": {"": 3},
+        "day": {"2026-10-17": 1, "2026-10-18": 2},
+        "week": {"2026-W42": 3},
+        "domain": {"example.com": 2, "other.org": 1},
+    }
+
+    stats = user_service.get_stats(days=7, domains=2)
+
+    since = mock_user_repository.fetch_stats.call_args.args[0]
+    assert (datetime.utcnow().date() - since).days == 6
+    assert mock_user_repository.fetch_stats.call_args.args[1] == 2
+    assert stats == {
+        "total": 3,
+        "by_day": {"2026-10-17": 1, "2026-10-18": 2},
+        "by_week": {"2026-W42": 3},
+        "by_domain": {"example.com": 2, "other.org": 1},
+    }
+
+
+def test_get_stats_without_users(user_service, mock_user_repository):
+    mock_user_repository.fetch_stats.return_value = {
+        "total": {},
+        "day": {},
+        "week": {},
+        "domain": {},
+    }
+
+    assert user_service.get_stats(days=30, domains=10)["total"] == 0
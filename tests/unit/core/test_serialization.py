@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from flask import Flask, jsonify
+
+from app.core import serialization
+from app.core.serialization import dumps, json_response
+
+SAMPLES = [
+    {"id": 1, "name": "Ana", "dt_created": datetime(2024, 2, 29, 23, 59, 59, 999999)},
+    {"users": [{"b": 1, "a": None}], "next_cursor": "aWQ6MQ"},
+    {
+        "name": "João",
+        "dt_updated": datetime(2024, 1, 1, 1, tzinfo=timezone(timedelta(hours=3))),
+    },
+    [datetime(1999, 12, 31, 0, 0, 0), "plain"],
+]
+
+
+@pytest.fixture
+def app():
+    return Flask(__name__)
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def encoder(request, monkeypatch):
+    if request.param == "stdlib":
+        monkeypatch.setattr(serialization, "orjson", None)
+    return request.param
+
+
+@pytest.mark.parametrize("obj", SAMPLES)
+def test_dumps_matches_jsonify(app, encoder, obj):
+    with app.app_context():
+        assert dumps(obj) + b"\n" == jsonify(obj).get_data()
+
+
+def test_json_response(app):
+    with app.app_context():
+        response = json_response(SAMPLES[0], 201)
+        expected = jsonify(SAMPLES[0])
+
+    assert response.status_code == 201
+    assert response.headers["Content-Type"] == expected.headers["Content-Type"]
+    assert response.get_data() == expected.get_data()
@@ -0,0 +1,58 @@
+from app.core.validation import (
+    EMAIL_MAX_LENGTH,
+    ID_MAX,
+    NAME_MAX_LENGTH,
+    is_email_valid,
+    is_id_valid,
+    is_name_valid,
+    validate_many,
+    validate_user,
+)
+
+
+def test_is_name_valid():
+    assert is_name_valid("Maria") is True
+    assert is_name_valid("  D'Avila  ") is True
+    assert is_name_valid(" Ana Maria ") is True
+    assert is_name_valid("A") is False
+    assert is_name_valid("Ana-") is False
+    assert is_name_valid(None) is False
+    assert is_name_valid("A" * NAME_MAX_LENGTH) is True
+    assert is_name_valid("A" * (NAME_MAX_LENGTH + 1)) is False
+
+
+def test_is_email_valid():
+    assert is_email_valid("nome@mail.com") is True
+    assert is_email_valid("nome@mail.com\n") is False
+    assert is_email_valid(42) is False
+    domain = "@mail.com"
+    assert is_email_valid("a" * (EMAIL_MAX_LENGTH - len(domain)) + domain) is True
+    assert is_email_valid("a" * (EMAIL_MAX_LENGTH + 1 - len(domain)) + domain) is False
+
+
+def test_is_id_valid():
+    assert is_id_valid(1) is True
+    assert is_id_valid(0) is False
+    assert is_id_valid("1") is False
+    assert is_id_valid(True) is False
+    assert is_id_valid(ID_MAX) is True
+    assert is_id_valid(ID_MAX + 1) is False
+
+
+def test_validate_user():
+    assert validate_user({"name": "Maria", "email": "maria@gmail.com"}) == {}
+    assert set(validate_user({"name": "M", "email": "maria"})) == {"name", "email"}
+    assert set(validate_user({"name": "Maria", "email": "m@g.com"}, True)) == {"id"}
+    assert set(validate_user("Maria")) == {"user"}
+
+
+def test_validate_many():
+    errors = validate_many(
+        [
+            {"id": 1, "name": "Maria", "email": "maria@gmail.com"},
+            {"id": 0, "name": "Maria", "email": "maria@gmail.com"},
+            {"id": 2, "name": "Maria"},
+        ],
+        with_id=True,
+    )
+    assert [set(item_errors) for item_errors in errors] == [set(), {"id"}, {"email"}]
@@ -0,0 +1,58 @@
+import io
+import json
+import logging
+
+import pytest
+
+from app.logger import configure_logging, request_id_var
+from app.settings import settings
+
+
+@pytest.fixture
+def configure(monkeypatch):
+    """Configures logging to a buffer with the given settings, restoring the default configuration after."""
+    stream = io.StringIO()
+
+    def configure_with(**overrides):
+        for key, value in overrides.items():
+            monkeypatch.setattr(settings, key, value)
+        return configure_logging(stream=stream)
+
+    yield configure_with, stream
+    monkeypatch.undo()
+    configure_logging()
+
+
+def test_queue_json_lines_carry_request_id(configure):
+    configure_with, stream = configure
+    app_logger = configure_with(LOG_QUEUE=True, LOG_JSON=True)
+    token = request_id_var.set("req-1")
+    try:
+        for i in range(1000):
+            app_logger.info("m=test, record %s", i)
+    finally:
+        request_id_var.reset(token)
+    # stopping the listener writes out everything still queued
+    configure_logging(stream=io.StringIO())
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert len(lines) == 1000
+    assert lines[-1]["message"] == "m=test, record 999"
+    assert lines[-1]["level"] == "INFO"
+    assert {line["request_id"] for line in lines} == {"req-1"}
+
+
+def test_info_sampling_keeps_warnings(configure):
+    configure_with, stream = configure
+    app_logger = configure_with(LOG_INFO_SAMPLE_RATE=0.0)
+    app_logger.info("m=test, dropped")
+    app_logger.warning("m=test, kept")
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 1 and lines[0].endswith("m=test, kept")
+
+
+def test_reconfiguring_does_not_stack_filters(configure):
+    configure_with, _ = configure
+    configure_with()
+    assert len(configure_with().filters) == 1
+    assert logging.getLogger(settings.PROJECT_NAME).filters == configure_with().filters